@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     Usuario, Fornecedor, Item, Funcionario,
-    Atribuicao, OrdemCompra, HistoricoAuditoria, ItemOrdem, Pedido, Loja
+    Atribuicao, OrdemCompra, HistoricoAuditoria, ItemOrdem, Pedido, Loja,
+    ResumoDashboard, MovimentoEstoque, ResumoMensalPedidos, PedidoArquivado, Tarefa
 )
 
 #  faz as tabelas aparecerem no painel admin
@@ -14,4 +15,9 @@ admin.site.register(OrdemCompra)
 admin.site.register(HistoricoAuditoria)
 admin.site.register(ItemOrdem)
 admin.site.register(Pedido)
-admin.site.register(Loja)
\ No newline at end of file
+admin.site.register(Loja)
+admin.site.register(ResumoDashboard)
+admin.site.register(MovimentoEstoque)
+admin.site.register(ResumoMensalPedidos)
+admin.site.register(PedidoArquivado)
+admin.site.register(Tarefa)
@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import caching, sincronizacao
+from .roteamento import leitura_em_replica, primario_se_alterado
+from .filtros import (
+    filtrar_fornecedores, filtrar_itens, filtrar_lojas, filtrar_pedidos, filtrar_pedidos_arquivados,
+    incluir_arquivados,
+)
+from .models import Fornecedor, Item, Loja
+from .pagination import paginar
+
+# API JSON somente leitura (v1). Usa os mesmos filtros das listagens, pagina por
+# cursor e serializa com .values(), sem instanciar modelos. ETag e
+# Last-Modified vêm das versões das tabelas em core/caching.py, então um
+# cliente que repete a consulta recebe 304 sem que nenhuma linha seja lida.
+
+VERSAO = 'v1'
+POR_PAGINA = 100
+MAX_POR_PAGINA = 500
+
+# nome: (filtro, ordenação, tabelas das quais a resposta depende, campos)
+RECURSOS = {
+    'itens': (
+        filtrar_itens, ('nome', 'id'), ['core.item'],
+        ('id', 'nome', 'categoria', 'localizacao', 'quantidade', 'data_aquisicao', 'status', 'valor',
+         'atualizado_em'),
+    ),
+    'fornecedores': (
+        filtrar_fornecedores, ('nome', 'id'), ['core.fornecedor'],
+        ('id', 'nome', 'cnpj', 'contato', 'email', 'produto_principal', 'status', 'atualizado_em'),
+    ),
+    'lojas': (
+        filtrar_lojas, ('nome', 'id'), ['core.loja'],
+        ('id', 'nome', 'responsavel', 'telefone', 'email', 'endereco', 'cidade', 'estado', 'cep',
+         'inaugurada_em', 'status', 'atualizado_em'),
+    ),
+    'pedidos': (
+        filtrar_pedidos, ('-criado_em', '-id'), ['core.pedido', 'core.fornecedor', 'core.item'],
+        ('id', 'fornecedor_id', 'fornecedor__nome', 'item_id', 'item__nome', 'quantidade', 'status',
+         'criado_em', 'entrega_prevista'),
+    ),
+}
+
+# Recursos com feed de mudanças (/mudancas/?since=<token>).
+SINCRONIZAVEIS = {'itens': Item, 'fornecedores': Fornecedor, 'lojas': Loja}
+
+
+def _autorizado(request):
+    if request.user.is_authenticated:
+        return True
+    tokens = getattr(settings, 'ESTOQUE_API_TOKENS', ())
+    enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return bool(enviado) and any(hmac.compare_digest(enviado, token) for token in tokens)
+
+
+def _versoes(recurso):
+    return [caching.versao(label) for label in RECURSOS[recurso][2]]
+
+
+def _etag(request, recurso):
+    bruto = f'{VERSAO}:{recurso}:{_versoes(recurso)}:{request.GET.urlencode()}'
+    return hashlib.md5(bruto.encode()).hexdigest()
+
+
+def _ultima_alteracao(request, recurso):
+    return datetime.fromtimestamp(max(_versoes(recurso)) / 1e9, tz=timezone.utc)
+
+
+def _por_pagina(request, padrao=POR_PAGINA):
+    try:
+        return max(1, min(int(request.GET.get('limite', padrao)), MAX_POR_PAGINA))
+    except ValueError:
+        return padrao
+
+
+@require_GET
+def lista(request, recurso):
+    if not _autorizado(request):
+        return JsonResponse({'erro': 'Autenticação necessária.'}, status=401)
+    return _lista_condicional(request, recurso)
+
+
+@leitura_em_replica
+@condition(etag_func=_etag, last_modified_func=_ultima_alteracao)
+def _lista_condicional(request, recurso):
+    filtrar, ordenacao, _, campos = RECURSOS[recurso]
+    linhas = filtrar(request.GET).values(*campos)
+    if recurso == 'pedidos' and incluir_arquivados(request.GET):
+        linhas = [linhas, filtrar_pedidos_arquivados(request.GET).values(*campos)]
+    # O ETag já é o da versão nova: não pode sair com dados de uma réplica atrasada.
+    with primario_se_alterado(_versoes(recurso)):
+        pagina = paginar(linhas, ordenacao, request.GET.get('cursor'), por_pagina=_por_pagina(request), total=False)
+    response = JsonResponse({
+        'results': pagina.object_list,
+        'next': pagina.next_cursor,
+        'previous': pagina.previous_cursor,
+    })
+    # Sempre revalidar: a resposta pode ser guardada, mas o ETag decide se ainda vale.
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# Sem @leitura_em_replica: a margem do feed não cobre o atraso de uma réplica,
+# e uma linha lida tarde demais ficaria para trás do token.
+@require_GET
+def mudancas(request, recurso):
+    """
+    Linhas criadas ou alteradas e ids excluídos desde `since`. Sem `since`,
+    começa do início; o cliente repete com `next` enquanto `has_more`.
+    """
+    if not _autorizado(request):
+        return JsonResponse({'erro': 'Autenticação necessária.'}, status=401)
+    campos = RECURSOS[recurso][3]
+    linhas, excluidos, proximo, tem_mais = sincronizacao.mudancas(
+        SINCRONIZAVEIS[recurso], campos, request.GET.get('since'),
+        por_pagina=_por_pagina(request, sincronizacao.POR_PAGINA),
+    )
+    response = JsonResponse({'results': linhas, 'deleted': excluidos, 'next': proximo, 'has_more': tem_mais})
+    response['Cache-Control'] = 'private, no-store'
+    return response
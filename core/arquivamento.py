@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import auditoria, caching
+from .em_massa import apagar_sem_sinais
+from .models import MovimentoEstoque, Pedido, PedidoArquivado
+
+# Arquivamento quente/frio dos pedidos. Pedidos entregues ou cancelados criados
+# há mais de ESTOQUE_ARQUIVAR_APOS_DIAS dias saem de Pedido (a tabela que a
+# lista, os formulários e os sinais usam) e vão para PedidoArquivado, em lotes
+# com uma transação cada. Nada do que é derivado muda: o livro de estoque passa
+# a apontar para o pedido arquivado, as séries mensais continuam contando (e
+# resumo_mensal.reconstruir lê as duas tabelas) e o painel só conta pendentes.
+# Exportações, a lista com ?arquivados=1 e a API com ?arquivados=1 leem as duas.
+
+STATUS_FECHADOS = ('ENTREGUE', 'CANCELADO')
+LOTE = 1000
+CAMPOS = ('id', 'fornecedor_id', 'item_id', 'quantidade', 'status', 'criado_em', 'entrega_prevista', 'observacoes')
+
+
+def _dias():
+    return getattr(settings, 'ESTOQUE_ARQUIVAR_APOS_DIAS', 180)
+
+
+def candidatos(dias=None, agora=None):
+    limite = (agora or timezone.now()) - timedelta(days=_dias() if dias is None else dias)
+    return Pedido.objects.filter(status__in=STATUS_FECHADOS, criado_em__lt=limite)
+
+
+def arquivar_lote(pedidos, tamanho=LOTE):
+    """Move até `tamanho` pedidos de `pedidos` para o arquivo e devolve quantos."""
+    with transaction.atomic():
+        linhas = list(pedidos.select_for_update().order_by('pk').values(*CAMPOS)[:tamanho])
+        if not linhas:
+            return 0
+        pks = [linha['id'] for linha in linhas]
+        PedidoArquivado.objects.bulk_create([PedidoArquivado(**linha) for linha in linhas])
+        MovimentoEstoque.objects.filter(pedido__in=pks).update(pedido_arquivado_id=F('pedido_id'), pedido=None)
+        # Os movimentos já apontam para o arquivado; sem sinais, as séries e o painel não mudam.
+        apagar_sem_sinais(Pedido.objects.filter(pk__in=pks))
+        auditoria.registrar('ARQUIVAMENTO', 'core.pedido', alteracoes={
+            'arquivados': len(pks), 'primeiro': pks[0], 'ultimo': pks[-1],
+        })
+        caching.invalidar_no_commit('core.pedido')
+    return len(pks)
+
+
+def arquivar(dias=None, tamanho=LOTE, agora=None):
+    """Arquiva todos os candidatos, lote a lote; devolve o total movido."""
+    total = 0
+    while True:
+        movidos = arquivar_lote(candidatos(dias, agora), tamanho)
+        total += movidos
+        if movidos < tamanho:
+            return total
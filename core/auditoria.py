@@ -0,0 +1,240 @@
+import atexit
+import contextvars
+import logging
+import os
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+# Trilha de auditoria com gravação adiada. Os sinais montam a entrada (quem,
+# o quê e a diferença dos campos) e, após o commit, ela vai para uma fila em
+# memória. A fila é gravada com bulk_create por uma thread do processo: a cada
+# ESTOQUE_AUDITORIA_INTERVALO segundos, quando passa de ESTOQUE_AUDITORIA_LOTE
+# entradas ou no fim de cada requisição (depois da resposta enviada). No
+# encerramento normal do processo o que restar é gravado pelo atexit.
+#
+# Com ESTOQUE_AUDITORIA_INTERVALO = 0 não há thread e a gravação acontece no
+# próprio fluxo, no fim da requisição ou ao atingir o lote.
+
+logger = logging.getLogger('core.auditoria')
+
+# Modelos que já têm registro próprio ou são só derivados de outros.
+NAO_AUDITADOS = {'historicoauditoria', 'resumodashboard', 'movimentoestoque', 'exclusao', 'tarefa', 'previsaoitem'}
+CAMPOS_SENSIVEIS = {'password'}
+# Carimbos gravados pelo próprio save; mudam sempre e não dizem o que mudou.
+CAMPOS_IGNORADOS = {'atualizado_em'}
+
+_requisicao = contextvars.ContextVar('auditoria_requisicao', default=None)
+
+_trava = threading.Lock()
+_pendentes = []
+_acordar = threading.Event()
+_escritor = None
+_pid = None
+
+
+def modelos_auditados():
+    return [
+        model for model in apps.get_app_config('core').get_models()
+        if model._meta.model_name not in NAO_AUDITADOS
+    ]
+
+
+def _lote():
+    return getattr(settings, 'ESTOQUE_AUDITORIA_LOTE', 100)
+
+
+def _intervalo():
+    return getattr(settings, 'ESTOQUE_AUDITORIA_INTERVALO', 2.0)
+
+
+# --- Contexto da requisição ---
+
+def definir_requisicao(request):
+    return _requisicao.set(request)
+
+
+def restaurar_requisicao(token):
+    _requisicao.reset(token)
+
+
+def _usuario_id():
+    request = _requisicao.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+# --- Estado e diferenças ---
+
+def _valor(instance, field):
+    if field.name in CAMPOS_SENSIVEIS:
+        return '***'
+    return getattr(instance, field.attname)
+
+
+def guardar_estado(instance):
+    """Valores carregados do banco, para calcular a diferença no save."""
+    if instance.pk is None:
+        instance._auditoria_estado = None
+        return
+    deferidos = instance.get_deferred_fields()
+    instance._auditoria_estado = {
+        field.name: _valor(instance, field)
+        for field in instance._meta.concrete_fields
+        if field.attname not in deferidos
+    }
+
+
+def diferencas(instance, update_fields=None):
+    antes = getattr(instance, '_auditoria_estado', None) or {}
+    deferidos = instance.get_deferred_fields()
+    alteracoes = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in deferidos or field.name in CAMPOS_IGNORADOS:
+            continue
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        depois = _valor(instance, field)
+        if field.name not in antes or antes[field.name] != depois:
+            alteracoes[field.name] = [antes.get(field.name), depois]
+    return alteracoes
+
+
+# --- Registro ---
+
+def _entrada(acao, modelo, objeto_id, alteracoes, usuario_id):
+    return {
+        'data': timezone.now(),
+        'acao': acao,
+        'usuario_id': usuario_id,
+        'modelo': modelo,
+        'objeto_id': '' if objeto_id is None else str(objeto_id),
+        'alteracoes': alteracoes or {},
+    }
+
+
+def registrar(acao, modelo, objeto_id='', alteracoes=None):
+    entrada = _entrada(acao, modelo, objeto_id, alteracoes, _usuario_id())
+    # Só entra na fila se a transação confirmar.
+    transaction.on_commit(lambda: _enfileirar([entrada]))
+
+
+def registrar_varios(acao, modelo, alteracoes_por_objeto):
+    """Uma entrada por objeto de uma operação em massa ({pk: alteracoes})."""
+    usuario_id = _usuario_id()
+    entradas = [
+        _entrada(acao, modelo, objeto_id, alteracoes, usuario_id)
+        for objeto_id, alteracoes in alteracoes_por_objeto.items()
+    ]
+    if entradas:
+        transaction.on_commit(lambda: _enfileirar(entradas))
+
+
+def objeto_salvo(instance, created, update_fields=None):
+    if created:
+        registrar('CRIACAO', instance._meta.label_lower, instance.pk, diferencas(instance))
+    else:
+        alteracoes = diferencas(instance, update_fields)
+        if alteracoes:
+            registrar('ALTERACAO', instance._meta.label_lower, instance.pk, alteracoes)
+    guardar_estado(instance)
+
+
+def objeto_removido(instance):
+    estado = getattr(instance, '_auditoria_estado', None) or {}
+    registrar(
+        'EXCLUSAO', instance._meta.label_lower, instance.pk,
+        {campo: [valor, None] for campo, valor in estado.items()},
+    )
+
+
+# --- Fila ---
+
+def _reiniciar_se_bifurcado():
+    # Depois de um fork (gunicorn --preload) a fila e a thread são do processo pai.
+    global _pid, _escritor
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _pendentes.clear()
+        _escritor = None
+
+
+def _enfileirar(entradas):
+    with _trava:
+        _reiniciar_se_bifurcado()
+        _pendentes.extend(entradas)
+        cheio = len(_pendentes) >= _lote()
+    if cheio:
+        acordar()
+
+
+def _iniciar_escritor():
+    global _escritor
+    if _escritor is None or not _escritor.is_alive():
+        _escritor = threading.Thread(target=_escrever, name='auditoria', daemon=True)
+        _escritor.start()
+    return _escritor
+
+
+def acordar():
+    """Pede a gravação da fila: à thread, se houver, ou aqui mesmo."""
+    if not pendentes():
+        return
+    if _intervalo():
+        with _trava:
+            _iniciar_escritor()
+        _acordar.set()
+    else:
+        descarregar()
+
+
+def _escrever():
+    while True:
+        _acordar.wait(_intervalo() or None)
+        _acordar.clear()
+        close_old_connections()
+        descarregar()
+
+
+def pendentes():
+    with _trava:
+        return len(_pendentes)
+
+
+def descarregar():
+    """Grava tudo o que está na fila; devolve quantas entradas foram gravadas."""
+    from .models import HistoricoAuditoria
+
+    with _trava:
+        lote = list(_pendentes)
+        _pendentes.clear()
+    if not lote:
+        return 0
+    try:
+        HistoricoAuditoria.objects.bulk_create(
+            [HistoricoAuditoria(**entrada) for entrada in lote], batch_size=_lote(),
+        )
+    except Exception:
+        logger.exception('Falha ao gravar %d entradas de auditoria; nova tentativa no próximo ciclo.', len(lote))
+        with _trava:
+            _pendentes[:0] = lote
+        return 0
+    return len(lote)
+
+
+def limpar():
+    with _trava:
+        _pendentes.clear()
+
+
+def _encerrar():
+    if _pid == os.getpid():
+        descarregar()
+
+
+atexit.register(_encerrar)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+# Usuário da sessão guardado no cache por ESTOQUE_USUARIO_CACHE segundos, para
+# que o AuthenticationMiddleware não consulte o banco a cada requisição.
+# Qualquer save ou exclusão do usuário (perfil, senha, is_active...) apaga a
+# entrada (ver core/signals.py); a verificação do hash da senha na sessão
+# continua sendo feita pelo Django sobre o usuário em cache.
+
+
+def _timeout():
+    return getattr(settings, 'ESTOQUE_USUARIO_CACHE', 0)
+
+
+def _chave(pk):
+    return f'usuario:{pk}'
+
+
+def invalidar(pk):
+    cache.delete(_chave(pk))
+    # De novo após o commit: outra requisição pode ter lido a linha antiga.
+    transaction.on_commit(lambda: cache.delete(_chave(pk)))
+
+
+class BackendComCache(ModelBackend):
+    def get_user(self, user_id):
+        timeout = _timeout()
+        if not timeout:
+            return super().get_user(user_id)
+        user = cache.get(_chave(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(_chave(user_id), user, timeout)
+        return user
@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Cache das listas e dropdowns. Cada tabela tem uma "versão" (timestamp da
+# última escrita) guardada no próprio cache; as chaves incluem as versões das
+# tabelas de que dependem, então qualquer save/delete invalida as entradas
+# antigas sem precisar apagá-las.
+#
+# Para garantir leitura das próprias escritas mesmo com cache por processo
+# (locmem), o middleware guarda na sessão o instante da última escrita do
+# usuário e entradas mais antigas que ele são ignoradas.
+
+CHAVE_ESCRITA_SESSAO = 'cache_ultima_escrita'
+
+
+def _timeout():
+    return getattr(settings, 'ESTOQUE_CACHE_TIMEOUT', 300)
+
+
+def _agora():
+    return time.time_ns()
+
+
+def versao(label):
+    chave = f'versao:{label}'
+    valor = cache.get(chave)
+    if valor is None:
+        valor = _agora()
+        cache.add(chave, valor, None)
+        valor = cache.get(chave, valor)
+    return valor
+
+
+def invalidar(label):
+    cache.set(f'versao:{label}', _agora(), None)
+
+
+def invalidar_no_commit(label):
+    invalidar(label)
+    # De novo após o commit, para descartar o que outra requisição tenha lido
+    # e gravado no cache enquanto a transação ainda estava aberta.
+    transaction.on_commit(lambda: invalidar(label))
+
+
+def chave(nome, labels, parametros=None):
+    versoes = '-'.join(str(versao(label)) for label in labels)
+    bruto = '&'.join(f'{k}={v}' for k, v in sorted((parametros or {}).items()))
+    resumo_parametros = hashlib.md5(bruto.encode()).hexdigest()
+    return f'{nome}:{versoes}:{resumo_parametros}'
+
+
+def versao_fragmento(request, labels, *extras):
+    """
+    Valor para o `{% cache %}` dos templates variar com as tabelas `labels` e
+    com a última escrita do usuário (leitura das próprias escritas).
+    """
+    ultima_escrita = request.session.get(CHAVE_ESCRITA_SESSAO, 0)
+    return '-'.join(str(parte) for parte in [*(versao(label) for label in labels), ultima_escrita, *extras])
+
+
+def obter(request, nome, labels, gerar, parametros=None):
+    """
+    Devolve o valor em cache para `nome` (dependente das tabelas `labels`) e dos
+    `parametros`, ou chama `gerar()` e guarda o resultado.
+    """
+    chave_cache = chave(nome, labels, parametros)
+    entrada = cache.get(chave_cache)
+    ultima_escrita = request.session.get(CHAVE_ESCRITA_SESSAO, 0) if request is not None else 0
+    if entrada is not None and entrada[0] > ultima_escrita:
+        return entrada[1]
+    from . import roteamento
+
+    inicio = _agora()
+    with roteamento.primario_se_alterado([versao(label) for label in labels]):
+        valor = gerar()
+    cache.set(chave_cache, (inicio, valor), _timeout())
+    return valor
+
+
+def registrar_escrita(request):
+    request.session[CHAVE_ESCRITA_SESSAO] = _agora()
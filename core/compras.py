@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import auditoria, caching, previsao
+from .models import Fornecedor, ItemOrdem, OrdemCompra, Pedido, PedidoArquivado
+
+# Geração automática de ordens de compra: uma OrdemCompra por fornecedor com
+# uma linha (ItemOrdem) por item no ou abaixo do ponto de pedido. O número de
+# consultas não depende de quantos itens entram:
+#   1. itens a repor que ainda não estão numa ordem ou pedido em aberto, já com
+#      o último fornecedor ativo dos seus pedidos (subconsulta);
+#   2. fornecedores ativos com produto principal;
+#   3. INSERT das ordens e 4. INSERT das linhas (bulk_create), na mesma transação.
+#
+# O fornecedor preferido é o que tem o nome (ou a categoria) do item como
+# produto principal; senão, o do último pedido. Itens cujos pedidos já foram
+# todos arquivados (core/arquivamento.py) usam o do último PedidoArquivado.
+# Itens sem nenhum dos dois ficam de fora e são contados no resultado.
+
+ORDENS_ABERTAS = ('PENDENTE', 'APROVADA')
+PEDIDOS_ABERTOS = ('PENDENTE', 'EM_TRANSITO')
+
+
+def _chave(texto):
+    return (texto or '').strip().casefold()
+
+
+def quantidade_a_pedir(quantidade, ponto_pedido, lote_reposicao):
+    """Lote de reposição previsto, ou o que falta para passar do ponto de pedido, se for mais."""
+    return max(lote_reposicao or 0, ponto_pedido - quantidade + 1)
+
+
+def candidatos(itens=None):
+    """Itens a repor sem ordem de compra nem pedido em aberto, anotados com `ultimo_fornecedor`."""
+    ultimo, ultimo_arquivado = (
+        Subquery(
+            model.objects.filter(item=OuterRef('pk'), fornecedor__status='ATIVO')
+            .order_by('-criado_em', '-pk').values('fornecedor')[:1]
+        )
+        for model in (Pedido, PedidoArquivado)
+    )
+    return (
+        previsao.a_repor(itens)
+        .exclude(pk__in=ItemOrdem.objects.filter(ordem_compra__status__in=ORDENS_ABERTAS).values('item'))
+        .exclude(pk__in=Pedido.objects.filter(status__in=PEDIDOS_ABERTOS).values('item'))
+        .annotate(ultimo_fornecedor=Coalesce(ultimo, ultimo_arquivado))
+    )
+
+
+def _preferidos():
+    """Produto principal (normalizado) -> fornecedor ativo; o mais antigo vence."""
+    preferidos = {}
+    fornecedores = Fornecedor.objects.filter(status='ATIVO').exclude(produto_principal__isnull=True)
+    for pk, produto in fornecedores.exclude(produto_principal='').order_by('pk').values_list('pk', 'produto_principal'):
+        preferidos.setdefault(_chave(produto), pk)
+    return preferidos
+
+
+def gerar(itens=None):
+    """Cria as ordens de compra dos itens a repor (todos ou os de `itens`)."""
+    with transaction.atomic():
+        campos = ('pk', 'nome', 'categoria', 'quantidade', 'ponto_pedido', 'previsao__lote_reposicao', 'ultimo_fornecedor')
+        linhas = list(candidatos(itens).order_by('pk').values_list(*campos))
+        preferidos = _preferidos() if linhas else {}
+
+        por_fornecedor = {}
+        sem_fornecedor = 0
+        for pk, nome, categoria, quantidade, ponto_pedido, lote, ultimo in linhas:
+            fornecedor = preferidos.get(_chave(nome)) or preferidos.get(_chave(categoria)) or ultimo
+            if fornecedor is None:
+                sem_fornecedor += 1
+                continue
+            por_fornecedor.setdefault(fornecedor, []).append(
+                ItemOrdem(item_id=pk, quantidade=quantidade_a_pedir(quantidade, ponto_pedido, lote))
+            )
+
+        # bulk_create devolve os ids (SQLite 3.35+, PostgreSQL), usados nas linhas.
+        ordens = OrdemCompra.objects.bulk_create([OrdemCompra(fornecedor_id=pk) for pk in por_fornecedor])
+        itens_ordem = []
+        for ordem, linhas_ordem in zip(ordens, por_fornecedor.values()):
+            for linha in linhas_ordem:
+                linha.ordem_compra = ordem
+            itens_ordem.extend(linhas_ordem)
+        ItemOrdem.objects.bulk_create(itens_ordem)
+
+        # bulk_create não dispara sinais: auditoria e cache à mão.
+        auditoria.registrar_varios('CRIACAO', 'core.ordemcompra', {
+            ordem.pk: auditoria.diferencas(ordem) for ordem in ordens
+        })
+        auditoria.registrar_varios('CRIACAO', 'core.itemordem', {
+            linha.pk: auditoria.diferencas(linha) for linha in itens_ordem
+        })
+        if ordens:
+            caching.invalidar_no_commit('core.ordemcompra')
+            caching.invalidar_no_commit('core.itemordem')
+    return {'ordens': len(ordens), 'linhas': len(itens_ordem), 'sem_fornecedor': sem_fornecedor}
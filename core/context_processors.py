@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragmentos(request):
+    """Tempo de vida dos `{% cache %}` dos templates (0 desliga)."""
+    return {'cache_fragmentos': getattr(settings, 'ESTOQUE_CACHE_FRAGMENTOS', 0)}
@@ -0,0 +1,206 @@
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import auditoria, caching, estoque, resumo, resumo_mensal, search, sincronizacao
+from .models import Atribuicao, Item, ItemOrdem, MovimentoEstoque, Pedido, PedidoArquivado, PrevisaoItem
+
+# Ações em massa das listas. Cada ação é um UPDATE/DELETE sobre o próprio
+# queryset filtrado (não um save() por objeto), qualquer que seja o tamanho da
+# seleção, e os sinais não disparam; por isso cada função mantém ela mesma o
+# que eles manteriam: livro de estoque, resumo do painel, índice de busca,
+# versões do cache, auditoria e o feed de mudanças (atualizado_em e lápides).
+# Os deltas do resumo e das séries mensais vêm de agregações feitas antes do
+# UPDATE; só a auditoria (e, nas exclusões, lápides e índice) precisa de uma
+# entrada por linha, lida em fluxo. Todas devolvem o número de linhas afetadas.
+
+LOTE = 2000
+
+# Relações que apontam para os modelos apagados com apagar_sem_sinais e como
+# cada exclusão em massa as trata antes do DELETE (o coletor do Django e os
+# sinais são pulados de propósito: com receptores, QuerySet.delete() carrega
+# as linhas e apaga em lotes de 100). Modelos sem receptores nem relações
+# (MovimentoEstoque, PrevisaoItem) usam delete(), que já é um único DELETE. Um teste percorre _meta.related_objects e
+# falha se aparecer uma relação nova que não esteja aqui.
+#   Item: movimentos, atribuicao, itemordem (e ordemcompra, M2M por ela) e
+#         previsao são apagados; pedidos e pedidos_arquivados são PROTECT e
+#         itens com pedidos ficam de fora.
+#   Atribuicao: movimentos são do mesmo item e saem com ele.
+#   Pedido: movimentos são desvinculados (ou, no arquivamento, passam para
+#         o pedido arquivado).
+RELACOES_COBERTAS = {
+    Item: {'movimentos', 'atribuicao', 'itemordem', 'ordemcompra', 'previsao', 'pedidos', 'pedidos_arquivados'},
+    Atribuicao: {'movimentos'},
+    ItemOrdem: set(),
+    Pedido: {'movimentos'},
+}
+
+
+def apagar_sem_sinais(queryset):
+    """
+    Um único DELETE ... WHERE pk IN (consulta de `queryset`), em SQL pelo
+    cursor, sem coletor nem sinais; ver RELACOES_COBERTAS. Devolve quantas
+    linhas saíram.
+    """
+    model = queryset.model
+    if model not in RELACOES_COBERTAS:
+        raise ValueError(f'{model.__name__} não está em RELACOES_COBERTAS.')
+    conexao = connections[queryset.db]
+    consulta, parametros = queryset.order_by().values('pk').query.sql_with_params()
+    tabela = conexao.ops.quote_name(model._meta.db_table)
+    coluna = conexao.ops.quote_name(model._meta.pk.column)
+    with conexao.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabela} WHERE {coluna} IN ({consulta})', parametros)
+        return cursor.rowcount
+
+
+def _em_fluxo(queryset, *campos):
+    """Linhas (dicts com pk e `campos`) travadas para a operação que segue, lidas em fluxo."""
+    return queryset.select_for_update().order_by().values('pk', *campos).iterator(chunk_size=LOTE)
+
+
+def _grupos_mensais(pedidos):
+    """(mês, fornecedor_id, status) -> (pedidos, unidades) de `pedidos`, agregados no banco."""
+    por_mes = TruncMonth('criado_em', output_field=DateField())
+    grupos = (
+        pedidos.order_by().annotate(mes=por_mes).values('mes', 'fornecedor', 'status')
+        .annotate(pedidos=Count('pk'), unidades=Sum('quantidade'))
+    )
+    return {
+        (linha['mes'], linha['fornecedor'], linha['status']): (linha['pedidos'], linha['unidades'] or 0)
+        for linha in grupos
+    }
+
+
+def _pendentes(grupos):
+    return sum(pedidos for (_, _, status), (pedidos, _) in grupos.items() if status == 'PENDENTE')
+
+
+def alterar_status_pedidos(pedidos, status):
+    with transaction.atomic():
+        alvo = pedidos.exclude(status=status)
+        alteracoes, sincronizar = {}, []
+        for linha in _em_fluxo(alvo, 'status'):
+            alteracoes[linha['pk']] = {'status': [linha['status'], status]}
+            if 'ENTREGUE' in (linha['status'], status):
+                sincronizar.append(linha['pk'])
+        grupos = _grupos_mensais(alvo)
+        total = alvo.update(status=status)
+
+        deltas = defaultdict(lambda: [0, 0])
+        for (mes, fornecedor_id, anterior), (quantidade, unidades) in grupos.items():
+            for chave, sinal in (((mes, fornecedor_id, anterior), -1), ((mes, fornecedor_id, status), 1)):
+                deltas[chave][0] += sinal * quantidade
+                deltas[chave][1] += sinal * unidades
+        resumo_mensal.aplicar(deltas)
+        resumo.ajustar(pedidos_pendentes=(status == 'PENDENTE') * total - _pendentes(grupos))
+        estoque.sincronizar_pedidos(sincronizar)
+        auditoria.registrar_varios('ALTERACAO', 'core.pedido', alteracoes)
+        caching.invalidar_no_commit('core.pedido')
+    return total
+
+
+def ajustar_quantidade_pedidos(pedidos, delta):
+    """Soma `delta` à quantidade; pedidos que ficariam abaixo de 1 são ignorados."""
+    with transaction.atomic():
+        alvo = pedidos.filter(quantidade__gte=1 - delta)
+        alteracoes, entregues = {}, []
+        for linha in _em_fluxo(alvo, 'quantidade', 'status'):
+            alteracoes[linha['pk']] = {'quantidade': [linha['quantidade'], linha['quantidade'] + delta]}
+            if linha['status'] == 'ENTREGUE':
+                entregues.append(linha['pk'])
+        grupos = _grupos_mensais(alvo)
+        total = alvo.update(quantidade=F('quantidade') + delta)
+
+        resumo_mensal.aplicar({chave: (0, quantidade * delta) for chave, (quantidade, _) in grupos.items()})
+        estoque.sincronizar_pedidos(entregues)
+        auditoria.registrar_varios('ALTERACAO', 'core.pedido', alteracoes)
+        caching.invalidar_no_commit('core.pedido')
+    return total
+
+
+def excluir_pedidos(pedidos):
+    # O estoque recebido continua no livro; só perde a referência ao pedido.
+    with transaction.atomic():
+        alteracoes = _exclusoes(_em_fluxo(pedidos, *_campos(Pedido)))
+        grupos = _grupos_mensais(pedidos)
+        MovimentoEstoque.objects.filter(pedido__in=pedidos.values('pk')).update(pedido=None)
+        total = apagar_sem_sinais(pedidos)
+
+        resumo_mensal.aplicar({chave: (-quantidade, -unidades) for chave, (quantidade, unidades) in grupos.items()})
+        resumo.ajustar(pedidos_pendentes=-_pendentes(grupos))
+        auditoria.registrar_varios('EXCLUSAO', 'core.pedido', alteracoes)
+        caching.invalidar_no_commit('core.pedido')
+    return total
+
+
+def alterar_status_itens(itens, status):
+    with transaction.atomic():
+        alvo = itens.exclude(status=status)
+        alteracoes = {
+            linha['pk']: {'status': [linha['status'], status]} for linha in _em_fluxo(alvo, 'status')
+        }
+        total = alvo.update(status=status, atualizado_em=timezone.now())
+        auditoria.registrar_varios('ALTERACAO', 'core.item', alteracoes)
+        caching.invalidar_no_commit('core.item')
+    return total
+
+
+def ajustar_estoque_itens(itens, delta, usuario=None):
+    """
+    Lança um ajuste de `delta` unidades em cada item pelo livro de estoque;
+    itens que ficariam com quantidade negativa são ignorados.
+    """
+    with transaction.atomic():
+        pks = list(itens.filter(quantidade__gte=-delta).order_by().values_list('pk', flat=True))
+        estoque.movimentar_lote([
+            MovimentoEstoque(item_id=pk, tipo='AJUSTE', quantidade=delta, usuario=usuario,
+                             observacao='Ajuste em massa')
+            for pk in pks
+        ])
+    return len(pks)
+
+
+def excluir_itens(itens):
+    """
+    Exclui os itens sem pedidos, ativos ou arquivados (os dois são PROTECT),
+    com suas atribuições, linhas de ordem de compra, previsões e movimentos.
+    Devolve (excluídos, protegidos).
+    """
+    with transaction.atomic():
+        com_pedidos = Q(pk__in=Pedido.objects.values('item')) | Q(pk__in=PedidoArquivado.objects.values('item'))
+        protegidos = itens.filter(com_pedidos).count()
+        alvo = itens.exclude(com_pedidos)
+        alteracoes = _exclusoes(_em_fluxo(alvo, *_campos(Item)))
+        contadores = alvo.aggregate(
+            baixo=Count('pk', filter=Q(quantidade__lte=resumo.LIMITE_BAIXO_ESTOQUE)), valor=Sum('valor'),
+        )
+        pks = alvo.values('pk')
+        MovimentoEstoque.objects.filter(item__in=pks).delete()
+        PrevisaoItem.objects.filter(item__in=pks).delete()
+        apagar_sem_sinais(Atribuicao.objects.filter(item__in=pks))
+        apagar_sem_sinais(ItemOrdem.objects.filter(item__in=pks))
+        total = apagar_sem_sinais(alvo)
+
+        search.desindexar(Item, list(alteracoes))
+        sincronizacao.registrar_exclusoes(Item, list(alteracoes))
+        resumo.ajustar(
+            total_itens=-total, itens_baixo_estoque=-contadores['baixo'], valor_total=-(contadores['valor'] or 0),
+        )
+        auditoria.registrar_varios('EXCLUSAO', 'core.item', alteracoes)
+        caching.invalidar_no_commit('core.item')
+    return total, protegidos
+
+
+def _campos(model):
+    return [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def _exclusoes(linhas):
+    return {
+        linha['pk']: {campo.removesuffix('_id'): [valor, None] for campo, valor in linha.items() if campo != 'pk'}
+        for linha in linhas
+    }
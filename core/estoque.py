@@ -0,0 +1,163 @@
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import caching, resumo
+from .models import Atribuicao, Item, MovimentoEstoque, Pedido
+
+# Livro de movimentos de estoque. Toda alteração de Item.quantidade passa por
+# `movimentar`, que grava o movimento e aplica o delta com um único UPDATE
+# (quantidade = quantidade + delta) na mesma transação, sem ler-modificar-gravar
+# a linha inteira. Pedidos e atribuições são sincronizados pelo saldo líquido:
+# o movimento lançado é a diferença entre o que o status atual exige e o que já
+# foi lançado para aquele registro, então repetir a transição não duplica nada.
+
+# Observação dos recebimentos lançados pela abertura do livro (migração 0008,
+# marcados pela 0017): a data deles é a da migração, não a da entrega.
+ABERTURA_LIVRO = 'Abertura do livro'
+
+
+def movimentar(item, tipo, quantidade, **referencias):
+    """
+    Lança `quantidade` (positiva ou negativa) para `item` (instância ou pk) e
+    devolve a nova quantidade em estoque.
+    """
+    item_id = getattr(item, 'pk', item)
+    with transaction.atomic():
+        MovimentoEstoque.objects.create(item_id=item_id, tipo=tipo, quantidade=quantidade, **referencias)
+        Item.objects.filter(pk=item_id).update(quantidade=F('quantidade') + quantidade, atualizado_em=timezone.now())
+        # Após o UPDATE a linha está travada: a leitura vê o valor que gravamos.
+        nova = Item.objects.filter(pk=item_id).values_list('quantidade', flat=True).get()
+        anterior = nova - quantidade
+        baixo = resumo.LIMITE_BAIXO_ESTOQUE
+        resumo.ajustar(itens_baixo_estoque=(nova <= baixo) - (anterior <= baixo))
+        caching.invalidar_no_commit('core.item')
+
+    if isinstance(item, Item):
+        item.quantidade = nova
+        item._resumo_estado = resumo.estado_item(item)
+    return nova
+
+
+def registrar_saldo_inicial(item):
+    """Item novo: a quantidade já está gravada, só falta o movimento."""
+    MovimentoEstoque.objects.create(item=item, tipo='SALDO_INICIAL', quantidade=item.quantidade)
+
+
+def _lotes(valores, tamanho=500):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+def movimentar_lote(movimentos):
+    """
+    Grava `movimentos` (MovimentoEstoque ainda não salvos) com bulk_create e
+    aplica o saldo de cada item com um UPDATE (CASE por item) a cada 500 itens.
+    """
+    deltas = {}
+    for movimento in movimentos:
+        deltas[movimento.item_id] = deltas.get(movimento.item_id, 0) + movimento.quantidade
+    deltas = {item_id: delta for item_id, delta in deltas.items() if delta}
+    if not movimentos:
+        return
+    with transaction.atomic():
+        MovimentoEstoque.objects.bulk_create(movimentos, batch_size=2000)
+        baixo = resumo.LIMITE_BAIXO_ESTOQUE
+        variacao_baixo = 0
+        for lote in _lotes(sorted(deltas)):
+            antes = Item.objects.select_for_update().filter(pk__in=lote).values_list('pk', 'quantidade')
+            variacao_baixo += sum((quantidade + deltas[pk] <= baixo) - (quantidade <= baixo) for pk, quantidade in antes)
+            Item.objects.filter(pk__in=lote).update(quantidade=F('quantidade') + Case(
+                *[When(pk=pk, then=Value(deltas[pk])) for pk in lote], default=Value(0),
+            ), atualizado_em=timezone.now())
+        resumo.ajustar(itens_baixo_estoque=variacao_baixo)
+        if deltas:
+            caching.invalidar_no_commit('core.item')
+
+
+def _sincronizar(tipo, campo, esperado, pks):
+    """
+    `esperado` mapeia (pk do registro, item) para o saldo líquido que o status
+    atual exige; lança só a diferença para o que já está no livro.
+    """
+    lancados = {
+        (referencia, item_id): total
+        for lote in _lotes(pks)
+        for referencia, item_id, total in MovimentoEstoque.objects.filter(tipo=tipo, **{f'{campo}__in': lote})
+        .values(campo, 'item').annotate(total=Sum('quantidade')).values_list(campo, 'item', 'total')
+    }
+    movimentos = []
+    for referencia, item_id in sorted(set(esperado) | set(lancados)):
+        delta = esperado.get((referencia, item_id), 0) - (lancados.get((referencia, item_id)) or 0)
+        if delta:
+            movimentos.append(MovimentoEstoque(
+                item_id=item_id, tipo=tipo, quantidade=delta, **{f'{campo}_id': referencia},
+            ))
+    movimentar_lote(movimentos)
+
+
+def sincronizar_pedidos(pks):
+    """Pedido entregue soma sua quantidade ao item; qualquer outro status, zero."""
+    with transaction.atomic():
+        # Relê sob trava para que duas transições simultâneas não lancem o mesmo delta.
+        esperado = {
+            (pk, item_id): quantidade
+            for lote in _lotes(pks)
+            for pk, item_id, quantidade in Pedido.objects.select_for_update()
+            .filter(pk__in=lote, status='ENTREGUE').values_list('pk', 'item_id', 'quantidade')
+        }
+        _sincronizar('RECEBIMENTO', 'pedido', esperado, pks)
+
+
+def sincronizar_pedido(pedido):
+    sincronizar_pedidos([pedido.pk])
+
+
+def sincronizar_atribuicao(atribuicao):
+    """Atribuição ativa retira uma unidade do item; devolvida, repõe."""
+    with transaction.atomic():
+        esperado = {
+            (pk, item_id): -1
+            for pk, item_id in Atribuicao.objects.select_for_update()
+            .filter(pk=atribuicao.pk, status='ATIVO').values_list('pk', 'item_id')
+        }
+        _sincronizar('ATRIBUICAO', 'atribuicao', esperado, [atribuicao.pk])
+
+
+def inicializar():
+    """
+    Lança o saldo inicial dos itens que ainda não têm movimentos (criados por
+    bulk_create, que não dispara sinais). Devolve quantos itens foram abertos.
+    """
+    sem_movimentos = Item.objects.exclude(quantidade=0).filter(movimentos__isnull=True)
+    novos = [
+        MovimentoEstoque(item_id=pk, tipo='SALDO_INICIAL', quantidade=quantidade)
+        for pk, quantidade in sem_movimentos.values_list('pk', 'quantidade').iterator(chunk_size=2000)
+    ]
+    MovimentoEstoque.objects.bulk_create(novos, batch_size=2000)
+    return len(novos)
+
+
+def saldo():
+    """Expressão com a soma dos movimentos do item (para anotar/atualizar Item)."""
+    soma = (
+        MovimentoEstoque.objects.filter(item=OuterRef('pk'))
+        .order_by().values('item').annotate(total=Sum('quantidade')).values('total')
+    )
+    return Coalesce(Subquery(soma), 0)
+
+
+def reconciliar():
+    """
+    Recalcula Item.quantidade a partir do livro com um único UPDATE e devolve
+    quantos itens estavam divergentes.
+    """
+    with transaction.atomic():
+        divergentes = Item.objects.alias(saldo=saldo()).exclude(quantidade=F('saldo'))
+        corrigidos = divergentes.update(quantidade=saldo(), atualizado_em=timezone.now())
+    if corrigidos:
+        caching.invalidar('core.item')
+        resumo.reconciliar()
+    return corrigidos
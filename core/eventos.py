@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection
+
+from . import caching, painel
+
+# Atualização ao vivo do painel por server-sent events (servido pelo ASGI, ver
+# estoque_facil/asgi.py). Cada processo tem um único vigia, ativo enquanto há
+# clientes conectados: a cada ESTOQUE_EVENTOS_INTERVALO segundos ele lê as
+# versões de Item, Pedido e Fornecedor no cache (core/caching.py, sem tocar o
+# banco) e, só quando alguma mudou, recalcula o painel uma vez e coloca a
+# diferença, já formatada, na fila de cada cliente. O custo no banco é por
+# alteração, não por cliente conectado.
+#
+# Com cache compartilhado (Redis/Memcached) as versões refletem escritas de
+# qualquer processo; com locmem, só as do próprio processo.
+
+logger = logging.getLogger('core.eventos')
+
+EVENTO = 'contadores'
+MAX_PENDENTES = 20
+
+
+def _intervalo():
+    return getattr(settings, 'ESTOQUE_EVENTOS_INTERVALO', 1.0)
+
+
+def _manter_conexao():
+    return getattr(settings, 'ESTOQUE_EVENTOS_KEEPALIVE', 15)
+
+
+def formatar(dados, evento=EVENTO):
+    return f'event: {evento}\ndata: {json.dumps(dados, cls=DjangoJSONEncoder)}\n\n'
+
+
+def _ler(versoes_anteriores):
+    """(versões atuais, valores do painel ou None se nada mudou)."""
+    versoes = [caching.versao(label) for label in painel.LABELS]
+    if versoes == versoes_anteriores:
+        return versoes, None
+    try:
+        return versoes, painel.valores()
+    except DatabaseError:
+        # Conexão perdida: descarta para reconectar na próxima volta.
+        connection.close()
+        raise
+
+
+class Difusor:
+    def __init__(self):
+        self.filas = set()
+        self.versoes = None
+        self.estado = None
+        self._vigia = None
+
+    def assinar(self):
+        fila = asyncio.Queue(MAX_PENDENTES)
+        if self.estado is not None:
+            # Quem chega recebe o estado completo; a página pode ter sido gerada antes.
+            fila.put_nowait(formatar(self.estado))
+        self.filas.add(fila)
+        loop = asyncio.get_running_loop()
+        if self._vigia is None or self._vigia.done() or self._vigia.get_loop() is not loop:
+            # Contexto vazio: o vigia não herda o da requisição que o iniciou.
+            self._vigia = contextvars.Context().run(loop.create_task, self._vigiar())
+        return fila
+
+    def cancelar(self, fila):
+        self.filas.discard(fila)
+
+    def difundir(self, mensagem):
+        for fila in list(self.filas):
+            if fila.full():
+                # Cliente que não consome: recomeça do estado completo.
+                while not fila.empty():
+                    fila.get_nowait()
+                fila.put_nowait(formatar(self.estado))
+            else:
+                fila.put_nowait(mensagem)
+
+    async def _vigiar(self):
+        while self.filas:
+            try:
+                versoes, estado = await sync_to_async(_ler)(self.versoes)
+            except Exception:
+                logger.exception('Falha ao atualizar o painel ao vivo.')
+            else:
+                self.versoes = versoes
+                if estado is not None:
+                    mudancas = painel.diferenca(self.estado, estado)
+                    self.estado = estado
+                    if mudancas:
+                        self.difundir(formatar(mudancas))
+            await asyncio.sleep(_intervalo())
+        # Sem clientes o estado envelhece: o próximo vigia começa do zero.
+        self.versoes = self.estado = None
+
+
+difusor = Difusor()
+
+
+async def fluxo():
+    """Mensagens SSE para um cliente, com comentários para manter a conexão."""
+    fila = difusor.assinar()
+    try:
+        yield f'retry: {int(_intervalo() * 1000) + 1000}\n\n'
+        while True:
+            try:
+                yield await asyncio.wait_for(fila.get(), _manter_conexao())
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+    finally:
+        difusor.cancelar(fila)
@@ -0,0 +1,164 @@
+import csv
+import heapq
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from .models import Item, Pedido
+
+# Exportação em fluxo: as linhas saem do banco por .iterator() e vão direto para
+# a resposta, então o primeiro byte é enviado antes da consulta terminar e o
+# arquivo nunca é montado inteiro em memória.
+
+TAMANHO_LOTE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def linhas_itens(itens):
+    status = dict(Item.STATUS_CHOICES)
+    campos = ('nome', 'categoria', 'localizacao', 'quantidade', 'valor', 'status')
+    for nome, categoria, localizacao, quantidade, valor, situacao in itens.values_list(*campos).iterator(chunk_size=TAMANHO_LOTE):
+        yield [nome, categoria, localizacao, quantidade, valor, status.get(situacao, situacao)]
+
+
+def _linhas_pedidos(pedidos):
+    status = dict(Pedido.STATUS_CHOICES)
+    # values_list já faz o JOIN com fornecedor e item (como o select_related)
+    # sem instanciar modelos por linha.
+    campos = ('pk', 'fornecedor__nome', 'item__nome', 'quantidade', 'status', 'entrega_prevista', 'criado_em')
+    for pk, fornecedor, item, quantidade, situacao, prevista, criado_em in pedidos.values_list(*campos).iterator(chunk_size=TAMANHO_LOTE):
+        yield [pk, fornecedor, item, quantidade, status.get(situacao, situacao), prevista, criado_em]
+
+
+def linhas_pedidos(pedidos, *outros):
+    """
+    Linhas de um ou mais querysets de pedidos (ex.: ativos e arquivados), todos
+    ordenados por ('-criado_em', '-pk'); os fluxos são intercalados nessa ordem.
+    """
+    if not outros:
+        return _linhas_pedidos(pedidos)
+    fluxos = [_linhas_pedidos(qs) for qs in (pedidos, *outros)]
+    return heapq.merge(*fluxos, key=lambda linha: (linha[6], linha[0]), reverse=True)
+
+
+class _Eco:
+    """Pseudo-arquivo: csv.writer devolve a linha escrita em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def gerar_csv(cabecalho, linhas):
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(cabecalho)
+    for linha in linhas:
+        yield escritor.writerow(['' if valor is None else valor for valor in linha])
+
+
+class _Buffer:
+    """Destino não posicionável para o zipfile; o que for escrito sai no próximo yield."""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def esvaziar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+
+_CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_ARQUIVOS_XLSX = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _celula(valor):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_INVALIDOS.sub('', str(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha_xlsx(valores):
+    return ('<row>' + ''.join(_celula(valor) for valor in valores) + '</row>').encode()
+
+
+def gerar_xlsx(cabecalho, linhas):
+    """Planilha XLSX mínima (uma aba, strings inline) gerada em fluxo com zipfile."""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, conteudo in _ARQUIVOS_XLSX.items():
+            arquivo_zip.writestr(nome, conteudo)
+        yield buffer.esvaziar()
+
+        with arquivo_zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilha.write(_linha_xlsx(cabecalho))
+            for numero, linha in enumerate(linhas, start=1):
+                planilha.write(_linha_xlsx(linha))
+                if numero % TAMANHO_LOTE == 0:
+                    yield buffer.esvaziar()
+            planilha.write(b'</sheetData></worksheet>')
+    yield buffer.esvaziar()
+
+
+def resposta(nome, formato, cabecalho, linhas):
+    formato = formato if formato in CONTENT_TYPES else 'csv'
+    gerador = gerar_xlsx if formato == 'xlsx' else gerar_csv
+    response = StreamingHttpResponse(gerador(cabecalho, linhas), content_type=CONTENT_TYPES[formato])
+    response['Content-Disposition'] = f'attachment; filename="{nome}.{formato}"'
+    return response
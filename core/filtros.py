@@ -0,0 +1,46 @@
+from . import previsao, search
+from .models import Fornecedor, Item, Loja, Pedido, PedidoArquivado
+
+# Filtros das listagens a partir da query string (?q=, ?status=, ?fornecedor=),
+# compartilhados pelas telas, exportações e pela API. Pedidos arquivados (ver
+# core/arquivamento.py) só entram nas listagens com ?arquivados=1.
+
+
+def _status_e_busca(queryset, params):
+    if params.get('q'):
+        queryset = search.buscar(queryset, params['q'])
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    return queryset
+
+
+def filtrar_itens(params):
+    itens = _status_e_busca(Item.objects.all(), params)
+    if params.get('repor') == '1':
+        itens = previsao.a_repor(itens)
+    return itens
+
+
+def filtrar_fornecedores(params):
+    return _status_e_busca(Fornecedor.objects.all(), params)
+
+
+def filtrar_lojas(params):
+    return _status_e_busca(Loja.objects.all(), params)
+
+
+def incluir_arquivados(params):
+    return params.get('arquivados') == '1'
+
+
+def filtrar_pedidos(params, model=Pedido):
+    pedidos_queryset = model.objects.all()
+    if params.get('status'):
+        pedidos_queryset = pedidos_queryset.filter(status=params['status'])
+    if params.get('fornecedor'):
+        pedidos_queryset = pedidos_queryset.filter(fornecedor_id=params['fornecedor'])
+    return pedidos_queryset
+
+
+def filtrar_pedidos_arquivados(params):
+    return filtrar_pedidos(params, model=PedidoArquivado)
@@ -1,5 +1,10 @@
+import codecs
+import io
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 
 from .models import Fornecedor, Item, Pedido, Loja, Usuario
 
@@ -19,6 +24,10 @@ class FornecedorForm(forms.ModelForm):
 
 
 class ItemForm(forms.ModelForm):
+    # Quantidade exibida quando o formulário foi aberto: a edição vira um ajuste
+    # relativo a ela e não apaga movimentos feitos nesse meio-tempo.
+    quantidade_anterior = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
     class Meta:
         model = Item
         fields = ['nome', 'categoria', 'quantidade', 'status', 'valor']
@@ -29,12 +38,53 @@ class ItemForm(forms.ModelForm):
             'valor': forms.NumberInput(attrs={'placeholder': 'Ex: 480.00'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['quantidade_anterior'].initial = self.instance.quantidade
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select que renderiza só a opção escolhida; as demais são buscadas no
+    endpoint `url_name` pelo static/js/autocomplete.js.
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        attrs = {**(attrs or {}), 'data-autocomplete-url': reverse(self.url_name)}
+        return super().get_context(name, value, attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        opcoes = [('', '---------')]
+        selecionados = [v for v in value if v not in ('', None)]
+        if selecionados:
+            campo = self.choices.field
+            try:
+                opcoes += [
+                    (obj.pk, campo.label_from_instance(obj))
+                    for obj in campo.queryset.filter(pk__in=selecionados)
+                ]
+            except (ValueError, ValidationError):
+                pass
+        completas = self.choices
+        self.choices = opcoes
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = completas
+
 
 class PedidoForm(forms.ModelForm):
     class Meta:
         model = Pedido
         fields = ['fornecedor', 'item', 'quantidade', 'status', 'entrega_prevista', 'observacoes']
         widgets = {
+            'fornecedor': AutocompleteSelect('autocomplete_fornecedores'),
+            'item': AutocompleteSelect('autocomplete_itens'),
             'quantidade': forms.NumberInput(attrs={'min': 1}),
             'entrega_prevista': forms.DateInput(attrs={'type': 'date'}),
             'observacoes': forms.Textarea(attrs={'rows': 3}),
@@ -66,4 +116,75 @@ class UsuarioCreationForm(UserCreationForm):
             'email': forms.EmailInput(attrs={'placeholder': 'email@empresa.com'}),
             'nome_completo': forms.TextInput(attrs={'placeholder': 'Nome completo'}),
             'perfil': forms.Select(),
-        }
\ No newline at end of file
+        }
+
+
+class ImportacaoForm(forms.Form):
+    TIPOS = [
+        ('itens', 'Itens'),
+        ('fornecedores', 'Fornecedores'),
+        ('pedidos', 'Pedidos'),
+    ]
+    tipo = forms.ChoiceField(choices=TIPOS)
+    arquivo = forms.FileField(help_text='CSV com cabeçalho usando os nomes dos campos do cadastro.')
+    em_segundo_plano = forms.BooleanField(
+        required=False, label='Processar em segundo plano',
+        help_text='Para arquivos grandes: a importação roda fora da página e o andamento fica em Tarefas.',
+    )
+
+    def clean_arquivo(self):
+        # Decodifica em pedaços só para validar: o arquivo inteiro não vai para a memória.
+        arquivo = self.cleaned_data['arquivo']
+        decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+        try:
+            for pedaco in arquivo.chunks():
+                decodificador.decode(pedaco)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise ValidationError('O arquivo deve estar em UTF-8.')
+        arquivo.seek(0)
+        return arquivo
+
+    def abrir(self):
+        """Arquivo validado, como texto para importacao.ler_csv."""
+        return io.TextIOWrapper(self.cleaned_data['arquivo'].file, encoding='utf-8-sig', newline='')
+
+
+class SelecaoField(forms.Field):
+    """Lista de pks marcados na tabela (vários valores com o mesmo nome)."""
+
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return sorted({int(pk) for pk in value or []})
+        except (TypeError, ValueError):
+            raise ValidationError('Seleção inválida.')
+
+
+class AcaoEmMassaForm(forms.Form):
+    ACOES = [
+        ('status', 'Alterar status'),
+        ('quantidade', 'Ajustar quantidade'),
+        ('excluir', 'Excluir'),
+    ]
+    acao = forms.ChoiceField(choices=ACOES)
+    status = forms.ChoiceField(required=False)
+    quantidade = forms.IntegerField(required=False)
+    selecionados = SelecaoField(required=False)
+    todos = forms.BooleanField(required=False)
+
+    def __init__(self, *args, status_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['status'].choices = [('', '---------'), *status_choices]
+
+    def clean(self):
+        dados = super().clean()
+        acao = dados.get('acao')
+        if acao == 'status' and not dados.get('status'):
+            self.add_error('status', 'Escolha o novo status.')
+        if acao == 'quantidade' and not dados.get('quantidade'):
+            self.add_error('quantidade', 'Informe um ajuste diferente de zero.')
+        if not dados.get('todos') and not dados.get('selecionados'):
+            raise ValidationError('Selecione ao menos um registro.')
+        return dados
@@ -0,0 +1,123 @@
+import csv
+from itertools import islice
+
+from django.db import transaction
+
+from . import auditoria, caching, estoque, resumo, resumo_mensal, search
+from .forms import FornecedorForm, ItemForm, PedidoForm
+from .models import Fornecedor, Item, Pedido
+
+# Importação em massa de CSV. As linhas são lidas em fluxo, validadas com os
+# mesmos formulários das telas de cadastro e gravadas em lotes com bulk_create,
+# um lote por transação, então a memória não depende do tamanho do arquivo.
+
+TAMANHO_LOTE = 500
+
+
+class FornecedorImportForm(FornecedorForm):
+    def clean(self):
+        # A unicidade do CNPJ é resolvida pelo upsert, não pela validação.
+        return self.cleaned_data
+
+
+TIPOS = {
+    'itens': (ItemForm, Item),
+    'fornecedores': (FornecedorImportForm, Fornecedor),
+    'pedidos': (PedidoForm, Pedido),
+}
+
+
+class ResultadoImportacao:
+    def __init__(self, max_erros=100):
+        self.importados = 0
+        self.total_erros = 0
+        self.erros = []
+        self.max_erros = max_erros
+
+    def registrar_erro(self, linha, erros):
+        self.total_erros += 1
+        if len(self.erros) < self.max_erros:
+            self.erros.append((linha, erros))
+
+
+def detectar_delimitador(cabecalho):
+    return ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+
+
+def ler_csv(arquivo):
+    """Devolve um DictReader sobre o arquivo texto, detectando ',' ou ';'."""
+    cabecalho = arquivo.readline()
+    delimitador = detectar_delimitador(cabecalho)
+    campos = next(csv.reader([cabecalho], delimiter=delimitador), [])
+    return csv.DictReader(arquivo, fieldnames=[campo.strip() for campo in campos], delimiter=delimitador)
+
+
+def _gravar(model, objetos):
+    if model is Fornecedor:
+        # Último registro vence quando o mesmo CNPJ aparece duas vezes no lote.
+        por_cnpj = {}
+        sem_cnpj = []
+        for obj in objetos:
+            if obj.cnpj:
+                por_cnpj[obj.cnpj] = obj
+            else:
+                sem_cnpj.append(obj)
+        campos = [campo for campo in FornecedorForm.Meta.fields if campo != 'cnpj'] + ['atualizado_em']
+        gravados = Fornecedor.objects.bulk_create(
+            list(por_cnpj.values()),
+            update_conflicts=True,
+            unique_fields=['cnpj'],
+            update_fields=campos,
+        )
+        gravados += Fornecedor.objects.bulk_create(sem_cnpj)
+    else:
+        gravados = model.objects.bulk_create(objetos)
+    if model is Pedido:
+        # Pedidos já entregues lançam o recebimento no livro de estoque.
+        estoque.sincronizar_pedidos([obj.pk for obj in gravados if obj.status == 'ENTREGUE'])
+    search.indexar(model, [obj for obj in gravados if obj.pk])
+    return len(gravados)
+
+
+def importar(tipo, linhas, tamanho_lote=TAMANHO_LOTE, ao_erro=None, max_erros=100, ao_lote=None):
+    """
+    Valida e grava as `linhas` (dicts vindos do CSV) do `tipo` informado.
+    `ao_erro(numero_linha, erros)` é chamado para cada linha rejeitada e
+    `ao_lote(linhas_lidas)` depois de cada lote gravado.
+    """
+    form_class, model = TIPOS[tipo]
+    resultado = ResultadoImportacao(max_erros)
+    numeradas = enumerate(linhas, start=2)  # linha 1 é o cabeçalho
+
+    while True:
+        lote = list(islice(numeradas, tamanho_lote))
+        if not lote:
+            break
+        objetos = []
+        for numero, linha in lote:
+            dados = {campo: (valor or '').strip() for campo, valor in linha.items() if campo}
+            form = form_class(dados)
+            if form.is_valid():
+                objetos.append(form.save(commit=False))
+            else:
+                erros = {campo: list(mensagens) for campo, mensagens in form.errors.items()}
+                resultado.registrar_erro(numero, erros)
+                if ao_erro is not None:
+                    ao_erro(numero, erros)
+        if objetos:
+            with transaction.atomic():
+                resultado.importados += _gravar(model, objetos)
+        if ao_lote is not None:
+            ao_lote(lote[-1][0] - 1)
+
+    # bulk_create não dispara sinais: atualiza o que eles manteriam.
+    caching.invalidar(model._meta.label_lower)
+    if model is Item:
+        estoque.inicializar()
+    if model is Pedido:
+        resumo_mensal.reconstruir()
+    resumo.reconciliar()
+    auditoria.registrar('IMPORTACAO', model._meta.label_lower, alteracoes={
+        'importados': resultado.importados, 'erros': resultado.total_erros,
+    })
+    return resultado
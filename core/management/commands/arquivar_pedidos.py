@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import arquivamento
+
+
+class Command(BaseCommand):
+    help = (
+        'Move pedidos entregues ou cancelados mais antigos que ESTOQUE_ARQUIVAR_APOS_DIAS '
+        'para o arquivo (PedidoArquivado), em lotes com uma transação cada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Sobrescreve ESTOQUE_ARQUIVAR_APOS_DIAS.')
+        parser.add_argument('--lote', type=int, default=arquivamento.LOTE)
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help='Segundos de pausa entre lotes, para não disputar o banco com as telas.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            movidos = arquivamento.arquivar_lote(arquivamento.candidatos(options['dias']), options['lote'])
+            total += movidos
+            if movidos < options['lote']:
+                break
+            self.stdout.write(f'  {total} pedidos arquivados...')
+            if options['intervalo']:
+                time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f'{total} pedidos arquivados.'))
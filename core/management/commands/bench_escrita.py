@@ -0,0 +1,65 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from core import resumo
+from core.models import Item
+
+PREFIXO = '__bench_escrita__'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão de escritas concorrentes (criação de itens, com os contadores '
+        'do painel) no banco configurado. Compare rodando com --settings='
+        'estoque_facil.settings e --settings=estoque_facil.settings_producao.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--ops', type=int, default=200, help='Escritas por thread.')
+
+    def handle(self, *args, **options):
+        resumo.obter()
+        contagem = {'ok': 0, 'erros': 0}
+        trava = threading.Lock()
+
+        def trabalhador(numero):
+            ok = erros = 0
+            try:
+                for i in range(options['ops']):
+                    try:
+                        Item.objects.create(nome=f'{PREFIXO}{numero}-{i}', quantidade=1, valor=1)
+                        ok += 1
+                    except OperationalError:
+                        erros += 1
+            finally:
+                connection.close()
+                with trava:
+                    contagem['ok'] += ok
+                    contagem['erros'] += erros
+
+        threads = [threading.Thread(target=trabalhador, args=(n,)) for n in range(options['threads'])]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+        Item.objects.filter(nome__startswith=PREFIXO).delete()
+        resumo.reconciliar()
+
+        banco = settings.DATABASES['default']
+        self.stdout.write(f"Banco: {banco['ENGINE']} (CONN_MAX_AGE={banco.get('CONN_MAX_AGE', 0)})")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.stdout.write(f'journal_mode: {cursor.fetchone()[0]}')
+        self.stdout.write(
+            f"{options['threads']} threads x {options['ops']} escritas em {duracao:.2f}s: "
+            f"{contagem['ok'] / duracao:.0f} escritas/s, {contagem['erros']} falhas por lock"
+        )
@@ -0,0 +1,83 @@
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template.base import Template
+from django.test import Client
+
+from .bench_views import USUARIO_BENCH, cenarios
+
+
+@contextmanager
+def medir_templates():
+    """
+    Cronometra cada renderização de template durante o bloco e devolve
+    {nome: [ms, ...]}. O tempo é inclusivo: o de uma página conta também o
+    do template que ela estende e o dos que inclui.
+    """
+    tempos = defaultdict(list)
+    original = Template._render
+
+    def _render(self, context):
+        inicio = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            tempos[self.name or '<string>'].append((time.perf_counter() - inicio) * 1000)
+
+    Template._render = _render
+    try:
+        yield tempos
+    finally:
+        Template._render = original
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o tempo de renderização (mediana) de cada template nas mesmas páginas do '
+        'bench_views, no banco atual (use depois do seed).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--quente', action='store_true',
+                            help='Não limpa o cache entre repetições (mede os fragmentos em cache).')
+        parser.add_argument('--salvar', help='Grava os resultados neste JSON.')
+
+    def handle(self, *args, **options):
+        usuario, _ = get_user_model().objects.get_or_create(username=USUARIO_BENCH)
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        cliente = Client(HTTP_HOST=host)
+        cliente.force_login(usuario)
+
+        medidos = defaultdict(list)
+        for nome, url in cenarios():
+            cliente.get(url)  # aquecimento: compila os templates
+            with medir_templates() as tempos:
+                for _ in range(options['repeticoes']):
+                    if not options['quente']:
+                        cache.clear()
+                    response = cliente.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f'{nome} ({url}) respondeu {response.status_code}')
+            for template, ms in tempos.items():
+                medidos[template].extend(ms)
+
+        resultados = {
+            template: {'ms': round(statistics.median(ms), 3), 'renderizacoes': len(ms)}
+            for template, ms in sorted(medidos.items(), key=lambda par: -statistics.median(par[1]))
+        }
+        for template, resultado in resultados.items():
+            self.stdout.write(f'{template:40} {resultado["ms"]:>10.3f} ms {resultado["renderizacoes"]:>6}x')
+
+        if options['salvar']:
+            Path(options['salvar']).write_text(json.dumps({'templates': resultados}, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f'Resultados gravados em {options["salvar"]}.')
+
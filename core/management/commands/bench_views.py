@@ -0,0 +1,135 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Fornecedor, Item, Loja, Pedido
+
+USUARIO_BENCH = '__bench__'
+
+
+def cenarios():
+    """(nome, url) de cada listagem, formulário e do painel."""
+    item = Item.objects.order_by('pk').values_list('pk', flat=True).first()
+    fornecedor = Fornecedor.objects.order_by('pk').values_list('pk', flat=True).first()
+    pedido = Pedido.objects.order_by('pk').values_list('pk', flat=True).first()
+    loja = Loja.objects.order_by('pk').values_list('pk', flat=True).first()
+
+    lista = [
+        ('dashboard', reverse('dashboard')),
+        ('inventario', reverse('inventario')),
+        ('inventario_busca', reverse('inventario') + '?q=mouse'),
+        ('inventario_status', reverse('inventario') + '?status=DISPONIVEL'),
+        ('fornecedores', reverse('fornecedores')),
+        ('fornecedores_busca', reverse('fornecedores') + '?q=dell'),
+        ('pedidos', reverse('pedidos')),
+        ('pedidos_status', reverse('pedidos') + '?status=PENDENTE'),
+        ('lojas', reverse('gerenciar_loja')),
+        ('lojas_busca', reverse('gerenciar_loja') + '?q=paulo'),
+        ('item_create', reverse('item_create')),
+        ('fornecedor_create', reverse('novo_fornecedor')),
+        ('pedido_create', reverse('novo_pedido')),
+        ('loja_create', reverse('loja_create')),
+        ('autocomplete_itens', reverse('autocomplete_itens') + '?q=mo'),
+    ]
+    if fornecedor:
+        lista.append(('pedidos_fornecedor', reverse('pedidos') + f'?fornecedor={fornecedor}'))
+        lista.append(('fornecedor_update', reverse('fornecedor_update', args=[fornecedor])))
+    if item:
+        lista.append(('item_update', reverse('item_update', args=[item])))
+    if pedido:
+        lista.append(('pedido_update', reverse('pedido_update', args=[pedido])))
+    if loja:
+        lista.append(('loja_update', reverse('loja_update', args=[loja])))
+    return lista
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede tempo (mediana) e número de consultas de cada listagem, formulário e do '
+        'painel no banco atual (use depois do seed) e compara com um baseline salvo '
+        '(ex.: benchmarks/baseline_1k.json).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--quente', action='store_true', help='Não limpa o cache entre repetições.')
+        parser.add_argument('--salvar', help='Grava os resultados neste JSON (novo baseline).')
+        parser.add_argument('--baseline', help='Compara com este JSON e falha em caso de regressão.')
+        parser.add_argument('--tolerancia', type=float, default=0.5,
+                            help='Aumento relativo de tempo aceito antes de acusar regressão (0.5 = 50%%).')
+        parser.add_argument('--folga-ms', type=float, default=5.0,
+                            help='Aumentos absolutos menores que isto são tratados como ruído.')
+
+    def handle(self, *args, **options):
+        usuario, _ = get_user_model().objects.get_or_create(username=USUARIO_BENCH)
+        # Com DEBUG=False o host precisa estar em ALLOWED_HOSTS.
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        cliente = Client(HTTP_HOST=host)
+        cliente.force_login(usuario)
+
+        resultados = {
+            'contagens': {
+                'itens': Item.objects.count(),
+                'fornecedores': Fornecedor.objects.count(),
+                'pedidos': Pedido.objects.count(),
+                'lojas': Loja.objects.count(),
+            },
+            'views': {},
+        }
+        for nome, url in cenarios():
+            tempos = []
+            consultas = 0
+            cliente.get(url)  # aquecimento: compila templates e abre conexões
+            for _ in range(options['repeticoes']):
+                if not options['quente']:
+                    cache.clear()
+                with ExitStack() as pilha:
+                    # Todas as conexões: com réplicas, parte das leituras sai do principal.
+                    capturadas = [pilha.enter_context(CaptureQueriesContext(conexao)) for conexao in connections.all()]
+                    inicio = time.perf_counter()
+                    response = cliente.get(url)
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{nome} ({url}) respondeu {response.status_code}')
+                consultas = sum(len(captura) for captura in capturadas)
+            resultados['views'][nome] = {'ms': round(statistics.median(tempos), 2), 'consultas': consultas}
+            self.stdout.write(f'{nome:24} {resultados["views"][nome]["ms"]:>10.2f} ms {consultas:>4} consultas')
+
+        if options['salvar']:
+            Path(options['salvar']).write_text(json.dumps(resultados, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f'Resultados gravados em {options["salvar"]}.')
+
+        if options['baseline']:
+            regressoes = comparar(
+                json.loads(Path(options['baseline']).read_text()), resultados,
+                options['tolerancia'], options['folga_ms'],
+            )
+            for regressao in regressoes:
+                self.stderr.write(regressao)
+            if regressoes:
+                raise CommandError(f'{len(regressoes)} regressões em relação ao baseline.')
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline.'))
+
+
+def comparar(baseline, atual, tolerancia, folga_ms=0.0):
+    regressoes = []
+    for nome, base in baseline['views'].items():
+        medido = atual['views'].get(nome)
+        if medido is None:
+            continue
+        if medido['consultas'] > base['consultas']:
+            regressoes.append(f'{nome}: {base["consultas"]} -> {medido["consultas"]} consultas')
+        if medido['ms'] > base['ms'] * (1 + tolerancia) and medido['ms'] - base['ms'] > folga_ms:
+            regressoes.append(f'{nome}: {base["ms"]:.2f} -> {medido["ms"]:.2f} ms')
+    return regressoes
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import previsao
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula consumo diário, lead time e ponto de pedido de todos os itens (NumPy) '
+        'e regrava PrevisaoItem, lida pelo painel e pelo inventário.'
+    )
+
+    def handle(self, *args, **options):
+        if previsao.np is None:
+            raise CommandError('calcular_previsao precisa do NumPy (pip install numpy).')
+        inicio = time.perf_counter()
+        total = previsao.recalcular()
+        self.stdout.write(f'Itens com previsão: {total} ({(time.perf_counter() - inicio) * 1000:.0f} ms)')
+        self.stdout.write(self.style.SUCCESS('Previsão recalculada.'))
@@ -0,0 +1,53 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core import importacao
+
+
+class Command(BaseCommand):
+    help = 'Importa itens, fornecedores ou pedidos de um arquivo CSV em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(importacao.TIPOS))
+        parser.add_argument('arquivo', help="Caminho do CSV ('-' para a entrada padrão).")
+        parser.add_argument('--lote', type=int, default=importacao.TAMANHO_LOTE)
+        parser.add_argument('--erros', help='Grava o relatório de linhas rejeitadas neste CSV.')
+
+    def handle(self, *args, **options):
+        relatorio = None
+        escritor = None
+        if options['erros']:
+            relatorio = open(options['erros'], 'w', newline='', encoding='utf-8')
+            escritor = csv.writer(relatorio)
+            escritor.writerow(['linha', 'campo', 'erro'])
+
+        def ao_erro(numero, erros):
+            if escritor is None:
+                return
+            for campo, mensagens in erros.items():
+                for mensagem in mensagens:
+                    escritor.writerow([numero, campo, mensagem])
+
+        if options['arquivo'] == '-':
+            arquivo = sys.stdin
+        else:
+            arquivo = open(options['arquivo'], newline='', encoding='utf-8-sig')
+        try:
+            resultado = importacao.importar(
+                options['tipo'],
+                importacao.ler_csv(arquivo),
+                tamanho_lote=options['lote'],
+                ao_erro=ao_erro,
+                max_erros=0,
+            )
+        finally:
+            if arquivo is not sys.stdin:
+                arquivo.close()
+            if relatorio is not None:
+                relatorio.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.importados} registros importados, {resultado.total_erros} linhas com erro.'
+        ))
@@ -0,0 +1,70 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from core import tarefas
+
+
+def _executar_em_thread(tarefa):
+    # Cada thread tem a própria conexão; fecha as vencidas antes e depois.
+    close_old_connections()
+    try:
+        tarefas.executar(tarefa)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa as tarefas em segundo plano da fila (core/tarefas.py) num pool de threads; '
+        'rode um ou mais processos deste comando ao lado do servidor web.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trabalhadores', type=int, default=2,
+                            help='Tarefas simultâneas (0 = executa uma por vez, sem threads).')
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos entre consultas à fila quando ela está vazia.')
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Sai quando não houver mais tarefas prontas.')
+
+    def handle(self, *args, **options):
+        nome = f'{socket.gethostname()}:{os.getpid()}'
+        if not options['trabalhadores']:
+            self._sem_threads(nome, options)
+            return
+
+        limite = options['trabalhadores']
+        with ThreadPoolExecutor(max_workers=limite, thread_name_prefix='tarefa') as pool:
+            em_execucao = set()
+            while True:
+                close_old_connections()
+                tarefas.recuperar_expiradas()
+                while len(em_execucao) < limite:
+                    tarefa = tarefas.reservar(nome)
+                    if tarefa is None:
+                        break
+                    self.stdout.write(f'Iniciando {tarefa}.')
+                    em_execucao.add(pool.submit(_executar_em_thread, tarefa))
+                if not em_execucao:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+                _, em_execucao = wait(em_execucao, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+
+    def _sem_threads(self, nome, options):
+        while True:
+            tarefas.recuperar_expiradas()
+            tarefa = tarefas.reservar(nome)
+            if tarefa is not None:
+                self.stdout.write(f'Iniciando {tarefa}.')
+                tarefas.executar(tarefa)
+            elif options['uma_vez']:
+                break
+            else:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import estoque
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a quantidade de cada item a partir do livro de movimentos de estoque.'
+
+    def handle(self, *args, **options):
+        abertos = estoque.inicializar()
+        if abertos:
+            self.stdout.write(f'Saldo inicial lançado para {abertos} itens sem movimentos.')
+        corrigidos = estoque.reconciliar()
+        self.stdout.write(f'Itens com quantidade divergente do livro: {corrigidos}')
+        self.stdout.write(self.style.SUCCESS('Estoque reconciliado.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core import resumo
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores do painel a partir das tabelas.'
+
+    def handle(self, *args, **options):
+        contadores = resumo.reconciliar()
+        self.stdout.write(
+            f'Itens: {contadores.total_itens} | Em baixa: {contadores.itens_baixo_estoque} | '
+            f'Fornecedores: {contadores.total_fornecedores} | '
+            f'Pedidos pendentes: {contadores.pedidos_pendentes} | '
+            f'Valor total: R$ {contadores.valor_total}'
+        )
+        self.stdout.write(self.style.SUCCESS('Resumo do painel reconciliado.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+from core.models import Fornecedor, Item, Loja
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual de itens, fornecedores e lojas.'
+
+    def handle(self, *args, **options):
+        if not search.fts_disponivel():
+            self.stdout.write('Banco sem FTS5; a busca usa icontains e não precisa de índice.')
+            return
+        for model in (Item, Fornecedor, Loja):
+            total = search.reconstruir(model)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {total} registros indexados.')
+        self.stdout.write(self.style.SUCCESS('Índice de busca reconstruído.'))
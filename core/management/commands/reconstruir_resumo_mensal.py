@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core import caching, resumo_mensal
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as séries mensais de pedidos (mês, fornecedor, status) a partir da tabela de pedidos.'
+
+    def handle(self, *args, **options):
+        linhas = resumo_mensal.reconstruir()
+        caching.invalidar('core.pedido')
+        self.stdout.write(self.style.SUCCESS(f'{linhas} linhas de resumo mensal gravadas.'))
@@ -0,0 +1,178 @@
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import caching, estoque, resumo, resumo_mensal, search
+from core.models import (
+    Atribuicao, Fornecedor, Funcionario, Item, ItemOrdem, Loja, OrdemCompra, Pedido,
+)
+
+# Volumes por perfil, proporcionais ao número de itens.
+PERFIS = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+LOTE = 5000
+
+PRODUTOS = [
+    'Mouse', 'Teclado', 'Monitor', 'Headset', 'Notebook', 'Cabo HDMI', 'Cabo de Força',
+    'Roteador', 'Switch', 'Webcam', 'Impressora', 'Toner', 'Cadeira', 'Mesa', 'Nobreak',
+    'Pendrive', 'SSD', 'Memória RAM', 'Hub USB', 'Projetor',
+]
+MARCAS = ['Logitech', 'Dell', 'Razer', 'HP', 'Lenovo', 'Intelbras', 'TP-Link', 'Samsung', 'Kingston', 'Multilaser']
+CATEGORIAS = ['Periféricos', 'Informática', 'Redes', 'Escritório', 'Áudio e Vídeo', 'Armazenamento']
+CIDADES = [
+    ('São Paulo', 'SP'), ('Campinas', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'),
+    ('Curitiba', 'PR'), ('Porto Alegre', 'RS'), ('Recife', 'PE'), ('Salvador', 'BA'),
+    ('Fortaleza', 'CE'), ('Goiânia', 'GO'), ('Florianópolis', 'SC'), ('Brasília', 'DF'),
+]
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João', 'Larissa', 'Marcos']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Costa', 'Ferreira', 'Almeida', 'Gomes']
+SETORES = ['TI', 'Financeiro', 'Comercial', 'RH', 'Logística', 'Atendimento']
+
+
+@contextmanager
+def _sem_auto_now(model, campo):
+    """Permite gravar datas passadas em campos auto_now_add durante a carga."""
+    field = model._meta.get_field(campo)
+    original = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = original
+
+
+class Command(BaseCommand):
+    help = 'Gera dados sintéticos em volume (perfis 1k, 100k e 1m itens) com bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=sorted(PERFIS), default='1k')
+        parser.add_argument('--itens', type=int, help='Sobrescreve o número de itens do perfil.')
+        parser.add_argument('--semente', type=int, default=42)
+
+    def _inserir(self, model, gerador, total):
+        inseridos = 0
+        while inseridos < total:
+            lote = [gerador(inseridos + i) for i in range(min(LOTE, total - inseridos))]
+            with transaction.atomic():
+                model.objects.bulk_create(lote)
+            inseridos += len(lote)
+        self.stdout.write(f'  {model.__name__}: {total}')
+
+    def _ids(self, model, inicio):
+        return list(model.objects.filter(pk__gt=inicio).order_by('pk').values_list('pk', flat=True))
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['semente'])
+        n_itens = options['itens'] or PERFIS[options['perfil']]
+        n_fornecedores = max(10, n_itens // 10)
+        n_lojas = max(5, n_itens // 100)
+        n_funcionarios = max(10, n_itens // 20)
+        n_pedidos = n_itens
+        n_atribuicoes = n_itens // 2
+        n_ordens = max(1, n_itens // 20)
+        agora = timezone.now()
+        hoje = date.today()
+
+        self.stdout.write(f'Gerando {n_itens} itens e dados relacionados...')
+
+        ultimo = Fornecedor.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        self._inserir(Fornecedor, lambda i: Fornecedor(
+            nome=f'{rnd.choice(MARCAS)} Distribuidora {ultimo + i + 1}',
+            cnpj=f'{(ultimo + i + 1) % 100:02d}.{rnd.randrange(1000):03d}.{rnd.randrange(1000):03d}/{(ultimo + i + 1) // 100 % 10000:04d}-{rnd.randrange(100):02d}',
+            contato=f'(11) 9{rnd.randrange(10000, 99999)}-{rnd.randrange(1000, 9999)}',
+            email=f'contato{ultimo + i + 1}@fornecedor.com.br',
+            produto_principal=rnd.choice(PRODUTOS),
+            status=rnd.choices(['ATIVO', 'SUSPENSO', 'ENCERRADO'], weights=[85, 10, 5])[0],
+        ), n_fornecedores)
+        fornecedores = self._ids(Fornecedor, ultimo)
+
+        ultimo = Loja.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        def loja(i):
+            cidade, estado = rnd.choice(CIDADES)
+            return Loja(
+                nome=f'Loja {cidade} {ultimo + i + 1}',
+                responsavel=f'{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}',
+                telefone=f'(11) 3{rnd.randrange(100, 999)}-{rnd.randrange(1000, 9999)}',
+                endereco=f'Rua {rnd.choice(SOBRENOMES)}, {rnd.randrange(1, 3000)}',
+                cidade=cidade,
+                estado=estado,
+                cep=f'{rnd.randrange(10000, 99999)}-{rnd.randrange(100, 999)}',
+                inaugurada_em=hoje - timedelta(days=rnd.randrange(30, 3650)),
+                status=rnd.choices(['ATIVA', 'REFORMA', 'INATIVA'], weights=[85, 10, 5])[0],
+            )
+        self._inserir(Loja, loja, n_lojas)
+
+        ultimo = Item.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        def item(i):
+            quantidade = rnd.choices([rnd.randrange(0, 11), rnd.randrange(11, 500)], weights=[15, 85])[0]
+            return Item(
+                nome=f'{rnd.choice(PRODUTOS)} {rnd.choice(MARCAS)} {ultimo + i + 1}',
+                categoria=rnd.choice(CATEGORIAS),
+                localizacao=f'{rnd.choice("ABCDEF")}{rnd.randrange(1, 30)}',
+                quantidade=quantidade,
+                data_aquisicao=hoje - timedelta(days=rnd.randrange(0, 1500)),
+                status='DISPONIVEL' if quantidade > 10 else rnd.choice(['BAIXA_QUANTIDADE', 'INDISPONIVEL']),
+                valor=Decimal(rnd.randrange(500, 500000)) / 100,
+            )
+        self._inserir(Item, item, n_itens)
+        itens = self._ids(Item, ultimo)
+
+        ultimo = Funcionario.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        self._inserir(Funcionario, lambda i: Funcionario(
+            nome=f'{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)}',
+            setor=rnd.choice(SETORES),
+        ), n_funcionarios)
+        funcionarios = self._ids(Funcionario, ultimo)
+
+        with _sem_auto_now(Pedido, 'criado_em'):
+            def pedido(i):
+                criado_em = agora - timedelta(days=rnd.randrange(0, 540), minutes=rnd.randrange(0, 1440))
+                return Pedido(
+                    fornecedor_id=rnd.choice(fornecedores),
+                    item_id=rnd.choice(itens),
+                    quantidade=rnd.randrange(1, 100),
+                    status=rnd.choices(['PENDENTE', 'EM_TRANSITO', 'ENTREGUE', 'CANCELADO'], weights=[10, 10, 70, 10])[0],
+                    criado_em=criado_em,
+                    entrega_prevista=(criado_em + timedelta(days=rnd.randrange(2, 30))).date(),
+                )
+            self._inserir(Pedido, pedido, n_pedidos)
+
+        with _sem_auto_now(Atribuicao, 'data'):
+            self._inserir(Atribuicao, lambda i: Atribuicao(
+                item_id=rnd.choice(itens),
+                funcionario_id=rnd.choice(funcionarios),
+                data=hoje - timedelta(days=rnd.randrange(0, 540)),
+                status=rnd.choices(['ATIVO', 'DEVOLVIDO'], weights=[70, 30])[0],
+            ), n_atribuicoes)
+
+        ultimo = OrdemCompra.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        with _sem_auto_now(OrdemCompra, 'data'):
+            self._inserir(OrdemCompra, lambda i: OrdemCompra(
+                data=hoje - timedelta(days=rnd.randrange(0, 540)),
+                status=rnd.choice(['PENDENTE', 'APROVADA', 'RECEBIDA']),
+            ), n_ordens)
+        ordens = self._ids(OrdemCompra, ultimo)
+        self._inserir(ItemOrdem, lambda i: ItemOrdem(
+            ordem_compra_id=ordens[i % len(ordens)],
+            item_id=rnd.choice(itens),
+            quantidade=rnd.randrange(1, 50),
+        ), n_ordens * 4)
+
+        # bulk_create não dispara sinais: reconstrói o que eles manteriam.
+        for model in (Item, Fornecedor, Loja):
+            search.reconstruir(model)
+        for model in (Item, Fornecedor, Loja, Pedido):
+            caching.invalidar(model._meta.label_lower)
+        estoque.inicializar()
+        resumo.reconciliar()
+        resumo_mensal.reconstruir()
+        self.stdout.write(self.style.SUCCESS('Dados sintéticos gerados.'))
@@ -0,0 +1,43 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def copiar(origem, destino):
+    """
+    Copia o banco SQLite `origem` sobre `destino` com a API de backup: cada
+    leitor da réplica vê o estado anterior ou o novo inteiro, nunca uma mistura.
+    """
+    with closing(sqlite3.connect(origem)) as fonte, closing(sqlite3.connect(destino)) as alvo:
+        fonte.backup(alvo)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantém as réplicas SQLite (ESTOQUE_DB_REPLICAS) em dia copiando o banco principal; '
+        'com --intervalo repete a cada N segundos. Em outros bancos use a replicação nativa.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help='Segundos entre cópias (0 = copia uma vez e sai).')
+
+    def handle(self, *args, **options):
+        principal = settings.DATABASES['default']
+        if principal['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sincronizar_replica só copia bancos SQLite.')
+        replicas = getattr(settings, 'ESTOQUE_REPLICAS', [])
+        if not replicas:
+            raise CommandError('Nenhuma réplica configurada (ESTOQUE_DB_REPLICAS).')
+
+        while True:
+            inicio = time.perf_counter()
+            for alias in replicas:
+                copiar(principal['NAME'], settings.DATABASES[alias]['NAME'])
+            self.stdout.write(f'{len(replicas)} réplica(s) copiada(s) em {(time.perf_counter() - inicio) * 1000:.0f} ms.')
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,192 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Métricas por rota (nome da URL): tempo total, nº de consultas e tempo de banco.
+# Cada processo acumula em memória e, se ESTOQUE_METRICAS_DIR estiver definido,
+# grava periodicamente um retrato em <dir>/<pid>.json; o endpoint /metrics soma
+# os retratos de todos os workers. Retratos parados há mais de RETRATO_EXPIRA
+# segundos cujo processo não existe mais são de workers encerrados e são apagados.
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+INTERVALO_GRAVACAO = 5.0
+RETRATO_EXPIRA = INTERVALO_GRAVACAO * 6
+
+logger = logging.getLogger('core.metricas')
+
+_trava = threading.Lock()
+_rotas = {}
+_ultima_gravacao = 0.0
+
+
+def _nova_rota():
+    return {
+        'requisicoes': 0,
+        'duracao_soma': 0.0,
+        'duracao_buckets': [0] * len(BUCKETS_SEGUNDOS),
+        'consultas_soma': 0,
+        'consultas_buckets': [0] * len(BUCKETS_CONSULTAS),
+        'banco_soma': 0.0,
+    }
+
+
+def _acumular(buckets, limites, valor):
+    for i, limite in enumerate(limites):
+        if valor <= limite:
+            buckets[i] += 1
+
+
+def registrar(rota, duracao, consultas, tempo_banco):
+    with _trava:
+        dados = _rotas.setdefault(rota, _nova_rota())
+        dados['requisicoes'] += 1
+        dados['duracao_soma'] += duracao
+        _acumular(dados['duracao_buckets'], BUCKETS_SEGUNDOS, duracao)
+        dados['consultas_soma'] += consultas
+        _acumular(dados['consultas_buckets'], BUCKETS_CONSULTAS, consultas)
+        dados['banco_soma'] += tempo_banco
+    _gravar_se_preciso()
+
+
+def _diretorio():
+    diretorio = getattr(settings, 'ESTOQUE_METRICAS_DIR', None)
+    return Path(diretorio) if diretorio else None
+
+
+def _retrato():
+    with _trava:
+        return json.loads(json.dumps(_rotas))
+
+
+def _gravar_se_preciso(forcar=False):
+    """Grava o retrato deste processo; falhas de disco só vão para o log."""
+    global _ultima_gravacao
+    diretorio = _diretorio()
+    if diretorio is None:
+        return
+    with _trava:
+        agora = time.monotonic()
+        if not forcar and agora - _ultima_gravacao < INTERVALO_GRAVACAO:
+            return
+        _ultima_gravacao = agora
+        temporario = None
+        try:
+            diretorio.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=diretorio, suffix='.tmp', delete=False) as arquivo:
+                temporario = arquivo.name
+                json.dump(_rotas, arquivo)
+            os.replace(temporario, diretorio / f'{os.getpid()}.json')
+        except OSError:
+            logger.exception('Falha ao gravar as métricas em %s.', diretorio)
+            if temporario is not None:
+                Path(temporario).unlink(missing_ok=True)
+
+
+def _processo_ativo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, OverflowError):
+        pass
+    return True
+
+
+def _abandonado(arquivo):
+    """Retrato sem atualização recente de um processo que não existe mais."""
+    try:
+        parado = time.time() - arquivo.stat().st_mtime > RETRATO_EXPIRA
+    except OSError:
+        return True
+    return parado and not (arquivo.stem.isdigit() and _processo_ativo(int(arquivo.stem)))
+
+
+def _somar(total, parcial):
+    for rota, dados in parcial.items():
+        acumulado = total.setdefault(rota, _nova_rota())
+        for campo, valor in dados.items():
+            if isinstance(valor, list):
+                acumulado[campo] = [a + b for a, b in zip(acumulado[campo], valor)]
+            else:
+                acumulado[campo] += valor
+
+
+def consolidar():
+    """Soma as métricas deste processo com os retratos gravados pelos demais."""
+    total = {}
+    _somar(total, _retrato())
+    diretorio = _diretorio()
+    if diretorio is not None and diretorio.exists():
+        proprio = f'{os.getpid()}.json'
+        for arquivo in diretorio.glob('*.json'):
+            if arquivo.name == proprio:
+                continue
+            if _abandonado(arquivo):
+                try:
+                    arquivo.unlink(missing_ok=True)
+                except OSError:
+                    pass
+                continue
+            try:
+                _somar(total, json.loads(arquivo.read_text()))
+            except (OSError, ValueError):
+                continue
+    return total
+
+
+def _rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histograma(linhas, nome, rota, buckets, limites, soma, contagem):
+    for limite, quantidade in zip(limites, buckets):
+        linhas.append(f'{nome}_bucket{{view="{rota}",le="{limite}"}} {quantidade}')
+    linhas.append(f'{nome}_bucket{{view="{rota}",le="+Inf"}} {contagem}')
+    linhas.append(f'{nome}_sum{{view="{rota}"}} {soma}')
+    linhas.append(f'{nome}_count{{view="{rota}"}} {contagem}')
+
+
+def exposicao():
+    """Métricas consolidadas no formato texto do Prometheus."""
+    rotas = consolidar()
+    linhas = [
+        '# HELP estoque_http_request_duration_seconds Tempo total da requisição por rota.',
+        '# TYPE estoque_http_request_duration_seconds histogram',
+    ]
+    for rota, dados in sorted(rotas.items()):
+        _histograma(
+            linhas, 'estoque_http_request_duration_seconds', _rotulo(rota),
+            dados['duracao_buckets'], BUCKETS_SEGUNDOS, dados['duracao_soma'], dados['requisicoes'],
+        )
+    linhas += [
+        '# HELP estoque_db_queries_per_request Consultas ao banco por requisição.',
+        '# TYPE estoque_db_queries_per_request histogram',
+    ]
+    for rota, dados in sorted(rotas.items()):
+        _histograma(
+            linhas, 'estoque_db_queries_per_request', _rotulo(rota),
+            dados['consultas_buckets'], BUCKETS_CONSULTAS, dados['consultas_soma'], dados['requisicoes'],
+        )
+    linhas += [
+        '# HELP estoque_db_query_duration_seconds_total Tempo gasto no banco por rota.',
+        '# TYPE estoque_db_query_duration_seconds_total counter',
+    ]
+    for rota, dados in sorted(rotas.items()):
+        linhas.append(f'estoque_db_query_duration_seconds_total{{view="{_rotulo(rota)}"}} {dados["banco_soma"]}')
+    return '\n'.join(linhas) + '\n'
+
+
+atexit.register(_gravar_se_preciso, forcar=True)
+
+
+def limpar():
+    with _trava:
+        _rotas.clear()
@@ -0,0 +1,88 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import auditoria, caching, metricas
+
+logger = logging.getLogger('core.metricas')
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class CacheEscritaMiddleware:
+    """Marca na sessão o instante das escritas do usuário (ver core/caching.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            request.method not in METODOS_SEGUROS
+            and user is not None
+            and user.is_authenticated
+            and response.status_code < 400
+        ):
+            caching.registrar_escrita(request)
+        return response
+
+
+class AuditoriaMiddleware:
+    """Deixa a requisição visível para core.auditoria saber quem fez a alteração."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = auditoria.definir_requisicao(request)
+        try:
+            return self.get_response(request)
+        finally:
+            auditoria.restaurar_requisicao(token)
+
+
+class MetricasMiddleware:
+    """
+    Mede tempo, número de consultas e tempo de banco de cada requisição e
+    registra em core.metricas sob o nome da rota. Requisições acima de
+    ESTOQUE_SLOW_REQUEST_MS geram um aviso com as consultas mais lentas.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = []
+
+        def medir(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas.append((time.perf_counter() - inicio, sql))
+
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(medir))
+            response = self.get_response(request)
+        duracao = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        rota = match.view_name if match is not None else 'nao_resolvida'
+        tempo_banco = sum(tempo for tempo, _ in consultas)
+        metricas.registrar(rota, duracao, len(consultas), tempo_banco)
+
+        limite = getattr(settings, 'ESTOQUE_SLOW_REQUEST_MS', 500)
+        if limite is not None and duracao * 1000 > limite:
+            piores = sorted(consultas, key=lambda consulta: consulta[0], reverse=True)[:5]
+            logger.warning(
+                'Requisição lenta: %s %s (%s) em %.0f ms, %d consultas, %.0f ms no banco\n%s',
+                request.method, request.path, rota, duracao * 1000, len(consultas), tempo_banco * 1000,
+                '\n'.join(f'  {tempo * 1000:.1f} ms: {sql[:300]}' for tempo, sql in piores),
+            )
+        return response
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def criar_indice(apps, schema_editor):
+    from core import search
+
+    if not search.fts_disponivel(schema_editor.connection):
+        return
+    search.criar_tabelas(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        for label, (tabela, campos) in search.INDICES.items():
+            origem = apps.get_model(label)._meta.db_table
+            colunas = ', '.join(f"COALESCE({campo}, '')" for campo in campos)
+            cursor.execute(
+                f"INSERT INTO {tabela}(rowid, {', '.join(campos)}) SELECT id, {colunas} FROM {origem}"
+            )
+
+
+def remover_indice(apps, schema_editor):
+    from core import search
+
+    if search.fts_disponivel(schema_editor.connection):
+        search.remover_tabelas(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_loja'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_resumodashboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fornecedor',
+            index=models.Index(fields=['nome'], name='fornecedor_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fornecedor',
+            index=models.Index(fields=['status', 'nome'], name='fornecedor_status_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['nome'], name='item_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['status', 'nome'], name='item_status_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('quantidade__lte', 10)), fields=['quantidade'], name='item_estoque_baixo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loja',
+            index=models.Index(fields=['nome'], name='loja_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loja',
+            index=models.Index(fields=['status', 'nome'], name='loja_status_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['-criado_em'], name='pedido_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['status', '-criado_em'], name='pedido_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fornecedor', '-criado_em'], name='pedido_fornecedor_criado_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def abrir_livro(apps, schema_editor):
+    # Pedidos já entregues e atribuições ativas entram no livro para que uma
+    # transição futura possa ser estornada; o saldo inicial fecha a diferença
+    # com a quantidade atual, que continua valendo.
+    Item = apps.get_model('core', 'Item')
+    Pedido = apps.get_model('core', 'Pedido')
+    Atribuicao = apps.get_model('core', 'Atribuicao')
+    MovimentoEstoque = apps.get_model('core', 'MovimentoEstoque')
+
+    movimentos = []
+    lancado = {}
+    for pk, item_id, quantidade in Pedido.objects.filter(status='ENTREGUE').values_list('pk', 'item_id', 'quantidade').iterator():
+        movimentos.append(MovimentoEstoque(item_id=item_id, pedido_id=pk, tipo='RECEBIMENTO', quantidade=quantidade))
+        lancado[item_id] = lancado.get(item_id, 0) + quantidade
+    for pk, item_id in Atribuicao.objects.filter(status='ATIVO').values_list('pk', 'item_id').iterator():
+        movimentos.append(MovimentoEstoque(item_id=item_id, atribuicao_id=pk, tipo='ATRIBUICAO', quantidade=-1))
+        lancado[item_id] = lancado.get(item_id, 0) - 1
+    for pk, quantidade in Item.objects.values_list('pk', 'quantidade').iterator():
+        inicial = quantidade - lancado.get(pk, 0)
+        if inicial:
+            movimentos.append(MovimentoEstoque(item_id=pk, tipo='SALDO_INICIAL', quantidade=inicial))
+    MovimentoEstoque.objects.bulk_create(movimentos, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_indices_listas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('SALDO_INICIAL', 'Saldo inicial'), ('RECEBIMENTO', 'Recebimento de pedido'), ('ATRIBUICAO', 'Atribuição'), ('AJUSTE', 'Ajuste manual')], max_length=20)),
+                ('quantidade', models.IntegerField()),
+                ('observacao', models.CharField(blank=True, max_length=255)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atribuicao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos', to='core.atribuicao')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos', to='core.item')),
+                ('pedido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos', to='core.pedido')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'criado_em'], name='movimento_item_idx')],
+            },
+        ),
+        migrations.RunPython(abrir_livro, migrations.RunPython.noop),
+    ]
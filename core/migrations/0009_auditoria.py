@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:53
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_movimentoestoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicoauditoria',
+            name='alteracoes',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddField(
+            model_name='historicoauditoria',
+            name='modelo',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='historicoauditoria',
+            name='objeto_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='historicoauditoria',
+            name='acao',
+            field=models.CharField(choices=[('CRIACAO', 'Criação'), ('ALTERACAO', 'Alteração'), ('EXCLUSAO', 'Exclusão'), ('IMPORTACAO', 'Importação')], max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='historicoauditoria',
+            name='data',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='historicoauditoria',
+            index=models.Index(fields=['modelo', 'objeto_id'], name='auditoria_objeto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoauditoria',
+            index=models.Index(fields=['-data'], name='auditoria_data_idx'),
+        ),
+    ]
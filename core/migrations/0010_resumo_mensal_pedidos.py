@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher(apps, schema_editor):
+    Pedido = apps.get_model('core', 'Pedido')
+    ResumoMensalPedidos = apps.get_model('core', 'ResumoMensalPedidos')
+    pedidos = Pedido.objects.order_by().annotate(mes=TruncMonth('criado_em', output_field=DateField()))
+    linhas = []
+    for campos in (('mes', 'fornecedor', 'status'), ('mes', 'status')):
+        for linha in pedidos.values(*campos).annotate(n=Count('pk'), unidades=Sum('quantidade')):
+            linhas.append(ResumoMensalPedidos(
+                mes=linha['mes'], fornecedor_id=linha.get('fornecedor'), status=linha['status'],
+                pedidos=linha['n'], unidades=linha['unidades'] or 0,
+            ))
+    ResumoMensalPedidos.objects.bulk_create(linhas, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_auditoria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensalPedidos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EM_TRANSITO', 'Em trânsito'), ('ENTREGUE', 'Entregue'), ('CANCELADO', 'Cancelado')], max_length=20)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('unidades', models.IntegerField(default=0)),
+                ('fornecedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.fornecedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('fornecedor__isnull', False)), fields=('mes', 'fornecedor', 'status'), name='resumo_mensal_fornecedor_unico'), models.UniqueConstraint(condition=models.Q(('fornecedor__isnull', True)), fields=('mes', 'status'), name='resumo_mensal_total_unico')],
+            },
+        ),
+        migrations.RunPython(preencher, migrations.RunPython.noop),
+    ]
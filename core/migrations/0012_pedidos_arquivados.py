@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_sincronizacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicoauditoria',
+            name='acao',
+            field=models.CharField(choices=[('CRIACAO', 'Criação'), ('ALTERACAO', 'Alteração'), ('EXCLUSAO', 'Exclusão'), ('IMPORTACAO', 'Importação'), ('ARQUIVAMENTO', 'Arquivamento')], max_length=255),
+        ),
+        migrations.CreateModel(
+            name='PedidoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantidade', models.PositiveIntegerField(default=1)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EM_TRANSITO', 'Em trânsito'), ('ENTREGUE', 'Entregue'), ('CANCELADO', 'Cancelado')], max_length=20)),
+                ('criado_em', models.DateTimeField()),
+                ('entrega_prevista', models.DateField(blank=True, null=True)),
+                ('observacoes', models.TextField(blank=True)),
+                ('arquivado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fornecedor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos_arquivados', to='core.fornecedor')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos_arquivados', to='core.item')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='movimentoestoque',
+            name='pedido_arquivado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos', to='core.pedidoarquivado'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidoarquivado',
+            index=models.Index(fields=['-criado_em'], name='arquivado_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidoarquivado',
+            index=models.Index(fields=['status', '-criado_em'], name='arquivado_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidoarquivado',
+            index=models.Index(fields=['fornecedor', '-criado_em'], name='arquivado_fornecedor_idx'),
+        ),
+    ]
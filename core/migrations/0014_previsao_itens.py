@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_tarefas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrevisaoItem',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='previsao', serialize=False, to='core.item')),
+                ('consumo_diario', models.FloatField()),
+                ('lead_time_dias', models.FloatField()),
+                ('estoque_seguranca', models.PositiveIntegerField()),
+                ('ponto_pedido', models.PositiveIntegerField()),
+                ('lote_reposicao', models.PositiveIntegerField()),
+                ('calculado_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='item_estoque_baixo_idx',
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='ponto_pedido',
+            field=models.PositiveIntegerField(default=10),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('quantidade__lte', models.F('ponto_pedido'))), fields=['quantidade'], name='item_repor_idx'),
+        ),
+    ]
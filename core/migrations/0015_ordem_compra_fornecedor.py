@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_previsao_itens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordemcompra',
+            name='fornecedor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ordens_compra', to='core.fornecedor'),
+        ),
+    ]
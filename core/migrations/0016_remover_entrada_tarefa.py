@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_ordem_compra_fornecedor'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='tarefa',
+            name='entrada',
+        ),
+    ]
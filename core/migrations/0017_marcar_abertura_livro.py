@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.migrations.recorder import MigrationRecorder
+
+ABERTURA_LIVRO = 'Abertura do livro'
+
+
+def marcar_abertura(apps, schema_editor):
+    # Os recebimentos que a 0008 lançou para pedidos já entregues têm criado_em
+    # da hora da migração, não da entrega. Tudo o que foi lançado até a 0008
+    # ser registrada veio de lá: marca para a previsão (lead time) ignorar.
+    MovimentoEstoque = apps.get_model('core', 'MovimentoEstoque')
+    aplicada = (
+        MigrationRecorder(schema_editor.connection).migration_qs
+        .filter(app='core', name='0008_movimentoestoque').values_list('applied', flat=True).first()
+    )
+    if aplicada is None:
+        return
+    MovimentoEstoque.objects.filter(tipo='RECEBIMENTO', criado_em__lte=aplicada).update(observacao=ABERTURA_LIVRO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_remover_entrada_tarefa'),
+    ]
+
+    operations = [
+        migrations.RunPython(marcar_abertura, migrations.RunPython.noop),
+    ]
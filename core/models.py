@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class Usuario(AbstractUser):
@@ -25,6 +27,15 @@ class Fornecedor(models.Model):
     produto_principal = models.CharField(max_length=255, null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ATIVO')
     observacoes = models.TextField(blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['nome'], name='fornecedor_nome_idx'),
+            models.Index(fields=['status', 'nome'], name='fornecedor_status_nome_idx'),
+            # Feed de mudanças (core/sincronizacao.py)
+            models.Index(fields=['atualizado_em', 'id'], name='fornecedor_atualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -48,9 +59,15 @@ class Loja(models.Model):
     inaugurada_em = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ATIVA')
     observacoes = models.TextField(blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['nome'], name='loja_nome_idx'),
+            models.Index(fields=['status', 'nome'], name='loja_status_nome_idx'),
+            models.Index(fields=['atualizado_em', 'id'], name='loja_atualizado_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -65,6 +82,20 @@ class Item(models.Model):
     data_aquisicao = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='DISPONIVEL')
     valor = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Cópia de PrevisaoItem mantida por core/previsao.py; 10 para itens sem histórico.
+    ponto_pedido = models.PositiveIntegerField(default=10)
+    # UPDATEs diretos (livro de estoque, ações em massa) gravam este campo à mão.
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['nome'], name='item_nome_idx'),
+            models.Index(fields=['status', 'nome'], name='item_status_nome_idx'),
+            # Itens a repor (lista do painel, ?repor=1 do inventário)
+            models.Index(fields=['quantidade'], name='item_repor_idx', condition=models.Q(quantidade__lte=models.F('ponto_pedido'))),
+            models.Index(fields=['atualizado_em', 'id'], name='item_atualizado_idx'),
+        ]
+
     def __str__(self): return self.nome
 
 # Tabela FUNCIONARIO
@@ -81,9 +112,11 @@ class Atribuicao(models.Model):
     funcionario = models.ForeignKey(Funcionario, on_delete=models.CASCADE)
 
 # Tabela ORDEM_COMPRA
+# Geradas em lote por core/compras.py, uma por fornecedor.
 class OrdemCompra(models.Model):
     data = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=50, default='PENDENTE')
+    fornecedor = models.ForeignKey(Fornecedor, on_delete=models.PROTECT, null=True, blank=True, related_name='ordens_compra')
     itens = models.ManyToManyField(Item, through='ItemOrdem')
 
 
@@ -103,9 +136,41 @@ class Pedido(models.Model):
     entrega_prevista = models.DateField(null=True, blank=True)
     observacoes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-criado_em'], name='pedido_criado_idx'),
+            models.Index(fields=['status', '-criado_em'], name='pedido_status_criado_idx'),
+            models.Index(fields=['fornecedor', '-criado_em'], name='pedido_fornecedor_criado_idx'),
+        ]
+
     def __str__(self):
         return f"Pedido #{self.pk} - {self.item.nome}"
 
+
+# Pedidos fechados antigos, movidos de Pedido em lotes pelo arquivamento (ver
+# core/arquivamento.py). Mantêm o id original, então (criado_em, id) continua
+# único somando as duas tabelas.
+class PedidoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    fornecedor = models.ForeignKey(Fornecedor, on_delete=models.PROTECT, related_name='pedidos_arquivados')
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='pedidos_arquivados')
+    quantidade = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=Pedido.STATUS_CHOICES)
+    criado_em = models.DateTimeField()
+    entrega_prevista = models.DateField(null=True, blank=True)
+    observacoes = models.TextField(blank=True)
+    arquivado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-criado_em'], name='arquivado_criado_idx'),
+            models.Index(fields=['status', '-criado_em'], name='arquivado_status_criado_idx'),
+            models.Index(fields=['fornecedor', '-criado_em'], name='arquivado_fornecedor_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pedido #{self.pk} (arquivado) - {self.item.nome}"
+
 # Tabela ITEM_ORDEM
 class ItemOrdem(models.Model):
     ordem_compra = models.ForeignKey(OrdemCompra, on_delete=models.CASCADE)
@@ -113,7 +178,166 @@ class ItemOrdem(models.Model):
     quantidade = models.IntegerField()
 
 # Tabela HISTORICO_AUDITORIA
+# Gravada em lotes pela fila de core/auditoria.py: `data` é o instante da
+# alteração, não o da gravação.
 class HistoricoAuditoria(models.Model):
-    data = models.DateTimeField(auto_now_add=True)
-    acao = models.CharField(max_length=255)
-    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
\ No newline at end of file
+    ACAO_CHOICES = [
+        ('CRIACAO', 'Criação'),
+        ('ALTERACAO', 'Alteração'),
+        ('EXCLUSAO', 'Exclusão'),
+        ('IMPORTACAO', 'Importação'),
+        ('ARQUIVAMENTO', 'Arquivamento'),
+    ]
+
+    data = models.DateTimeField(default=timezone.now)
+    acao = models.CharField(max_length=255, choices=ACAO_CHOICES)
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True)
+    modelo = models.CharField(max_length=100, blank=True)
+    objeto_id = models.CharField(max_length=64, blank=True)
+    # {campo: [antes, depois]}
+    alteracoes = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id'], name='auditoria_objeto_idx'),
+            models.Index(fields=['-data'], name='auditoria_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_acao_display()} {self.modelo} #{self.objeto_id}"
+
+# Lápides: uma linha por Item, Fornecedor ou Loja excluído, para que o feed de
+# mudanças (core/sincronizacao.py) informe exclusões a quem sincroniza.
+class Exclusao(models.Model):
+    modelo = models.CharField(max_length=100)
+    objeto_id = models.BigIntegerField()
+    excluido_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modelo', 'excluido_em', 'objeto_id'], name='exclusao_modelo_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id}"
+
+# Contadores do painel, mantidos por sinais (ver core/resumo.py)
+class ResumoDashboard(models.Model):
+    total_itens = models.IntegerField(default=0)
+    itens_baixo_estoque = models.IntegerField(default=0)
+    total_fornecedores = models.IntegerField(default=0)
+    pedidos_pendentes = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+
+# Pedidos por mês (de criação), fornecedor e status, mantidos por deltas (ver
+# core/resumo_mensal.py). As linhas com fornecedor nulo guardam o total do mês.
+class ResumoMensalPedidos(models.Model):
+    mes = models.DateField()
+    fornecedor = models.ForeignKey(Fornecedor, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=Pedido.STATUS_CHOICES)
+    pedidos = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mes', 'fornecedor', 'status'], condition=models.Q(fornecedor__isnull=False),
+                name='resumo_mensal_fornecedor_unico',
+            ),
+            models.UniqueConstraint(
+                fields=['mes', 'status'], condition=models.Q(fornecedor__isnull=True),
+                name='resumo_mensal_total_unico',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} {self.status} - {self.fornecedor_id or 'total'}"
+
+
+# Previsão de demanda e ponto de pedido por item, recalculada em lote por
+# core/previsao.py. Só itens com histórico (consumo ou pedidos entregues) têm
+# linha; os demais ficam com o Item.ponto_pedido padrão.
+class PrevisaoItem(models.Model):
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='previsao')
+    consumo_diario = models.FloatField()
+    lead_time_dias = models.FloatField()
+    estoque_seguranca = models.PositiveIntegerField()
+    ponto_pedido = models.PositiveIntegerField()
+    # Quantidade para cobrir ESTOQUE_PREVISAO_COBERTURA dias de consumo.
+    lote_reposicao = models.PositiveIntegerField()
+    calculado_em = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Previsão {self.item_id}: repor em {self.ponto_pedido}"
+
+
+# Livro de movimentos de estoque (somente inclusão). O saldo de cada item é a
+# soma dos movimentos; Item.quantidade é a cópia materializada desse saldo.
+class MovimentoEstoque(models.Model):
+    TIPO_CHOICES = [
+        ('SALDO_INICIAL', 'Saldo inicial'),
+        ('RECEBIMENTO', 'Recebimento de pedido'),
+        ('ATRIBUICAO', 'Atribuição'),
+        ('AJUSTE', 'Ajuste manual'),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='movimentos')
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    quantidade = models.IntegerField()
+    pedido = models.ForeignKey(Pedido, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimentos')
+    # Preenchido no lugar de `pedido` quando o pedido é arquivado.
+    pedido_arquivado = models.ForeignKey(
+        PedidoArquivado, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimentos',
+    )
+    atribuicao = models.ForeignKey(Atribuicao, on_delete=models.SET_NULL, null=True, blank=True, related_name='movimentos')
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True)
+    observacao = models.CharField(max_length=255, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'criado_em'], name='movimento_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.quantidade:+d} - {self.item_id}"
+
+
+# Fila de tarefas em segundo plano (ver core/tarefas.py), executadas pelo
+# comando processar_tarefas fora das requisições.
+class Tarefa(models.Model):
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDA', 'Concluída'),
+        ('FALHOU', 'Falhou'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='tarefas')
+    tentativas = models.PositiveIntegerField(default=0)
+    max_tentativas = models.PositiveIntegerField(default=3)
+    progresso = models.PositiveSmallIntegerField(default=0)
+    mensagem = models.CharField(max_length=255, blank=True)
+    resultado = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    erro = models.TextField(blank=True)
+    trabalhador = models.CharField(max_length=100, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    executar_apos = models.DateTimeField(default=timezone.now)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    # Batimento do trabalhador: atualizado a cada progresso relatado.
+    atualizado_em = models.DateTimeField(auto_now=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'executar_apos'], name='tarefa_fila_idx'),
+            models.Index(fields=['usuario', '-criado_em'], name='tarefa_usuario_idx'),
+        ]
+
+    def __str__(self):
+        return f"Tarefa #{self.pk} {self.tipo} ({self.get_status_display()})"
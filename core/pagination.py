@@ -0,0 +1,138 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Paginação por cursor (keyset): em vez de OFFSET, cada página filtra a partir
+# da última linha vista, então o custo não cresce com o tamanho da tabela.
+
+POR_PAGINA = 50
+LIMITE_CONTAGEM = 10000
+
+
+def _campo(model, nome):
+    if nome == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(nome)
+
+
+def _codificar(valores, direcao):
+    dados = json.dumps({'v': valores, 'd': direcao}, default=str)
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor):
+    try:
+        cursor += '=' * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return dados['v'], dados['d']
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+def contar(queryset, limite=LIMITE_CONTAGEM):
+    """Conta até `limite` linhas; acima disso a contagem é marcada como aproximada."""
+    querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+    total = 0
+    for qs in querysets:
+        total += qs.order_by()[:limite + 1 - total].count()
+        if total > limite:
+            return f'{limite}+'
+    return total
+
+
+def _ordenar(linhas, campos, chave):
+    # Ordenações estáveis do último campo ao primeiro, cada uma no seu sentido.
+    for i in range(len(campos) - 1, -1, -1):
+        linhas.sort(key=lambda obj: chave(obj)[i], reverse=campos[i][1])
+    return linhas
+
+
+class PaginaCursor:
+    def __init__(self, object_list, ordering, proximo, anterior, total):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = proximo is not None
+        self.has_previous = anterior is not None
+        self.next_cursor = proximo
+        self.previous_cursor = anterior
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginar(queryset, ordering, cursor=None, por_pagina=POR_PAGINA, total=True):
+    """
+    Pagina `queryset` por keyset sobre `ordering` (ex.: ('nome', 'pk') ou
+    ('-criado_em', '-pk')). O último campo deve ser único para desempatar.
+
+    `queryset` também pode ser uma lista de querysets com os campos da
+    ordenação (ex.: pedidos e pedidos arquivados): cada um é paginado pelo
+    mesmo cursor e as páginas são intercaladas.
+    """
+    querysets = list(queryset) if isinstance(queryset, (list, tuple)) else [queryset]
+    model = querysets[0].model
+    campos = [(nome.lstrip('-'), nome.startswith('-')) for nome in ordering]
+
+    valores, direcao = (None, 'n')
+    if cursor:
+        valores, direcao = _decodificar(cursor)
+        try:
+            convertidos = [_campo(model, nome).to_python(valor) for (nome, _), valor in zip(campos, valores)]
+        except (TypeError, ValidationError):
+            valores = None
+        if valores is None or len(valores) != len(campos):
+            # Cursor inválido ou adulterado: volta para a primeira página.
+            valores, direcao = None, 'n'
+
+    voltando = direcao == 'p'
+    filtro = Q()
+    if valores is not None:
+        for i, (nome, desc) in enumerate(campos):
+            # Avançar em ordem decrescente (ou voltar em crescente) usa "menor que".
+            lookup = 'lt' if desc != voltando else 'gt'
+            condicao = Q(**{f'{nome}__{lookup}': convertidos[i]})
+            for j, (anterior_nome, _) in enumerate(campos[:i]):
+                condicao &= Q(**{anterior_nome: convertidos[j]})
+            filtro |= condicao
+
+    if voltando:
+        ordem = [nome[1:] if nome.startswith('-') else f'-{nome}' for nome in ordering]
+    else:
+        ordem = list(ordering)
+
+    def chave(obj):
+        # Linhas de .values() são dicts; as demais, instâncias.
+        if isinstance(obj, dict):
+            return [obj[nome] for nome, _ in campos]
+        return [getattr(obj, nome) for nome, _ in campos]
+
+    linhas = []
+    for qs in querysets:
+        linhas.extend(qs.filter(filtro).order_by(*ordem)[:por_pagina + 1])
+    if len(querysets) > 1:
+        _ordenar(linhas, [(nome, desc != voltando) for nome, desc in campos], chave)
+    tem_mais = len(linhas) > por_pagina
+    linhas = linhas[:por_pagina]
+    if voltando:
+        linhas.reverse()
+
+    proximo = anterior = None
+    if linhas:
+        if tem_mais or voltando:
+            proximo = _codificar(chave(linhas[-1]), 'n')
+        if valores is not None and (tem_mais or not voltando):
+            anterior = _codificar(chave(linhas[0]), 'p')
+
+    return PaginaCursor(
+        linhas,
+        ordering,
+        proximo,
+        anterior,
+        contar(querysets) if total else None,
+    )
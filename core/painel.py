@@ -0,0 +1,55 @@
+from django.template.defaultfilters import floatformat
+from django.utils import timezone
+
+from . import caching, previsao, resumo, resumo_mensal
+
+# Valores do painel que mudam com Item, Pedido e Fornecedor, num dict plano
+# {chave: valor}. A view usa as mesmas chaves nos cards (data-contador) e o
+# fluxo de eventos (core/eventos.py) envia só as chaves que mudaram.
+
+LABELS = ['core.item', 'core.pedido', 'core.fornecedor']
+CONTADORES = ('total_itens', 'itens_baixo_estoque', 'total_fornecedores', 'pedidos_pendentes')
+ITENS_LISTA_BAIXO = 4
+
+# Cards do mês: chave -> (status somados, campo).
+CARDS_MES = {
+    'pedidos_mes': ((), 'pedidos'),
+    'entregues_mes': (('ENTREGUE',), 'pedidos'),
+    'unidades_recebidas_mes': (('ENTREGUE',), 'unidades'),
+    'pendentes_mes': (('PENDENTE',), 'pedidos'),
+    'em_transito_mes': (('EM_TRANSITO',), 'pedidos'),
+    'unidades_mes': ((), 'unidades'),
+    'cancelamentos_mes': (('CANCELADO',), 'pedidos'),
+}
+
+
+def serie(request=None):
+    mes = timezone.localdate().strftime('%Y-%m')
+    return caching.obter(request, 'dashboard_series', ['core.pedido'], resumo_mensal.serie, {'mes': mes})
+
+
+def total_mes(por_status, chave):
+    status, campo = CARDS_MES[chave]
+    return resumo_mensal.total(por_status, *status, campo=campo)
+
+
+def estoque_baixo():
+    """Itens no ou abaixo do ponto de pedido calculado (core/previsao.py)."""
+    itens = previsao.a_repor().order_by('quantidade', 'pk')
+    return list(itens.values('id', 'nome', 'quantidade', 'ponto_pedido')[:ITENS_LISTA_BAIXO])
+
+
+def valores(request=None):
+    """Estado atual do painel: contadores, cards do mês e a lista de estoque baixo."""
+    contadores = resumo.obter()
+    _, atual = serie(request)[-1]
+    estado = {campo: getattr(contadores, campo) for campo in CONTADORES}
+    estado['valor_total'] = floatformat(contadores.valor_total, 2)
+    estado.update((chave, total_mes(atual, chave)) for chave in CARDS_MES)
+    estado['estoque_baixo'] = estoque_baixo()
+    return estado
+
+
+def diferenca(antes, depois):
+    """Chaves de `depois` com valor diferente de `antes` (todas, se `antes` é None)."""
+    return {chave: valor for chave, valor in depois.items() if antes is None or antes.get(chave) != valor}
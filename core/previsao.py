@@ -0,0 +1,173 @@
+import math
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from . import caching, estoque
+from .models import Atribuicao, Item, Pedido, PedidoArquivado, PrevisaoItem
+
+try:
+    import numpy as np
+except ImportError:  # Sem NumPy não há cálculo; as telas seguem lendo PrevisaoItem.
+    np = None
+
+# Previsão de consumo e ponto de pedido por item. `recalcular` lê o histórico
+# inteiro em uma consulta por tabela (atribuições ativas = consumo; pedidos
+# entregues, ativos e arquivados = lead time), calcula todos os itens de uma vez
+# com NumPy, regrava PrevisaoItem e copia o ponto de pedido para
+# Item.ponto_pedido. As telas só comparam as duas colunas de Item (a_repor),
+# pelo índice parcial item_repor_idx, sem cálculo por item na requisição.
+#
+# Para cada item, com d = consumo diário médio na janela, σd = desvio diário,
+# L = lead time médio em dias e σL = seu desvio:
+#   estoque de segurança = z · √(L·σd² + d²·σL²)
+#   ponto de pedido      = d·L + estoque de segurança
+#   lote de reposição    = d · dias de cobertura
+
+LOTE = 2000
+JANELA_LEAD_TIME = 365
+# Itens sem histórico: entram na lista de reposição com o limite fixo antigo.
+LIMITE_SEM_PREVISAO = Item._meta.get_field('ponto_pedido').default
+
+
+def _config(nome, padrao):
+    return getattr(settings, f'ESTOQUE_PREVISAO_{nome}', padrao)
+
+
+def estimar(ids, consumo_itens, consumo_dias, lead_itens, lead_dias, janela, z=1.65, lead_padrao=7.0, cobertura=30):
+    """
+    Calcula a previsão de todos os `ids` (ordenados) de uma vez.
+
+    `consumo_itens`/`consumo_dias`: uma posição por unidade consumida (item e
+    há quantos dias, 0 a janela-1). `lead_itens`/`lead_dias`: uma posição por
+    pedido entregue (item e dias entre criação e recebimento). Devolve um dict
+    de arrays alinhados com `ids`, mais `com_historico`. Posições de itens
+    fora de `ids` (criados ou excluídos entre as leituras) são ignoradas.
+    """
+    n = len(ids)
+    conhecidos = np.isin(consumo_itens, ids)
+    consumo_itens, consumo_dias = consumo_itens[conhecidos], consumo_dias[conhecidos]
+    conhecidos = np.isin(lead_itens, ids)
+    lead_itens, lead_dias = lead_itens[conhecidos], lead_dias[conhecidos]
+    # Demanda por (item, dia): só as combinações com consumo; os demais dias valem zero.
+    posicoes = np.searchsorted(ids, consumo_itens)
+    chaves, unidades = np.unique(posicoes * janela + consumo_dias, return_counts=True)
+    por_item = chaves // janela
+    total = np.bincount(por_item, weights=unidades, minlength=n)
+    quadrados = np.bincount(por_item, weights=unidades.astype(float) ** 2, minlength=n)
+    consumo = total / janela
+    desvio = np.sqrt(np.maximum(quadrados / janela - consumo ** 2, 0))
+
+    posicoes = np.searchsorted(ids, lead_itens)
+    amostras = np.bincount(posicoes, minlength=n)
+    soma = np.bincount(posicoes, weights=lead_dias, minlength=n)
+    soma_quadrados = np.bincount(posicoes, weights=lead_dias ** 2, minlength=n)
+    divisor = np.maximum(amostras, 1)
+    # Item sem entregas usa a mediana de todos os pedidos entregues.
+    padrao = float(np.median(lead_dias)) if len(lead_dias) else lead_padrao
+    lead = np.where(amostras > 0, soma / divisor, padrao)
+    desvio_lead = np.where(amostras > 1, np.sqrt(np.maximum(soma_quadrados / divisor - lead ** 2, 0)), 0)
+
+    seguranca = z * np.sqrt(lead * desvio ** 2 + consumo ** 2 * desvio_lead ** 2)
+    return {
+        'consumo_diario': consumo,
+        'lead_time_dias': lead,
+        'estoque_seguranca': np.ceil(seguranca),
+        'ponto_pedido': np.ceil(consumo * lead + seguranca),
+        'lote_reposicao': np.ceil(consumo * cobertura),
+        'com_historico': (total > 0) | (amostras > 0),
+    }
+
+
+def _consumo(hoje, janela):
+    atribuicoes = Atribuicao.objects.filter(status='ATIVO', data__gt=hoje - timedelta(days=janela), data__lte=hoje)
+    linhas = list(atribuicoes.values_list('item_id', 'data').iterator(chunk_size=LOTE))
+    itens = np.fromiter((item_id for item_id, _ in linhas), dtype=np.int64, count=len(linhas))
+    dias = np.fromiter(((hoje - data).days for _, data in linhas), dtype=np.int64, count=len(linhas))
+    return itens, dias
+
+
+def _lead_times(agora):
+    """
+    Dias entre criação e recebimento (ou entrega prevista) dos pedidos
+    entregues. Recebimentos da abertura do livro não contam: a data deles é a
+    da migração, então esses pedidos usam a entrega prevista.
+    """
+    desde = agora - timedelta(days=JANELA_LEAD_TIME)
+    recebimento = Q(movimentos__tipo='RECEBIMENTO') & ~Q(movimentos__observacao=estoque.ABERTURA_LIVRO)
+    linhas = []
+    for model in (Pedido, PedidoArquivado):
+        entregues = (
+            model.objects.filter(status='ENTREGUE', criado_em__gte=desde)
+            .annotate(recebido_em=Min('movimentos__criado_em', filter=recebimento))
+            .values_list('item_id', 'criado_em', 'recebido_em', 'entrega_prevista')
+        )
+        linhas.extend(entregues.iterator(chunk_size=LOTE))
+    fuso = timezone.get_current_timezone()
+
+    def fim(recebido_em, prevista):
+        if recebido_em is not None:
+            return recebido_em.timestamp()
+        if prevista is not None:
+            return datetime.combine(prevista, time(), fuso).timestamp()
+        return math.nan
+
+    itens = np.fromiter((linha[0] for linha in linhas), dtype=np.int64, count=len(linhas))
+    inicio = np.fromiter((linha[1].timestamp() for linha in linhas), dtype=float, count=len(linhas))
+    termino = np.fromiter((fim(*linha[2:]) for linha in linhas), dtype=float, count=len(linhas))
+    dias = (termino - inicio) / 86400
+    validos = ~np.isnan(dias)
+    return itens[validos], np.maximum(dias[validos], 0)
+
+
+def recalcular(agora=None):
+    """Recalcula e regrava a previsão de todos os itens. Devolve quantos têm previsão."""
+    if np is None:
+        raise RuntimeError('A previsão de demanda precisa do NumPy (pip install numpy).')
+    agora = agora or timezone.now()
+    janela = _config('JANELA', 90)
+    atuais = list(Item.objects.order_by('pk').values_list('pk', 'ponto_pedido').iterator(chunk_size=LOTE))
+    ids = np.fromiter((pk for pk, _ in atuais), dtype=np.int64, count=len(atuais))
+    pontos_atuais = np.fromiter((ponto for _, ponto in atuais), dtype=np.int64, count=len(atuais))
+    consumo_itens, consumo_dias = _consumo(timezone.localdate(agora), janela)
+    lead_itens, lead_dias = _lead_times(agora)
+    resultado = estimar(
+        ids, consumo_itens, consumo_dias, lead_itens, lead_dias, janela,
+        z=_config('NIVEL_SERVICO', 1.65), lead_padrao=_config('LEAD_TIME_PADRAO', 7.0),
+        cobertura=_config('COBERTURA', 30),
+    )
+
+    selecionados = resultado['com_historico']
+    pontos = np.where(selecionados, resultado['ponto_pedido'], LIMITE_SEM_PREVISAO).astype(np.int64)
+    mudaram = pontos != pontos_atuais
+    alterados = [
+        Item(pk=pk, ponto_pedido=ponto) for pk, ponto in zip(ids[mudaram].tolist(), pontos[mudaram].tolist())
+    ]
+    colunas = [resultado[campo][selecionados].tolist() for campo in (
+        'consumo_diario', 'lead_time_dias', 'estoque_seguranca', 'ponto_pedido', 'lote_reposicao',
+    )]
+    previsoes = [
+        PrevisaoItem(
+            item_id=item_id, consumo_diario=consumo, lead_time_dias=lead, estoque_seguranca=int(seguranca),
+            ponto_pedido=int(ponto), lote_reposicao=int(lote), calculado_em=agora,
+        )
+        for item_id, consumo, lead, seguranca, ponto, lote in zip(ids[selecionados].tolist(), *colunas)
+    ]
+    with transaction.atomic():
+        # Sem receptores nem relações reversas: delete() vira um único DELETE.
+        PrevisaoItem.objects.all().delete()
+        PrevisaoItem.objects.bulk_create(previsoes, batch_size=LOTE)
+        # Só os itens cujo ponto mudou; atualizado_em fica: é dado derivado.
+        Item.objects.bulk_update(alterados, ['ponto_pedido'], batch_size=LOTE)
+        caching.invalidar_no_commit('core.previsaoitem')
+        if alterados:
+            caching.invalidar_no_commit('core.item')
+    return len(previsoes)
+
+
+def a_repor(itens=None):
+    """Itens no ou abaixo do ponto de pedido."""
+    return (Item.objects.all() if itens is None else itens).filter(quantidade__lte=F('ponto_pedido'))
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import roteamento
+from .models import Fornecedor, Item, Pedido, ResumoDashboard
+
+# Resumo materializado do painel: uma única linha com os contadores, ajustada
+# por deltas nos sinais de Item, Fornecedor e Pedido. `reconciliar` recalcula
+# tudo do zero (após bulk_create/update, que não disparam sinais).
+
+LIMITE_BAIXO_ESTOQUE = 5
+RESUMO_PK = 1
+
+
+def calcular():
+    return {
+        'total_itens': Item.objects.count(),
+        'itens_baixo_estoque': Item.objects.filter(quantidade__lte=LIMITE_BAIXO_ESTOQUE).count(),
+        'total_fornecedores': Fornecedor.objects.count(),
+        'pedidos_pendentes': Pedido.objects.filter(status='PENDENTE').count(),
+        'valor_total': Item.objects.aggregate(total=Sum('valor'))['total'] or 0,
+    }
+
+
+def reconciliar():
+    # Conta no principal mesmo quando chamado de uma view em réplica.
+    with roteamento.primario(), transaction.atomic():
+        resumo, _ = ResumoDashboard.objects.update_or_create(pk=RESUMO_PK, defaults=calcular())
+    return resumo
+
+
+def obter():
+    resumo = ResumoDashboard.objects.filter(pk=RESUMO_PK).first()
+    if resumo is None:
+        resumo = reconciliar()
+    return resumo
+
+
+def ajustar(**deltas):
+    deltas = {campo: delta for campo, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    atualizados = ResumoDashboard.objects.filter(pk=RESUMO_PK).update(
+        atualizado_em=timezone.now(),
+        **{campo: F(campo) + delta for campo, delta in deltas.items()},
+    )
+    if not atualizados:
+        # Primeira escrita: o estado atual do banco já inclui esta alteração.
+        reconciliar()
+
+
+def estado_item(item):
+    """Contribuição de um item para os contadores (usada para calcular deltas)."""
+    if item is None or item.pk is None:
+        return (0, 0, Decimal('0'))
+    return (
+        1,
+        1 if item.quantidade is not None and item.quantidade <= LIMITE_BAIXO_ESTOQUE else 0,
+        Decimal(str(item.valor or 0)),
+    )
+
+
+def item_alterado(antes, depois):
+    total_antes, baixo_antes, valor_antes = antes
+    total_depois, baixo_depois, valor_depois = depois
+    ajustar(
+        total_itens=total_depois - total_antes,
+        itens_baixo_estoque=baixo_depois - baixo_antes,
+        valor_total=valor_depois - valor_antes,
+    )
+
+
+def pedido_alterado(status_antes, status_depois):
+    ajustar(pedidos_pendentes=(status_depois == 'PENDENTE') - (status_antes == 'PENDENTE'))
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Pedido, PedidoArquivado, ResumoMensalPedidos
+
+# Séries mensais de pedidos para os gráficos do painel. Cada pedido contribui
+# com (1 pedido, `quantidade` unidades) na linha (mês de criação, fornecedor,
+# status) e na linha de total do mês (fornecedor nulo). Os sinais aplicam a
+# diferença entre a contribuição antiga e a nova; `reconstruir` refaz tudo a
+# partir de Pedido e PedidoArquivado (após bulk_create/update, que não disparam
+# sinais). Arquivar um pedido não muda as séries: ele continua contando.
+
+LOTE = 2000
+
+
+def mes_de(momento):
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    return momento.date().replace(day=1)
+
+
+def contribuicao(criado_em, fornecedor_id, status, quantidade):
+    """Chave e valores de um pedido, no formato aceito por `aplicar`."""
+    return (mes_de(criado_em), fornecedor_id, status), (1, quantidade)
+
+
+def diferenca(antes, depois):
+    """Deltas para trocar a contribuição `antes` pela `depois` (qualquer uma pode ser None)."""
+    deltas = defaultdict(lambda: [0, 0])
+    for sinal, parcela in ((-1, antes), (1, depois)):
+        if parcela is not None:
+            chave, (pedidos, unidades) = parcela
+            deltas[chave][0] += sinal * pedidos
+            deltas[chave][1] += sinal * unidades
+    return deltas
+
+
+def aplicar(deltas):
+    """
+    Soma `deltas` ({(mes, fornecedor_id, status): [pedidos, unidades]}) nas
+    linhas de cada fornecedor e nas de total do mês.
+    """
+    completos = defaultdict(lambda: [0, 0])
+    for (mes, fornecedor_id, status), (pedidos, unidades) in deltas.items():
+        for chave in ((mes, fornecedor_id, status), (mes, None, status)):
+            completos[chave][0] += pedidos
+            completos[chave][1] += unidades
+
+    for (mes, fornecedor_id, status), (pedidos, unidades) in sorted(
+        completos.items(), key=lambda par: (par[0][0], par[0][1] or 0, par[0][2]),
+    ):
+        if not pedidos and not unidades:
+            continue
+        linhas = ResumoMensalPedidos.objects.filter(mes=mes, fornecedor_id=fornecedor_id, status=status)
+        incremento = {'pedidos': F('pedidos') + pedidos, 'unidades': F('unidades') + unidades}
+        if linhas.update(**incremento):
+            continue
+        try:
+            with transaction.atomic():
+                ResumoMensalPedidos.objects.create(
+                    mes=mes, fornecedor_id=fornecedor_id, status=status, pedidos=pedidos, unidades=unidades,
+                )
+        except IntegrityError:
+            # Outra transação criou a linha entre o UPDATE e o INSERT.
+            linhas.update(**incremento)
+
+
+def reconstruir():
+    """Recalcula todas as linhas a partir dos pedidos, arquivados inclusive. Devolve quantas foram gravadas."""
+    por_mes = TruncMonth('criado_em', output_field=DateField())
+    somas = defaultdict(lambda: [0, 0])
+    for model in (Pedido, PedidoArquivado):
+        for agrupamento in (('mes', 'fornecedor', 'status'), ('mes', 'status')):
+            consulta = (
+                model.objects.order_by().annotate(mes=por_mes)
+                .values(*agrupamento).annotate(pedidos=Count('pk'), unidades=Sum('quantidade'))
+            )
+            for linha in consulta.iterator(chunk_size=LOTE):
+                chave = (linha['mes'], linha.get('fornecedor'), linha['status'])
+                somas[chave][0] += linha['pedidos']
+                somas[chave][1] += linha['unidades'] or 0
+    with transaction.atomic():
+        ResumoMensalPedidos.objects.all().delete()
+        linhas = [
+            ResumoMensalPedidos(mes=mes, fornecedor_id=fornecedor_id, status=status, pedidos=pedidos, unidades=unidades)
+            for (mes, fornecedor_id, status), (pedidos, unidades) in somas.items()
+        ]
+        ResumoMensalPedidos.objects.bulk_create(linhas, batch_size=LOTE)
+    return len(linhas)
+
+
+def meses(quantidade, hoje=None):
+    """Primeiro dia de cada um dos últimos `quantidade` meses, do mais antigo ao atual."""
+    atual = (hoje or timezone.localdate()).replace(day=1)
+    indice = atual.year * 12 + atual.month - 1
+    return [
+        date((indice - deslocamento) // 12, (indice - deslocamento) % 12 + 1, 1)
+        for deslocamento in range(quantidade - 1, -1, -1)
+    ]
+
+
+def serie(quantidade=6, hoje=None):
+    """
+    Lista de (mes, {status: (pedidos, unidades)}) dos últimos meses, lida só
+    das linhas de total: no máximo `quantidade` x nº de status linhas.
+    """
+    periodo = meses(quantidade, hoje)
+    dados = {mes: {} for mes in periodo}
+    linhas = ResumoMensalPedidos.objects.filter(fornecedor__isnull=True, mes__gte=periodo[0], mes__lte=periodo[-1])
+    for mes, status, pedidos, unidades in linhas.values_list('mes', 'status', 'pedidos', 'unidades'):
+        dados[mes][status] = (pedidos, unidades)
+    return list(dados.items())
+
+
+def total(por_status, *status, campo='pedidos'):
+    """Soma `campo` ('pedidos' ou 'unidades') dos `status` (todos, se omitidos)."""
+    indice = 0 if campo == 'pedidos' else 1
+    return sum(valores[indice] for chave, valores in por_status.items() if not status or chave in status)
@@ -0,0 +1,133 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .caching import CHAVE_ESCRITA_SESSAO
+
+# Réplicas de leitura. Só as views marcadas com @leitura_em_replica (listas,
+# painel, exportações e API) leem de uma réplica de ESTOQUE_REPLICAS; todo o
+# resto, e toda escrita, vai para o banco principal. Para ler as próprias
+# escritas apesar do atraso da réplica, a requisição volta ao principal:
+#
+# - em métodos que não são GET/HEAD;
+# - se a sessão escreveu há menos de ESTOQUE_REPLICA_ATRASO segundos (instante
+#   gravado pelo CacheEscritaMiddleware, ver core/caching.py);
+# - depois da primeira escrita feita na própria requisição;
+# - em primario(), usado pelo cache e pela API para não guardar dados
+#   defasados sob a versão nova de uma tabela recém-alterada.
+#
+# Leituras para escrita (select_for_update, get_or_create) já passam por
+# db_for_write. Sessão e usuário são sempre lidos do principal.
+
+METODOS_LEITURA = ('GET', 'HEAD')
+SEMPRE_NO_PRIMARIO = {'sessions.session', settings.AUTH_USER_MODEL.lower()}
+
+
+class _Estado:
+    def __init__(self, replica):
+        self.replica = replica
+        self.primario = False
+        self.escreveu = False
+
+
+_estado = contextvars.ContextVar('roteamento_estado', default=None)
+
+
+def replicas():
+    return getattr(settings, 'ESTOQUE_REPLICAS', [])
+
+
+def _atraso():
+    return getattr(settings, 'ESTOQUE_REPLICA_ATRASO', 5)
+
+
+def _recente(instante_ns):
+    return time.time_ns() - instante_ns < _atraso() * 1e9
+
+
+def escrita_recente(request):
+    return _recente(request.session.get(CHAVE_ESCRITA_SESSAO, 0))
+
+
+def alias_leitura():
+    """Banco que as leituras da requisição atual usam agora."""
+    estado = _estado.get()
+    if estado is None or estado.primario or estado.escreveu:
+        return DEFAULT_DB_ALIAS
+    return estado.replica
+
+
+@contextmanager
+def primario():
+    """Força o banco principal para as leituras do bloco."""
+    estado = _estado.get()
+    if estado is None or estado.primario:
+        yield
+        return
+    estado.primario = True
+    try:
+        yield
+    finally:
+        estado.primario = False
+
+
+def primario_se_alterado(versoes):
+    """primario() se alguma das versões (core/caching.py) mudou dentro do atraso."""
+    return primario() if versoes and _recente(max(versoes)) else nullcontext()
+
+
+@contextmanager
+def _em_replica(replica):
+    token = _estado.set(_Estado(replica))
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+def _fluxo_em_replica(conteudo, replica):
+    # Respostas em fluxo (exportações) leem o banco depois que a view retorna.
+    with _em_replica(replica):
+        yield from conteudo
+
+
+def leitura_em_replica(view):
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        disponiveis = replicas()
+        if not disponiveis or request.method not in METODOS_LEITURA or escrita_recente(request):
+            return view(request, *args, **kwargs)
+        replica = random.choice(disponiveis)
+        with _em_replica(replica):
+            response = view(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = _fluxo_em_replica(response.streaming_content, replica)
+        return response
+    return _view
+
+
+class RoteadorReplicas:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in SEMPRE_NO_PRIMARIO:
+            return DEFAULT_DB_ALIAS
+        return alias_leitura()
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            # Leituras seguintes da requisição precisam ver esta escrita.
+            estado.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, *replicas()}
+        return obj1._state.db in bancos and obj2._state.db in bancos
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas são cópias do principal; o esquema chega com os dados.
+        return db not in replicas()
@@ -0,0 +1,107 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Índice de busca textual. No SQLite cada modelo ganha uma tabela FTS5 "sombra"
+# (rowid = pk do registro) mantida pelos sinais de save/delete; em outros bancos
+# a busca cai no icontains de sempre.
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+INDICES = {
+    'core.item': ('core_item_busca', ('nome',)),
+    'core.fornecedor': ('core_fornecedor_busca', ('nome',)),
+    'core.loja': ('core_loja_busca', ('nome', 'responsavel', 'cidade')),
+}
+
+
+def fts_disponivel(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def criar_tabelas(conn):
+    with conn.cursor() as cursor:
+        for tabela, campos in INDICES.values():
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabela} USING fts5("
+                f"{', '.join(campos)}, tokenize='{TOKENIZER}', prefix='2 3')"
+            )
+
+
+def remover_tabelas(conn):
+    with conn.cursor() as cursor:
+        for tabela, _ in INDICES.values():
+            cursor.execute(f"DROP TABLE IF EXISTS {tabela}")
+
+
+def _indice(model):
+    return INDICES.get(model._meta.label_lower)
+
+
+def indexar(model, objetos):
+    """Insere ou substitui os registros de `objetos` no índice do modelo."""
+    indice = _indice(model)
+    if indice is None or not fts_disponivel():
+        return
+    tabela, campos = indice
+    linhas = [
+        [obj.pk] + [getattr(obj, campo) or '' for campo in campos]
+        for obj in objetos
+    ]
+    if not linhas:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {tabela} WHERE rowid = %s", [[linha[0]] for linha in linhas])
+        cursor.executemany(
+            f"INSERT INTO {tabela}(rowid, {', '.join(campos)}) "
+            f"VALUES ({', '.join(['%s'] * (len(campos) + 1))})",
+            linhas,
+        )
+
+
+def desindexar(model, pks):
+    indice = _indice(model)
+    if indice is None or not fts_disponivel():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {indice[0]} WHERE rowid = %s", [[pk] for pk in pks])
+
+
+def reconstruir(model):
+    """Recria o índice do modelo a partir da tabela principal. Retorna o total indexado."""
+    indice = _indice(model)
+    if indice is None or not fts_disponivel():
+        return 0
+    tabela, campos = indice
+    colunas = ', '.join(f"COALESCE({campo}, '')" for campo in campos)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {tabela}")
+        cursor.execute(
+            f"INSERT INTO {tabela}(rowid, {', '.join(campos)}) "
+            f"SELECT {model._meta.pk.column}, {colunas} FROM {model._meta.db_table}"
+        )
+    return model.objects.count()
+
+
+def expressao(termo):
+    """Converte o texto digitado em uma consulta FTS5 por prefixo (todas as palavras)."""
+    palavras = re.findall(r'\w+', termo or '')
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+def buscar(queryset, termo):
+    """Filtra `queryset` pelo texto `termo` usando o índice do modelo."""
+    model = queryset.model
+    tabela, campos = _indice(model)
+    consulta = expressao(termo)
+    if not consulta:
+        return queryset
+    if not fts_disponivel():
+        return queryset.filter(reduce(or_, (Q(**{f'{campo}__icontains': termo}) for campo in campos)))
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {tabela} WHERE {tabela} MATCH %s", [consulta])
+    )
@@ -0,0 +1,206 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import auditoria, autenticacao, caching, estoque, resumo, resumo_mensal, search, sincronizacao
+from .models import Atribuicao, Fornecedor, Item, Loja, Pedido, Usuario
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Fornecedor)
+@receiver(post_save, sender=Loja)
+def atualizar_indice_busca(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.indexar(sender, [instance])
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Fornecedor)
+@receiver(post_delete, sender=Loja)
+def remover_indice_busca(sender, instance, **kwargs):
+    search.desindexar(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Fornecedor)
+@receiver(post_delete, sender=Loja)
+def registrar_exclusao(sender, instance, **kwargs):
+    sincronizacao.registrar_exclusoes(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Fornecedor)
+@receiver(post_save, sender=Loja)
+@receiver(post_save, sender=Pedido)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Fornecedor)
+@receiver(post_delete, sender=Loja)
+@receiver(post_delete, sender=Pedido)
+def invalidar_cache(sender, **kwargs):
+    caching.invalidar_no_commit(sender._meta.label_lower)
+
+
+# --- Resumo do painel ---
+# O estado carregado do banco fica guardado na instância para que o save
+# calcule o delta sem reler a linha.
+
+@receiver(post_init, sender=Item)
+def guardar_estado_item(sender, instance, **kwargs):
+    if instance.get_deferred_fields() & {'quantidade', 'valor'}:
+        instance._resumo_estado = None
+    else:
+        instance._resumo_estado = resumo.estado_item(instance)
+
+
+@receiver(pre_save, sender=Item)
+def carregar_estado_item(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, '_resumo_estado', None) is None:
+        original = Item.objects.filter(pk=instance.pk).only('quantidade', 'valor').first() if instance.pk else None
+        instance._resumo_estado = resumo.estado_item(original)
+
+
+@receiver(post_save, sender=Item)
+def resumo_item_salvo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    novo = resumo.estado_item(instance)
+    resumo.item_alterado(instance._resumo_estado, novo)
+    instance._resumo_estado = novo
+
+
+@receiver(post_delete, sender=Item)
+def resumo_item_removido(sender, instance, **kwargs):
+    antes = getattr(instance, '_resumo_estado', None) or resumo.estado_item(instance)
+    resumo.item_alterado(antes, resumo.estado_item(None))
+
+
+# O estado original do pedido (_status_original, usado pelo resumo e pelo
+# estoque, e _mensal_original, pelas séries mensais) só é atualizado no último
+# receptor deste arquivo.
+
+CAMPOS_MENSAL = ('criado_em', 'fornecedor_id', 'status', 'quantidade')
+
+
+def _contribuicao_mensal(valores):
+    return resumo_mensal.contribuicao(*valores) if valores else None
+
+
+@receiver(post_init, sender=Pedido)
+def guardar_estado_pedido(sender, instance, **kwargs):
+    deferidos = instance.get_deferred_fields()
+    novo = instance.pk is None
+    instance._status_original = None if novo or 'status' in deferidos else instance.status
+    instance._mensal_original = (
+        None if novo or deferidos & set(CAMPOS_MENSAL)
+        else _contribuicao_mensal([getattr(instance, campo) for campo in CAMPOS_MENSAL])
+    )
+
+
+@receiver(pre_save, sender=Pedido)
+def carregar_estado_pedido(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    if getattr(instance, '_status_original', None) is None or getattr(instance, '_mensal_original', None) is None:
+        valores = Pedido.objects.filter(pk=instance.pk).values_list(*CAMPOS_MENSAL).first()
+        instance._status_original = valores[2] if valores else None
+        instance._mensal_original = _contribuicao_mensal(valores)
+
+
+@receiver(post_save, sender=Pedido)
+def resumo_pedido_salvo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        resumo.pedido_alterado(instance._status_original, instance.status)
+
+
+@receiver(post_delete, sender=Pedido)
+def resumo_pedido_removido(sender, instance, **kwargs):
+    resumo.pedido_alterado(instance.status, None)
+
+
+@receiver(post_save, sender=Pedido)
+def mensal_pedido_salvo(sender, instance, raw=False, **kwargs):
+    if not raw:
+        atual = _contribuicao_mensal([getattr(instance, campo) for campo in CAMPOS_MENSAL])
+        resumo_mensal.aplicar(resumo_mensal.diferenca(instance._mensal_original, atual))
+
+
+@receiver(post_delete, sender=Pedido)
+def mensal_pedido_removido(sender, instance, **kwargs):
+    original = getattr(instance, '_mensal_original', None)
+    if original is None:
+        original = _contribuicao_mensal([getattr(instance, campo) for campo in CAMPOS_MENSAL])
+    resumo_mensal.aplicar(resumo_mensal.diferenca(original, None))
+
+
+@receiver(post_save, sender=Fornecedor)
+def resumo_fornecedor_salvo(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        resumo.ajustar(total_fornecedores=1)
+
+
+@receiver(post_delete, sender=Fornecedor)
+def resumo_fornecedor_removido(sender, instance, **kwargs):
+    resumo.ajustar(total_fornecedores=-1)
+
+
+# --- Movimentos de estoque ---
+
+@receiver(post_save, sender=Item)
+def estoque_saldo_inicial(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.quantidade:
+        estoque.registrar_saldo_inicial(instance)
+
+
+@receiver(post_save, sender=Pedido)
+def estoque_pedido_salvo(sender, instance, raw=False, **kwargs):
+    # Só pedidos que estão ou estavam entregues movimentam estoque.
+    if not raw and 'ENTREGUE' in (instance._status_original, instance.status):
+        estoque.sincronizar_pedido(instance)
+
+
+@receiver(post_save, sender=Atribuicao)
+def estoque_atribuicao_salva(sender, instance, raw=False, **kwargs):
+    if not raw:
+        estoque.sincronizar_atribuicao(instance)
+
+
+# --- Usuário em cache ---
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario(sender, instance, **kwargs):
+    autenticacao.invalidar(instance.pk)
+
+
+# --- Auditoria ---
+
+def auditoria_carregado(sender, instance, **kwargs):
+    auditoria.guardar_estado(instance)
+
+
+def auditoria_salvo(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        auditoria.objeto_salvo(instance, created, update_fields)
+
+
+def auditoria_removido(sender, instance, **kwargs):
+    auditoria.objeto_removido(instance)
+
+
+for _modelo in auditoria.modelos_auditados():
+    post_init.connect(auditoria_carregado, sender=_modelo)
+    post_save.connect(auditoria_salvo, sender=_modelo)
+    post_delete.connect(auditoria_removido, sender=_modelo)
+
+
+@receiver(request_finished)
+def auditoria_fim_requisicao(sender, **kwargs):
+    # Disparado depois que a resposta foi enviada ao cliente.
+    auditoria.acordar()
+
+
+# Deve continuar sendo o último receptor de post_save de Pedido.
+@receiver(post_save, sender=Pedido)
+def atualizar_estado_original(sender, instance, raw=False, **kwargs):
+    instance._status_original = instance.status
+    instance._mensal_original = _contribuicao_mensal([getattr(instance, campo) for campo in CAMPOS_MENSAL])
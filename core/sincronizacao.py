@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, Value
+from django.utils import timezone
+
+from .models import Exclusao
+from .pagination import _codificar, _decodificar
+
+# Feed de mudanças para sincronização incremental. Cada Item, Fornecedor e Loja
+# tem `atualizado_em` e cada exclusão deixa uma lápide (Exclusao); o feed
+# devolve, em ordem de (momento, id), as linhas alteradas e as excluídas depois
+# do token recebido, e um novo token para a próxima chamada.
+#
+# Só entra no feed o que mudou até ESTOQUE_SINCRONIZACAO_MARGEM segundos atrás:
+# uma transação ainda aberta pode gravar um `atualizado_em` anterior ao token
+# já entregue, e a margem dá tempo para que ela confirme antes de ser pulada.
+
+POR_PAGINA = 500
+
+
+def _margem():
+    return getattr(settings, 'ESTOQUE_SINCRONIZACAO_MARGEM', 5)
+
+
+def registrar_exclusoes(model, pks):
+    Exclusao.objects.bulk_create([
+        Exclusao(modelo=model._meta.label_lower, objeto_id=pk) for pk in pks
+    ])
+
+
+def _posicao(token):
+    """(momento, id) codificados no token; None para começar do início."""
+    if not token:
+        return None
+    valores, _ = _decodificar(token)
+    try:
+        momento, ident = valores
+        momento = Exclusao._meta.get_field('excluido_em').to_python(momento)
+        return (momento, int(ident)) if momento is not None else None
+    except (TypeError, ValueError, ValidationError):
+        return None
+
+
+def _depois(posicao):
+    if posicao is None:
+        return Q()
+    momento, ident = posicao
+    return Q(momento__gt=momento) | Q(momento=momento, ident__gt=ident)
+
+
+def mudancas(model, campos, token=None, por_pagina=POR_PAGINA):
+    """
+    Devolve (linhas, excluidos, proximo_token, tem_mais): as linhas de `model`
+    (dicts com os `campos`) criadas ou alteradas e os pks excluídos depois de
+    `token`, no máximo `por_pagina` no total.
+    """
+    posicao = _posicao(token)
+    ate = timezone.now() - timedelta(seconds=_margem())
+    filtro = _depois(posicao) & Q(momento__lte=ate)
+    vivos = (
+        model.objects.order_by()
+        .annotate(momento=F('atualizado_em'), ident=F('pk'), excluido=Value(False))
+        .filter(filtro).values_list('momento', 'ident', 'excluido')
+    )
+    mortos = (
+        Exclusao.objects.order_by().filter(modelo=model._meta.label_lower)
+        .annotate(momento=F('excluido_em'), ident=F('objeto_id'), excluido=Value(True))
+        .filter(filtro).values_list('momento', 'ident', 'excluido')
+    )
+    eventos = list(vivos.union(mortos, all=True).order_by('momento', 'ident')[:por_pagina + 1])
+    tem_mais = len(eventos) > por_pagina
+    eventos = eventos[:por_pagina]
+
+    alterados = [ident for _, ident, excluido in eventos if not excluido]
+    por_pk = {linha['id']: linha for linha in model.objects.filter(pk__in=alterados).values('id', *campos)}
+    # Excluída entre as duas consultas: a lápide vem numa chamada seguinte.
+    linhas = [por_pk[pk] for pk in alterados if pk in por_pk]
+    excluidos = [ident for _, ident, excluido in eventos if excluido]
+
+    if eventos:
+        momento, ident, _ = eventos[-1]
+        proximo = _codificar([momento, ident], 'n')
+    else:
+        proximo = token or ''
+    return linhas, excluidos, proximo, tem_mais
@@ -0,0 +1,64 @@
+// Busca incremental para selects com data-autocomplete-url: em vez de trazer
+// todas as opções no HTML, consulta o endpoint JSON conforme o usuário digita.
+(function () {
+  function iniciar(select) {
+    var url = select.dataset.autocompleteUrl;
+    var vazio = select.options.length ? select.options[0].cloneNode(true) : null;
+    var busca = document.createElement('input');
+    busca.type = 'search';
+    busca.placeholder = 'Digite para buscar';
+    busca.className = 'autocomplete__busca';
+    select.parentNode.insertBefore(busca, select);
+
+    var proximo = null;
+    var timer = null;
+
+    function carregar(termo, cursor) {
+      var params = new URLSearchParams({ q: termo });
+      if (cursor) params.set('cursor', cursor);
+      fetch(url + '?' + params.toString(), { credentials: 'same-origin' })
+        .then(function (resposta) { return resposta.json(); })
+        .then(function (dados) {
+          var selecionado = select.value;
+          if (!cursor) {
+            Array.prototype.slice.call(select.options).forEach(function (opcao) {
+              if (opcao.value && opcao.value !== selecionado) opcao.remove();
+            });
+            var mais = select.querySelector('option[data-mais]');
+            if (mais) mais.remove();
+          } else {
+            select.querySelector('option[data-mais]').remove();
+          }
+          dados.results.forEach(function (resultado) {
+            if (String(resultado.id) === selecionado) return;
+            select.appendChild(new Option(resultado.text, resultado.id));
+          });
+          proximo = dados.next;
+          if (proximo) {
+            var opcaoMais = new Option('Carregar mais…', '');
+            opcaoMais.dataset.mais = '1';
+            select.appendChild(opcaoMais);
+          }
+        });
+    }
+
+    busca.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { carregar(busca.value, null); }, 200);
+    });
+
+    select.addEventListener('change', function () {
+      var escolhida = select.options[select.selectedIndex];
+      if (escolhida && escolhida.dataset.mais) {
+        select.value = vazio ? vazio.value : '';
+        carregar(busca.value, proximo);
+      }
+    });
+
+    select.addEventListener('focus', function () {
+      if (select.options.length <= 2) carregar(busca.value, null);
+    }, { once: true });
+  }
+
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(iniciar);
+})();
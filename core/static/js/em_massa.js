@@ -0,0 +1,21 @@
+// Checkbox do cabeçalho marca/desmarca todas as linhas da página e a exclusão
+// em massa pede confirmação antes de enviar.
+(function () {
+  var form = document.getElementById('acoes-em-massa');
+  if (!form) return;
+
+  var todos = document.querySelector('[data-selecionar-todos]');
+  if (todos) {
+    todos.addEventListener('change', function () {
+      document.querySelectorAll('input[name="selecionados"][form="acoes-em-massa"]').forEach(function (caixa) {
+        caixa.checked = todos.checked;
+      });
+    });
+  }
+
+  form.addEventListener('submit', function (evento) {
+    if (form.elements.acao.value === 'excluir' && !window.confirm('Excluir os registros selecionados?')) {
+      evento.preventDefault();
+    }
+  });
+})();
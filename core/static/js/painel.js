@@ -0,0 +1,50 @@
+// Painel ao vivo: recebe por server-sent events os valores que mudaram
+// ({chave: valor}, ver core/painel.py) e atualiza os cards marcados com
+// data-contador e a lista de estoque baixo, sem recarregar a página.
+(function () {
+  var raiz = document.querySelector('[data-painel-eventos]');
+  if (!raiz || !window.EventSource) return;
+
+  function estoqueBaixo(itens) {
+    var lista = document.querySelector('[data-estoque-baixo]');
+    if (!lista) return;
+    lista.textContent = '';
+    if (!itens.length) {
+      var vazio = document.createElement('p');
+      vazio.textContent = 'Sem itens em baixa quantidade.';
+      lista.appendChild(vazio);
+      return;
+    }
+    itens.forEach(function (item) {
+      var card = document.createElement('div');
+      card.className = 'low-stock-card';
+      var texto = document.createElement('div');
+      var nome = document.createElement('strong');
+      nome.textContent = item.nome;
+      var restante = document.createElement('p');
+      restante.textContent = 'Quantidade restante: ' + item.quantidade + ' · ponto de pedido ' + item.ponto_pedido;
+      texto.appendChild(nome);
+      texto.appendChild(restante);
+      var selo = document.createElement('span');
+      selo.className = 'status status--warning';
+      selo.textContent = 'Baixo';
+      card.appendChild(texto);
+      card.appendChild(selo);
+      lista.appendChild(card);
+    });
+  }
+
+  var fonte = new EventSource(raiz.getAttribute('data-painel-eventos'));
+  fonte.addEventListener('contadores', function (evento) {
+    var valores = JSON.parse(evento.data);
+    Object.keys(valores).forEach(function (chave) {
+      if (chave === 'estoque_baixo') {
+        estoqueBaixo(valores[chave]);
+        return;
+      }
+      document.querySelectorAll('[data-contador="' + chave + '"]').forEach(function (elemento) {
+        elemento.textContent = valores[chave];
+      });
+    });
+  });
+})();
@@ -0,0 +1,30 @@
+// Página de uma tarefa: consulta o status a cada 2 s e atualiza a barra de
+// progresso; quando a tarefa termina, recarrega para mostrar o resultado.
+(function () {
+  var painel = document.querySelector('[data-tarefa-status]');
+  if (!painel || painel.hasAttribute('data-tarefa-finalizada')) return;
+
+  var rotulos = {PENDENTE: 'Pendente', EXECUTANDO: 'Executando', CONCLUIDA: 'Concluída', FALHOU: 'Falhou'};
+
+  function campo(nome) {
+    return painel.querySelector('[data-tarefa-campo="' + nome + '"]');
+  }
+
+  function consultar() {
+    fetch(painel.getAttribute('data-tarefa-status'), {credentials: 'same-origin'})
+      .then(function (resposta) { return resposta.json(); })
+      .then(function (tarefa) {
+        if (tarefa.status === 'CONCLUIDA' || tarefa.status === 'FALHOU') {
+          window.location.reload();
+          return;
+        }
+        campo('status').textContent = rotulos[tarefa.status] || tarefa.status;
+        campo('progresso').value = tarefa.progresso;
+        campo('mensagem').textContent = tarefa.mensagem;
+        window.setTimeout(consultar, 2000);
+      })
+      .catch(function () { window.setTimeout(consultar, 5000); });
+  }
+
+  window.setTimeout(consultar, 2000);
+})();
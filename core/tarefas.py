@@ -0,0 +1,257 @@
+import io
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from . import arquivamento, auditoria, estoque, importacao, previsao, resumo_mensal, search
+from .models import Fornecedor, Item, Loja, Tarefa
+
+# Tarefas em segundo plano sem broker externo. A view grava uma linha em
+# Tarefa (enfileirar) e responde na hora; o comando processar_tarefas reserva
+# as pendentes com um UPDATE condicional (só um trabalhador vence, em qualquer
+# banco) e as executa num pool de threads. A função da tarefa recebe a linha e
+# um Progresso, que grava o andamento. Enquanto a função roda, uma thread de
+# batimento toca `atualizado_em`: uma tarefa em execução sem batimento há
+# ESTOQUE_TAREFAS_EXPIRAR segundos é de um trabalhador que morreu e volta para
+# a fila. Toda escrita do trabalhador é condicionada à sua reserva (_reserva),
+# então uma execução que perdeu a tarefa não sobrescreve a de quem a pegou.
+#
+# Entradas grandes (o CSV de uma importação) não vão para o banco: ficam em
+# default_storage, com o nome em parametros['arquivo'], e são apagadas quando
+# a tarefa conclui ou falha de vez.
+#
+# Falhas são repetidas até `max_tentativas`, com espera que dobra a cada
+# tentativa a partir de ESTOQUE_TAREFAS_RETENTATIVA segundos.
+
+logger = logging.getLogger('core.tarefas')
+
+FINALIZADOS = ('CONCLUIDA', 'FALHOU')
+MAX_ERROS_RESULTADO = 100
+
+# tipo: (função, max_tentativas)
+TIPOS = {}
+# Tipos que a tela de tarefas deixa a equipe enfileirar: tipo -> rótulo.
+MANUTENCAO = {}
+
+
+def tarefa(tipo, max_tentativas=3, manutencao=None):
+    """Registra a função `f(tarefa, progresso)` como executora de `tipo`."""
+    def registrar(funcao):
+        TIPOS[tipo] = (funcao, max_tentativas)
+        if manutencao:
+            MANUTENCAO[tipo] = manutencao
+        return funcao
+    return registrar
+
+
+def _expirar():
+    return getattr(settings, 'ESTOQUE_TAREFAS_EXPIRAR', 600)
+
+
+def _retentativa():
+    return getattr(settings, 'ESTOQUE_TAREFAS_RETENTATIVA', 30)
+
+
+def _reserva(tarefa):
+    """A linha da tarefa enquanto ela ainda for desta execução (mesmo trabalhador e tentativa)."""
+    return Tarefa.objects.filter(
+        pk=tarefa.pk, status='EXECUTANDO', trabalhador=tarefa.trabalhador, tentativas=tarefa.tentativas,
+    )
+
+
+def _bater(tarefa):
+    return bool(_reserva(tarefa).update(atualizado_em=timezone.now()))
+
+
+class Batimento(threading.Thread):
+    """Marca a tarefa como viva a cada terço de ESTOQUE_TAREFAS_EXPIRAR até `parar`."""
+
+    def __init__(self, tarefa):
+        super().__init__(name=f'batimento-{tarefa.pk}', daemon=True)
+        self.tarefa = tarefa
+        self.parado = threading.Event()
+
+    def run(self):
+        try:
+            while not self.parado.wait(_expirar() / 3):
+                if not _bater(self.tarefa):
+                    break
+        except Exception:
+            logger.exception('Falha no batimento da tarefa %s.', self.tarefa.pk)
+        finally:
+            connection.close()
+
+    def parar(self):
+        self.parado.set()
+        self.join()
+
+
+class Progresso:
+    """Grava o andamento (0 a 100) e uma mensagem; só escreve quando mudam."""
+
+    def __init__(self, tarefa):
+        self.tarefa = tarefa
+        self.ultimo = (tarefa.progresso, tarefa.mensagem)
+
+    def __call__(self, percentual, mensagem=''):
+        atual = (max(0, min(100, int(percentual))), mensagem[:255])
+        if atual == self.ultimo:
+            return
+        self.ultimo = atual
+        _reserva(self.tarefa).update(
+            progresso=atual[0], mensagem=atual[1], atualizado_em=timezone.now(),
+        )
+
+
+def enfileirar(tipo, parametros=None, usuario=None, arquivo=None):
+    """Grava a tarefa; `arquivo` (um upload) é salvo em default_storage para o trabalhador."""
+    _, max_tentativas = TIPOS[tipo]
+    parametros = dict(parametros or {})
+    if arquivo is not None:
+        parametros['arquivo'] = default_storage.save(f'tarefas/{tipo}.csv', arquivo)
+    return Tarefa.objects.create(
+        tipo=tipo, parametros=parametros, usuario=usuario, max_tentativas=max_tentativas,
+    )
+
+
+def _descartar_arquivo(parametros):
+    nome = (parametros or {}).get('arquivo')
+    if nome:
+        default_storage.delete(nome)
+
+
+def reservar(trabalhador):
+    """Marca a próxima tarefa pendente como em execução por `trabalhador` e a devolve."""
+    agora = timezone.now()
+    pendentes = (
+        Tarefa.objects.filter(status='PENDENTE', executar_apos__lte=agora)
+        .order_by('executar_apos', 'pk').values_list('pk', flat=True)[:10]
+    )
+    for pk in pendentes:
+        reservada = Tarefa.objects.filter(pk=pk, status='PENDENTE').update(
+            status='EXECUTANDO', trabalhador=trabalhador[:100], tentativas=F('tentativas') + 1,
+            progresso=0, mensagem='', iniciado_em=agora, atualizado_em=agora,
+        )
+        if reservada:
+            return Tarefa.objects.select_related('usuario').get(pk=pk)
+    return None
+
+
+def _falhar(tarefa, erro, definitiva=False):
+    if not definitiva and tarefa.tentativas < tarefa.max_tentativas:
+        espera = _retentativa() * 2 ** (tarefa.tentativas - 1)
+        campos = {'status': 'PENDENTE', 'executar_apos': timezone.now() + timedelta(seconds=espera)}
+    else:
+        campos = {'status': 'FALHOU', 'concluido_em': timezone.now()}
+    if _reserva(tarefa).update(erro=erro, atualizado_em=timezone.now(), **campos) and campos['status'] == 'FALHOU':
+        _descartar_arquivo(tarefa.parametros)
+
+
+def executar(tarefa):
+    """Executa uma tarefa já reservada e grava o resultado ou a falha."""
+    funcao, _ = TIPOS.get(tarefa.tipo, (None, 0))
+    if funcao is None:
+        _falhar(tarefa, f'Tipo de tarefa desconhecido: {tarefa.tipo}', definitiva=True)
+        return
+    # A auditoria atribui ao dono da tarefa o que ela alterar.
+    token = auditoria.definir_requisicao(SimpleNamespace(user=tarefa.usuario))
+    batimento = Batimento(tarefa)
+    batimento.start()
+    try:
+        resultado = funcao(tarefa, Progresso(tarefa))
+    except Exception:
+        logger.exception('Tarefa %s (%s) falhou na tentativa %d.', tarefa.pk, tarefa.tipo, tarefa.tentativas)
+        _falhar(tarefa, traceback.format_exc())
+    else:
+        agora = timezone.now()
+        concluida = _reserva(tarefa).update(
+            status='CONCLUIDA', progresso=100, resultado=resultado, erro='',
+            concluido_em=agora, atualizado_em=agora,
+        )
+        if concluida:
+            _descartar_arquivo(tarefa.parametros)
+    finally:
+        batimento.parar()
+        auditoria.restaurar_requisicao(token)
+        auditoria.acordar()
+
+
+def recuperar_expiradas():
+    """Devolve à fila (ou encerra) tarefas de trabalhadores que pararam de responder."""
+    limite = timezone.now() - timedelta(seconds=_expirar())
+    presas = Tarefa.objects.filter(status='EXECUTANDO', atualizado_em__lt=limite)
+    erro = 'O trabalhador parou de responder durante a execução.'
+    esgotadas = presas.filter(tentativas__gte=F('max_tentativas'))
+    encerradas = 0
+    for pk, parametros in esgotadas.values_list('pk', 'parametros'):
+        if esgotadas.filter(pk=pk).update(
+            status='FALHOU', erro=erro, concluido_em=timezone.now(), atualizado_em=timezone.now(),
+        ):
+            encerradas += 1
+            _descartar_arquivo(parametros)
+    return encerradas + presas.update(status='PENDENTE', erro=erro, atualizado_em=timezone.now())
+
+
+# --- Tipos de tarefa ---
+
+# Sem nova tentativa: cada lote já importado foi confirmado e seria duplicado.
+@tarefa('importar_csv', max_tentativas=1)
+def _importar_csv(tarefa, progresso):
+    # Lido em fluxo; o andamento é a posição no arquivo, em bytes.
+    nome = tarefa.parametros['arquivo']
+    total = max(1, default_storage.size(nome))
+    with default_storage.open(nome, 'rb') as bruto:
+        resultado = importacao.importar(
+            tarefa.parametros['tipo'],
+            importacao.ler_csv(io.TextIOWrapper(bruto, encoding='utf-8-sig', newline='')),
+            ao_lote=lambda lidas: progresso(bruto.tell() * 100 / total, f'{lidas} linhas processadas'),
+            max_erros=MAX_ERROS_RESULTADO,
+        )
+    return {'importados': resultado.importados, 'total_erros': resultado.total_erros, 'erros': resultado.erros}
+
+
+@tarefa('reconstruir_resumo_mensal', manutencao='Reconstruir séries mensais de pedidos')
+def _reconstruir_resumo_mensal(tarefa, progresso):
+    return {'linhas': resumo_mensal.reconstruir()}
+
+
+@tarefa('reconciliar_estoque', manutencao='Reconciliar estoque com o livro de movimentos')
+def _reconciliar_estoque(tarefa, progresso):
+    abertos = estoque.inicializar()
+    progresso(50, f'Saldo inicial lançado para {abertos} itens')
+    return {'saldos_iniciais': abertos, 'corrigidos': estoque.reconciliar()}
+
+
+@tarefa('reindexar_busca', manutencao='Reconstruir o índice de busca')
+def _reindexar_busca(tarefa, progresso):
+    modelos = (Item, Fornecedor, Loja)
+    for feitos, model in enumerate(modelos):
+        progresso(feitos * 100 / len(modelos), f'Indexando {model._meta.verbose_name_plural}')
+        search.reconstruir(model)
+    return {'modelos': len(modelos)}
+
+
+@tarefa('calcular_previsao', manutencao='Recalcular previsão de demanda e pontos de pedido')
+def _calcular_previsao(tarefa, progresso):
+    return {'itens_com_previsao': previsao.recalcular()}
+
+
+@tarefa('arquivar_pedidos', manutencao='Arquivar pedidos fechados antigos')
+def _arquivar_pedidos(tarefa, progresso):
+    dias = tarefa.parametros.get('dias')
+    total = max(1, arquivamento.candidatos(dias).count())
+    arquivados = 0
+    while True:
+        movidos = arquivamento.arquivar_lote(arquivamento.candidatos(dias))
+        arquivados += movidos
+        progresso(arquivados * 100 / total, f'{arquivados} pedidos arquivados')
+        if movidos < arquivamento.LOTE:
+            return {'arquivados': arquivados}
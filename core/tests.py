@@ -1,17 +1,64 @@
+import asyncio
+import gzip
+import importlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import closing
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Sum
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.test import TestCase
+from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 
-from .models import Fornecedor, Item, Pedido
+from . import (
+	arquivamento, auditoria, caching, compras, em_massa, estoque, eventos, importacao, metricas, painel, previsao, resumo,
+	resumo_mensal, roteamento, search, tarefas,
+)
+from .management.commands.sincronizar_replica import copiar
+from .models import (
+	Atribuicao, Fornecedor, Funcionario, HistoricoAuditoria, Item, ItemOrdem, Loja, MovimentoEstoque, OrdemCompra,
+	Pedido, PedidoArquivado, PrevisaoItem, ResumoMensalPedidos, Tarefa,
+)
+from .pagination import contar, paginar
 
 
-class CrudViewsTests(TestCase):
+@override_settings(ESTOQUE_AUDITORIA_INTERVALO=0)
+class LoginTestCase(TestCase):
 	def setUp(self):
+		cache.clear()
+		self.addCleanup(auditoria.limpar)
 		self.user = get_user_model().objects.create_user(
 			username='tester', password='senha-super-secreta'
 		)
 		self.client.force_login(self.user)
 
+
+class CrudViewsTests(LoginTestCase):
 	def test_can_create_fornecedor(self):
 		response = self.client.post(reverse('novo_fornecedor'), {
 			'nome': 'Tech Supply',
@@ -48,3 +95,1297 @@ class CrudViewsTests(TestCase):
 		})
 		self.assertEqual(response.status_code, 302)
 		self.assertEqual(Pedido.objects.count(), 1)
+
+
+class PaginacaoTests(LoginTestCase):
+	def test_keyset_percorre_todas_as_paginas(self):
+		Item.objects.bulk_create([Item(nome=f'Item {i:03d}') for i in range(120)])
+		vistos = []
+		cursor = None
+		while True:
+			pagina = paginar(Item.objects.all(), ('nome', 'pk'), cursor, por_pagina=50)
+			vistos.extend(item.nome for item in pagina)
+			if not pagina.has_next:
+				break
+			cursor = pagina.next_cursor
+		self.assertEqual(vistos, sorted(f'Item {i:03d}' for i in range(120)))
+
+		anterior = paginar(Item.objects.all(), ('nome', 'pk'), pagina.previous_cursor, por_pagina=50)
+		self.assertEqual(anterior.object_list[0].nome, 'Item 050')
+		self.assertTrue(anterior.has_previous)
+
+	def test_contagem_limitada(self):
+		Item.objects.bulk_create([Item(nome=f'Item {i}') for i in range(5)])
+		self.assertEqual(contar(Item.objects.all(), limite=3), '3+')
+		self.assertEqual(contar(Item.objects.all()), 5)
+
+	def test_cursor_invalido_volta_para_primeira_pagina(self):
+		Item.objects.create(nome='Mouse')
+		response = self.client.get(reverse('inventario'), {'cursor': 'lixo'})
+		self.assertEqual(response.status_code, 200)
+		self.assertContains(response, 'Mouse')
+
+	def test_pedidos_paginados_por_data(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		item = Item.objects.create(nome='Teclado')
+		Pedido.objects.bulk_create([Pedido(fornecedor=fornecedor, item=item) for _ in range(60)])
+		response = self.client.get(reverse('pedidos'))
+		self.assertEqual(len(response.context['pedidos']), 50)
+		self.assertTrue(response.context['pagina'].has_next)
+		response = self.client.get(reverse('pedidos'), {'cursor': response.context['pagina'].next_cursor})
+		self.assertEqual(len(response.context['pedidos']), 10)
+
+
+class BuscaTests(LoginTestCase):
+	def test_busca_por_prefixo_sem_acento(self):
+		Item.objects.create(nome='Cabo de Força')
+		Item.objects.create(nome='Monitor')
+		resultado = search.buscar(Item.objects.all(), 'forca')
+		self.assertEqual([item.nome for item in resultado], ['Cabo de Força'])
+		self.assertEqual(search.buscar(Item.objects.all(), 'mon').count(), 1)
+
+	def test_indice_acompanha_edicao_e_exclusao(self):
+		loja = Loja.objects.create(nome='Centro', cidade='São Paulo')
+		self.assertEqual(search.buscar(Loja.objects.all(), 'sao paulo').count(), 1)
+		loja.cidade = 'Campinas'
+		loja.save()
+		self.assertEqual(search.buscar(Loja.objects.all(), 'paulo').count(), 0)
+		self.assertEqual(search.buscar(Loja.objects.all(), 'camp').count(), 1)
+		loja.delete()
+		self.assertEqual(search.buscar(Loja.objects.all(), 'camp').count(), 0)
+
+	def test_view_fornecedores_usa_busca(self):
+		Fornecedor.objects.create(nome='Distribuidora Ágil')
+		Fornecedor.objects.create(nome='Tech Supply')
+		response = self.client.get(reverse('fornecedores'), {'q': 'agil'})
+		self.assertContains(response, 'Distribuidora Ágil')
+		self.assertNotContains(response, 'Tech Supply')
+
+	def test_reconstruir_indice(self):
+		Item.objects.bulk_create([Item(nome='Teclado'), Item(nome='Mouse')])
+		self.assertEqual(search.buscar(Item.objects.all(), 'tec').count(), 0)
+		call_command('reconstruir_busca', stdout=StringIO())
+		self.assertEqual(search.buscar(Item.objects.all(), 'tec').count(), 1)
+
+
+class ResumoDashboardTests(LoginTestCase):
+	def assertResumoConsistente(self):
+		contadores = resumo.obter()
+		for campo, valor in resumo.calcular().items():
+			self.assertEqual(getattr(contadores, campo), valor, campo)
+
+	def test_sinais_mantem_contadores(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		item = Item.objects.create(nome='Teclado', quantidade=10, valor='50.00')
+		Item.objects.create(nome='Mouse', quantidade=2, valor='20.00')
+		self.assertResumoConsistente()
+
+		item = Item.objects.get(pk=item.pk)
+		item.quantidade = 3
+		item.valor = '70.00'
+		item.save()
+		self.assertResumoConsistente()
+
+		pedido = Pedido.objects.create(fornecedor=fornecedor, item=item)
+		self.assertEqual(resumo.obter().pedidos_pendentes, 1)
+		pedido.status = 'ENTREGUE'
+		pedido.save()
+		self.assertResumoConsistente()
+		pedido.delete()
+		Item.objects.filter(nome='Mouse').delete()
+		self.assertResumoConsistente()
+
+	def test_dashboard_le_apenas_o_resumo(self):
+		Item.objects.create(nome='Teclado', quantidade=1)
+		resumo.obter()
+		with self.assertNumQueries(5):
+			# sessão, usuário, resumo, séries mensais e a lista de estoque baixo
+			response = self.client.get(reverse('dashboard'))
+		self.assertEqual(response.status_code, 200)
+
+	def test_reconciliar_apos_bulk_create(self):
+		resumo.obter()
+		Item.objects.bulk_create([Item(nome=f'Item {i}', quantidade=1) for i in range(3)])
+		call_command('reconciliar_resumo', stdout=StringIO())
+		self.assertEqual(resumo.obter().total_itens, 3)
+		self.assertEqual(resumo.obter().itens_baixo_estoque, 3)
+
+
+class EstoqueTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		self.item = Item.objects.create(nome='Teclado', quantidade=10)
+
+	def quantidade(self):
+		return Item.objects.get(pk=self.item.pk).quantidade
+
+	def test_entrega_idempotente_e_estornavel(self):
+		pedido = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=5)
+		self.assertEqual(self.quantidade(), 10)
+		pedido.status = 'ENTREGUE'
+		pedido.save()
+		pedido.save()
+		Pedido.objects.get(pk=pedido.pk).save()
+		self.assertEqual(self.quantidade(), 15)
+		pedido.status = 'CANCELADO'
+		pedido.save()
+		self.assertEqual(self.quantidade(), 10)
+		self.assertEqual(self.item.movimentos.aggregate(total=Sum('quantidade'))['total'], 10)
+
+	def test_atribuicao_e_ajuste_pela_tela(self):
+		funcionario = Funcionario.objects.create(nome='Ana')
+		atribuicao = Atribuicao.objects.create(item=self.item, funcionario=funcionario)
+		self.assertEqual(self.quantidade(), 9)
+		atribuicao.status = 'DEVOLVIDO'
+		atribuicao.save()
+		self.assertEqual(self.quantidade(), 10)
+
+		# O formulário foi aberto com 10; uma entrega chega antes do envio.
+		Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=5, status='ENTREGUE')
+		response = self.client.post(reverse('item_update', args=[self.item.pk]), {
+			'nome': 'Teclado ABNT', 'quantidade': 8, 'quantidade_anterior': 10, 'status': 'DISPONIVEL',
+		})
+		self.assertEqual(response.status_code, 302)
+		self.assertEqual(self.quantidade(), 13)
+		self.assertTrue(self.item.movimentos.filter(tipo='AJUSTE', quantidade=-2, usuario=self.user).exists())
+
+	def test_reconciliar_recalcula_pelo_livro(self):
+		Item.objects.filter(pk=self.item.pk).update(quantidade=99)
+		Item.objects.bulk_create([Item(nome='Mouse', quantidade=4)])
+		saida = StringIO()
+		call_command('reconciliar_estoque', stdout=saida)
+		self.assertIn('divergente do livro: 1', saida.getvalue())
+		self.assertEqual(self.quantidade(), 10)
+		self.assertEqual(Item.objects.get(nome='Mouse').quantidade, 4)
+		self.assertEqual(resumo.obter().itens_baixo_estoque, 1)
+
+
+class AuditoriaTests(LoginTestCase):
+	def test_registra_quem_e_o_que_mudou(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(reverse('novo_fornecedor'), {'nome': 'Tech Supply', 'status': 'ATIVO'})
+		fornecedor = Fornecedor.objects.get()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(reverse('fornecedor_update', args=[fornecedor.pk]), {'nome': 'Tech Supply SA', 'status': 'ATIVO'})
+			self.client.post(reverse('fornecedor_delete', args=[fornecedor.pk]))
+		# O fim de cada requisição grava o que já estava na fila.
+		self.assertEqual(HistoricoAuditoria.objects.count(), 1)
+		self.assertEqual(auditoria.descarregar(), 2)
+
+		criacao, alteracao, exclusao = HistoricoAuditoria.objects.filter(modelo='core.fornecedor').order_by('data', 'pk')
+		self.assertEqual(criacao.acao, 'CRIACAO')
+		self.assertEqual(criacao.usuario, self.user)
+		self.assertEqual(criacao.alteracoes['nome'], [None, 'Tech Supply'])
+		self.assertEqual(alteracao.alteracoes, {'nome': ['Tech Supply', 'Tech Supply SA']})
+		self.assertEqual(exclusao.acao, 'EXCLUSAO')
+		self.assertEqual(exclusao.objeto_id, str(fornecedor.pk))
+
+	def test_grava_em_lote_e_ignora_rollback(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			with transaction.atomic():
+				Item.objects.create(nome='Descartado')
+				transaction.set_rollback(True)
+		self.assertEqual(auditoria.pendentes(), 0)
+
+		with override_settings(ESTOQUE_AUDITORIA_LOTE=3):
+			with self.captureOnCommitCallbacks(execute=True):
+				Item.objects.create(nome='Teclado')
+				Item.objects.create(nome='Mouse')
+			self.assertEqual(auditoria.pendentes(), 2)
+			with self.assertNumQueries(2):
+				# o INSERT do funcionário e um único INSERT com as três entradas
+				with self.captureOnCommitCallbacks(execute=True):
+					Funcionario.objects.create(nome='Ana')
+		self.assertEqual(auditoria.pendentes(), 0)
+		self.assertEqual(HistoricoAuditoria.objects.filter(acao='CRIACAO').count(), 3)
+
+
+class AcoesEmMassaTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		self.item = Item.objects.create(nome='Teclado', quantidade=10)
+		self.pedidos = [
+			Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=2, status='EM_TRANSITO')
+			for _ in range(30)
+		]
+
+	def test_status_em_lote_movimenta_estoque(self):
+		url = reverse('pedidos_em_massa') + '?status=EM_TRANSITO'
+		dados = {'acao': 'status', 'status': 'ENTREGUE', 'selecionados': [p.pk for p in self.pedidos]}
+		# Número fixo de consultas, qualquer que seja o tamanho da seleção.
+		with self.assertNumQueries(29):
+			response = self.client.post(url, dados)
+		self.assertRedirects(response, reverse('pedidos') + '?status=EM_TRANSITO', fetch_redirect_response=False)
+		self.assertEqual(Pedido.objects.filter(status='ENTREGUE').count(), 30)
+		self.assertEqual(Item.objects.get(pk=self.item.pk).quantidade, 70)
+
+		# Repetir não movimenta de novo; voltar estorna.
+		self.client.post(url, dados)
+		self.assertEqual(Item.objects.get(pk=self.item.pk).quantidade, 70)
+		self.client.post(reverse('pedidos_em_massa'), {'acao': 'status', 'status': 'PENDENTE', 'todos': '1'})
+		self.assertEqual(Item.objects.get(pk=self.item.pk).quantidade, 10)
+		self.assertEqual(resumo.obter().pedidos_pendentes, 30)
+
+	def test_excluir_itens_respeita_protect(self):
+		livre = Item.objects.create(nome='Mouse', quantidade=3, valor='20.00')
+		response = self.client.post(reverse('inventario_em_massa'), {
+			'acao': 'excluir', 'selecionados': [self.item.pk, livre.pk],
+		}, follow=True)
+		self.assertContains(response, '1 itens excluídos.')
+		self.assertContains(response, '1 itens não foram excluídos')
+		self.assertFalse(Item.objects.filter(pk=livre.pk).exists())
+		self.assertEqual(search.buscar(Item.objects.all(), 'mouse').count(), 0)
+		for campo, valor in resumo.calcular().items():
+			self.assertEqual(getattr(resumo.obter(), campo), valor, campo)
+
+	def test_excluir_item_com_previsao(self):
+		livre = Item.objects.create(nome='Mouse', quantidade=3)
+		PrevisaoItem.objects.create(
+			item=livre, consumo_diario=1, lead_time_dias=7, estoque_seguranca=2, ponto_pedido=9, lote_reposicao=30,
+		)
+		self.client.post(reverse('inventario_em_massa'), {'acao': 'excluir', 'selecionados': [livre.pk]})
+		self.assertFalse(Item.objects.filter(pk=livre.pk).exists())
+		self.assertFalse(PrevisaoItem.objects.exists())
+		connection.check_constraints()
+
+	def test_consultas_nao_dependem_do_tamanho_da_selecao(self):
+		Item.objects.bulk_create([Item(nome=f'Cabo {i}', categoria='Cabos') for i in range(1200)])
+		resumo.reconciliar()
+		contagens = []
+		for itens in (Item.objects.filter(categoria='Cabos', nome__endswith='7'), Item.objects.filter(categoria='Cabos')):
+			with CaptureQueriesContext(connection) as contexto:
+				em_massa.alterar_status_itens(itens, 'INDISPONIVEL')
+			contagens.append(len(contexto))
+		self.assertEqual(contagens[0], contagens[1])
+		self.assertEqual(Item.objects.filter(status='INDISPONIVEL').count(), 1200)
+
+		# Um DELETE por tabela, não um por lote de itens.
+		with CaptureQueriesContext(connection) as contexto:
+			self.assertEqual(em_massa.excluir_itens(Item.objects.filter(categoria='Cabos')), (1200, 0))
+		exclusoes = [q['sql'] for q in contexto.captured_queries if q['sql'].startswith('DELETE FROM "core_')]
+		self.assertEqual(len(exclusoes), 5)
+		for campo, valor in resumo.calcular().items():
+			self.assertEqual(getattr(resumo.obter(), campo), valor, campo)
+
+	def test_exclusoes_cobrem_todas_as_relacoes(self):
+		# Uma relação nova para um destes modelos precisa ser tratada antes do DELETE direto.
+		for model, cobertas in em_massa.RELACOES_COBERTAS.items():
+			with self.subTest(model=model.__name__):
+				self.assertEqual({relacao.name for relacao in model._meta.related_objects}, cobertas)
+		with self.assertRaises(ValueError):
+			em_massa.apagar_sem_sinais(Fornecedor.objects.all())
+
+	def test_apagar_sem_sinais_e_um_unico_delete(self):
+		removidos = []
+		receptor = lambda sender, instance, **kwargs: removidos.append(instance.pk)
+		post_delete.connect(receptor, sender=Pedido)
+		self.addCleanup(post_delete.disconnect, receptor, sender=Pedido)
+		with CaptureQueriesContext(connection) as contexto, transaction.atomic():
+			MovimentoEstoque.objects.filter(pedido__item=self.item).update(pedido=None)
+			total = em_massa.apagar_sem_sinais(Pedido.objects.filter(item=self.item, quantidade=2))
+		self.assertEqual(total, 30)
+		self.assertFalse(Pedido.objects.exists())
+		self.assertEqual(removidos, [])
+		self.assertEqual(len([q for q in contexto.captured_queries if q['sql'].startswith('DELETE')]), 1)
+
+	def test_ajuste_de_quantidade_e_validacao(self):
+		self.client.post(reverse('inventario_em_massa'), {
+			'acao': 'quantidade', 'quantidade': -4, 'selecionados': [self.item.pk],
+		})
+		self.assertEqual(Item.objects.get(pk=self.item.pk).quantidade, 6)
+		self.assertTrue(self.item.movimentos.filter(tipo='AJUSTE', quantidade=-4).exists())
+
+		response = self.client.post(reverse('pedidos_em_massa'), {'acao': 'excluir'}, follow=True)
+		self.assertContains(response, 'Selecione ao menos um registro.')
+		self.assertEqual(Pedido.objects.count(), 30)
+
+
+class ResumoMensalTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		self.item = Item.objects.create(nome='Teclado', quantidade=10)
+
+	def linhas(self):
+		linhas = ResumoMensalPedidos.objects.filter(pedidos__gt=0)
+		return sorted(linhas.values_list('mes', 'status', 'pedidos', 'unidades', 'fornecedor'), key=str)
+
+	def test_sinais_e_acoes_em_massa_batem_com_a_reconstrucao(self):
+		pedidos = [Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=q) for q in (2, 3, 4)]
+		antigo = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=7)
+		Pedido.objects.filter(pk=antigo.pk).update(criado_em=timezone.now() - timedelta(days=62))
+		resumo_mensal.reconstruir()
+
+		pedido = Pedido.objects.get(pk=pedidos[0].pk)
+		pedido.status = 'ENTREGUE'
+		pedido.quantidade = 5
+		pedido.save()
+		em_massa.alterar_status_pedidos(Pedido.objects.filter(pk__in=[pedidos[1].pk, antigo.pk]), 'CANCELADO')
+		em_massa.ajustar_quantidade_pedidos(Pedido.objects.filter(pk=pedidos[2].pk), 1)
+		Pedido.objects.get(pk=pedidos[1].pk).delete()
+		incremental = self.linhas()
+
+		resumo_mensal.reconstruir()
+		self.assertEqual(incremental, self.linhas())
+		mes = resumo_mensal.mes_de(timezone.now())
+		self.assertEqual(
+			ResumoMensalPedidos.objects.get(mes=mes, fornecedor__isnull=True, status='ENTREGUE').unidades, 5,
+		)
+
+	def test_dashboard_le_series_reais(self):
+		for status in ('ENTREGUE', 'ENTREGUE', 'CANCELADO'):
+			Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=3, status=status)
+		response = self.client.get(reverse('dashboard'))
+		cards = {card['label']: card['value'] for card in response.context['overview_cards'] + response.context['compras_cards']}
+		self.assertEqual(cards['Pedidos'], 3)
+		self.assertEqual(cards['Entregues'], 2)
+		self.assertEqual(cards['Unidades recebidas'], 6)
+		self.assertEqual(cards['Cancelamentos'], 1)
+		ponto = response.context['chart_points'][-1]
+		self.assertEqual((ponto['pedidos'], ponto['entregues']), (3, 2))
+		self.assertEqual(len(response.context['chart_points']), 6)
+
+
+class ApiTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		for nome in ('Mouse', 'Teclado', 'Monitor'):
+			Item.objects.create(nome=nome, quantidade=5, valor='10.50')
+
+	def test_lista_filtrada_e_paginada(self):
+		response = self.client.get(reverse('api_itens'), {'limite': 2})
+		dados = response.json()
+		self.assertEqual([linha['nome'] for linha in dados['results']], ['Monitor', 'Mouse'])
+		self.assertEqual(dados['results'][0]['valor'], '10.50')
+		segunda = self.client.get(reverse('api_itens'), {'limite': 2, 'cursor': dados['next']}).json()
+		self.assertEqual([linha['nome'] for linha in segunda['results']], ['Teclado'])
+		self.assertEqual(len(self.client.get(reverse('api_itens'), {'q': 'mou'}).json()['results']), 1)
+
+	def test_304_sem_ler_as_linhas(self):
+		Pedido.objects.create(fornecedor=self.fornecedor, item=Item.objects.first())
+		response = self.client.get(reverse('api_pedidos'))
+		self.assertEqual(response.json()['results'][0]['fornecedor__nome'], 'Tech Supply')
+		etag = response['ETag']
+		self.assertIn('Last-Modified', response)
+		with self.assertNumQueries(2):
+			# só sessão e usuário
+			response = self.client.get(reverse('api_pedidos'), HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+
+		Fornecedor.objects.filter(pk=self.fornecedor.pk).update(nome='Outro')
+		caching.invalidar('core.fornecedor')
+		self.assertEqual(self.client.get(reverse('api_pedidos'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	@override_settings(ESTOQUE_API_TOKENS=['segredo'])
+	def test_token_ou_sessao(self):
+		self.client.logout()
+		self.assertEqual(self.client.get(reverse('api_lojas')).status_code, 401)
+		etag = self.client.get(reverse('api_lojas'), HTTP_AUTHORIZATION='Bearer segredo')['ETag']
+		with self.assertNumQueries(0):
+			response = self.client.get(reverse('api_lojas'), HTTP_AUTHORIZATION='Bearer segredo', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(response.status_code, 304)
+
+
+@override_settings(ESTOQUE_SINCRONIZACAO_MARGEM=0)
+class SincronizacaoTests(LoginTestCase):
+	def mudancas(self, since=None, **params):
+		if since is not None:
+			params['since'] = since
+		return self.client.get(reverse('api_itens_mudancas'), params).json()
+
+	def test_feed_desde_o_token(self):
+		mouse = Item.objects.create(nome='Mouse', quantidade=5)
+		teclado = Item.objects.create(nome='Teclado', quantidade=5)
+		primeira = self.mudancas(limite=1)
+		self.assertEqual([linha['nome'] for linha in primeira['results']], ['Mouse'])
+		self.assertTrue(primeira['has_more'])
+		segunda = self.mudancas(primeira['next'])
+		self.assertEqual([linha['nome'] for linha in segunda['results']], ['Teclado'])
+		self.assertFalse(segunda['has_more'])
+		self.assertEqual(self.mudancas(segunda['next'])['results'], [])
+
+		estoque.movimentar(mouse, 'AJUSTE', 3)
+		teclado_pk = teclado.pk
+		teclado.delete()
+		dados = self.mudancas(segunda['next'])
+		self.assertEqual([(linha['id'], linha['quantidade']) for linha in dados['results']], [(mouse.pk, 8)])
+		self.assertEqual(dados['deleted'], [teclado_pk])
+		self.assertEqual(self.mudancas(dados['next'])['results'], [])
+
+	def test_acoes_em_massa_entram_no_feed(self):
+		itens = [Item.objects.create(nome=nome, quantidade=5) for nome in ('A', 'B', 'C')]
+		token = self.mudancas()['next']
+		em_massa.alterar_status_itens(Item.objects.filter(pk=itens[0].pk), 'INDISPONIVEL')
+		em_massa.excluir_itens(Item.objects.filter(pk=itens[1].pk))
+		dados = self.mudancas(token)
+		self.assertEqual([linha['id'] for linha in dados['results']], [itens[0].pk])
+		self.assertEqual(dados['deleted'], [itens[1].pk])
+
+	def test_margem_segura_mudancas_recentes(self):
+		Item.objects.create(nome='Mouse')
+		with override_settings(ESTOQUE_SINCRONIZACAO_MARGEM=60):
+			dados = self.mudancas()
+		self.assertEqual(dados['results'], [])
+		self.assertEqual(len(self.mudancas(dados['next'])['results']), 1)
+
+
+@override_settings(ESTOQUE_USUARIO_CACHE=60)
+class SessaoUsuarioCacheTests(LoginTestCase):
+	def consultas(self):
+		with CaptureQueriesContext(connection) as capturadas:
+			self.assertEqual(self.client.get(reverse('api_lojas')).status_code, 200)
+		return [consulta['sql'] for consulta in capturadas]
+
+	def test_usuario_vem_do_cache(self):
+		self.consultas()
+		sql = self.consultas()
+		self.assertFalse([consulta for consulta in sql if 'core_usuario' in consulta])
+		self.assertTrue([consulta for consulta in sql if 'django_session' in consulta])
+
+	def test_alterar_perfil_ou_senha_invalida(self):
+		self.consultas()
+		self.user.perfil = 'GERENTE_COMPRAS'
+		self.user.save()
+		self.assertTrue([consulta for consulta in self.consultas() if 'core_usuario' in consulta])
+		self.user.set_password('outra-senha-secreta')
+		self.user.save()
+		# O hash da senha na sessão não confere mais: a sessão é encerrada.
+		self.assertEqual(self.client.get(reverse('api_lojas')).status_code, 401)
+
+	@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+	def test_sessao_em_cookie_sem_banco(self):
+		self.client.force_login(self.user)
+		self.consultas()
+		sql = self.consultas()
+		# só a listagem: nem sessão nem usuário vão ao banco
+		self.assertEqual(len(sql), 1)
+		self.assertIn('core_loja', sql[0])
+
+
+class TemplatesDesempenhoTests(LoginTestCase):
+	@override_settings(ESTOQUE_CACHE_FRAGMENTOS=300)
+	def test_cards_do_painel_em_cache_ate_a_proxima_escrita(self):
+		response = self.client.get(reverse('dashboard'))
+		chave = make_template_fragment_key('dashboard_cards', [response.context['versao_cards']])
+		self.assertIsNotNone(cache.get(chave))
+		self.assertIsNotNone(cache.get(make_template_fragment_key('navegacao', ['dashboard'])))
+
+		self.client.post(reverse('novo_pedido'), {
+			'fornecedor': Fornecedor.objects.create(nome='Tech Supply').pk,
+			'item': Item.objects.create(nome='Mouse').pk,
+			'quantidade': 1,
+			'status': 'PENDENTE',
+		})
+		response = self.client.get(reverse('dashboard'))
+		self.assertNotEqual(make_template_fragment_key('dashboard_cards', [response.context['versao_cards']]), chave)
+		cards = {card['label']: card['value'] for card in response.context['overview_cards']}
+		self.assertEqual(cards['Pedidos'], 1)
+
+	def test_collectstatic_grava_versoes_comprimidas(self):
+		with tempfile.TemporaryDirectory() as destino, override_settings(
+			STATIC_ROOT=destino,
+			STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'core.estaticos.EstaticosComprimidos'}},
+		):
+			call_command('collectstatic', interactive=False, verbosity=0)
+			manifesto = json.loads((Path(destino) / 'staticfiles.json').read_text())
+			hasheado = Path(destino) / manifesto['paths']['css/styles.css']
+			self.assertNotEqual(hasheado.name, 'styles.css')
+			comprimido = hasheado.with_name(hasheado.name + '.gz')
+			self.assertEqual(gzip.decompress(comprimido.read_bytes()), hasheado.read_bytes())
+
+
+@override_settings(ESTOQUE_REPLICAS=['replica1'], ESTOQUE_REPLICA_ATRASO=5)
+class RoteamentoReplicasTests(TestCase):
+	def setUp(self):
+		self.roteador = roteamento.RoteadorReplicas()
+		self.vistos = []
+
+		@roteamento.leitura_em_replica
+		def view(request):
+			self.vistos.append(self.roteador.db_for_read(Item))
+			if request.GET.get('escrever'):
+				self.roteador.db_for_write(Item)
+				self.vistos.append(self.roteador.db_for_read(Item))
+			self.vistos.append(self.roteador.db_for_read(get_user_model()))
+			return HttpResponse()
+
+		self.view = view
+
+	def requisicao(self, metodo='get', sessao=None, **params):
+		request = getattr(RequestFactory(), metodo)('/', params)
+		request.session = sessao or {}
+		return request
+
+	def test_leituras_da_view_vao_para_a_replica(self):
+		self.view(self.requisicao())
+		self.assertEqual(self.vistos, ['replica1', 'default'])
+		# Fora da view marcada, tudo no principal.
+		self.assertEqual(self.roteador.db_for_read(Item), 'default')
+
+	def test_le_as_proprias_escritas_no_principal(self):
+		self.view(self.requisicao(escrever='1'))
+		self.assertEqual(self.vistos[:2], ['replica1', 'default'])
+		self.vistos.clear()
+		self.view(self.requisicao('post'))
+		self.view(self.requisicao(sessao={caching.CHAVE_ESCRITA_SESSAO: time.time_ns()}))
+		self.assertEqual(set(self.vistos), {'default'})
+
+	def test_cache_de_versao_recente_le_do_principal(self):
+		@roteamento.leitura_em_replica
+		def view(request):
+			caching.invalidar('core.item')
+			caching.obter(None, 'teste', ['core.item'], lambda: self.vistos.append(self.roteador.db_for_read(Item)))
+			return HttpResponse()
+
+		view(self.requisicao())
+		self.assertEqual(self.vistos, ['default'])
+
+	def test_exportacao_em_fluxo_le_da_replica(self):
+		@roteamento.leitura_em_replica
+		def view(request):
+			return StreamingHttpResponse(self.roteador.db_for_read(Item) for _ in range(1))
+
+		self.assertEqual(b''.join(view(self.requisicao()).streaming_content), b'replica1')
+
+	def test_sincronizar_replica_copia_o_sqlite(self):
+		with tempfile.TemporaryDirectory() as pasta:
+			origem, destino = Path(pasta) / 'principal.sqlite3', Path(pasta) / 'replica.sqlite3'
+			with closing(sqlite3.connect(origem)) as conexao, conexao:
+				conexao.execute('CREATE TABLE t (x INTEGER)')
+				conexao.execute('INSERT INTO t VALUES (42)')
+			copiar(origem, destino)
+			with closing(sqlite3.connect(destino)) as conexao:
+				self.assertEqual(conexao.execute('SELECT x FROM t').fetchall(), [(42,)])
+
+
+class ArquivamentoTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		self.item = Item.objects.create(nome='Teclado', quantidade=10)
+		antigo = timezone.now() - timedelta(days=400)
+		self.entregue = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, quantidade=3)
+		self.entregue.status = 'ENTREGUE'
+		self.entregue.save()
+		self.cancelado = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, status='CANCELADO')
+		self.pendente = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item)
+		Pedido.objects.update(criado_em=antigo)
+		self.recente = Pedido.objects.create(fornecedor=self.fornecedor, item=self.item, status='ENTREGUE')
+		resumo_mensal.reconstruir()
+
+	def series(self):
+		return sorted(ResumoMensalPedidos.objects.values_list('mes', 'status', 'pedidos', 'unidades', 'fornecedor'), key=str)
+
+	def test_move_so_pedidos_fechados_antigos_em_lotes(self):
+		series = self.series()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.assertEqual(arquivamento.arquivar(dias=180, tamanho=1), 2)
+		auditoria.descarregar()
+
+		self.assertEqual(set(PedidoArquivado.objects.values_list('pk', flat=True)), {self.entregue.pk, self.cancelado.pk})
+		self.assertEqual(set(Pedido.objects.values_list('pk', flat=True)), {self.pendente.pk, self.recente.pk})
+		movimento = MovimentoEstoque.objects.get(tipo='RECEBIMENTO', quantidade=3)
+		self.assertIsNone(movimento.pedido_id)
+		self.assertEqual(movimento.pedido_arquivado_id, self.entregue.pk)
+		self.assertEqual(Item.objects.get(pk=self.item.pk).quantidade, 14)
+		self.assertEqual(HistoricoAuditoria.objects.filter(acao='ARQUIVAMENTO').count(), 2)
+		# As séries mensais continuam contando os arquivados, também ao reconstruir.
+		self.assertEqual(self.series(), series)
+		resumo_mensal.reconstruir()
+		self.assertEqual(self.series(), series)
+
+	def test_listas_exportacao_e_api_com_arquivados(self):
+		call_command('arquivar_pedidos', stdout=StringIO())
+
+		response = self.client.get(reverse('pedidos'))
+		self.assertEqual({p.pk for p in response.context['pedidos']}, {self.pendente.pk, self.recente.pk})
+		response = self.client.get(reverse('pedidos'), {'arquivados': '1'})
+		self.assertEqual(
+			[p.pk for p in response.context['pedidos']],
+			[self.recente.pk, self.pendente.pk, self.cancelado.pk, self.entregue.pk],
+		)
+		self.assertEqual(response.context['pagina'].total, 4)
+		self.assertContains(response, 'Arquivado', count=2)
+
+		primeira = paginar([Pedido.objects.all(), PedidoArquivado.objects.all()], ('-criado_em', '-pk'), por_pagina=3)
+		segunda = paginar(
+			[Pedido.objects.all(), PedidoArquivado.objects.all()], ('-criado_em', '-pk'), primeira.next_cursor, por_pagina=3,
+		)
+		self.assertEqual([p.pk for p in segunda], [self.entregue.pk])
+		self.assertFalse(segunda.has_next)
+
+		response = self.client.get(reverse('exportar_pedidos'))
+		linhas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+		self.assertEqual(
+			[int(linha.split(',')[0]) for linha in linhas[1:]],
+			[self.recente.pk, self.pendente.pk, self.cancelado.pk, self.entregue.pk],
+		)
+
+		response = self.client.get(reverse('api_pedidos'), {'arquivados': '1', 'status': 'ENTREGUE'})
+		self.assertEqual([linha['id'] for linha in response.json()['results']], [self.recente.pk, self.entregue.pk])
+
+	def test_item_com_pedido_arquivado_nao_e_excluido(self):
+		arquivamento.arquivar(dias=180)
+		Pedido.objects.all().delete()
+		self.assertEqual(em_massa.excluir_itens(Item.objects.all()), (0, 1))
+
+
+class TarefasTests(LoginTestCase):
+	def processar(self):
+		call_command('processar_tarefas', '--uma-vez', '--trabalhadores', '0', stdout=StringIO())
+
+	def setUp(self):
+		super().setUp()
+		pasta = tempfile.TemporaryDirectory()
+		self.addCleanup(pasta.cleanup)
+		media = self.settings(MEDIA_ROOT=pasta.name)
+		media.enable()
+		self.addCleanup(media.disable)
+
+	def test_importacao_em_segundo_plano(self):
+		conteudo = '\ufeffnome;quantidade;status\nMouse;5;DISPONIVEL\nTeclado;x;DISPONIVEL\n'.encode()
+		arquivo = SimpleUploadedFile('itens.csv', conteudo)
+		response = self.client.post(reverse('importar_csv'), {'tipo': 'itens', 'arquivo': arquivo, 'em_segundo_plano': 'on'})
+		tarefa = Tarefa.objects.get()
+		self.assertRedirects(response, reverse('tarefa_detalhe', args=[tarefa.pk]))
+		self.assertEqual((tarefa.status, tarefa.usuario), ('PENDENTE', self.user))
+		# O CSV fica em default_storage; no banco, só o nome.
+		nome = tarefa.parametros['arquivo']
+		with default_storage.open(nome, 'rb') as salvo:
+			self.assertEqual(salvo.read(), conteudo)
+		self.assertFalse(Item.objects.exists())
+
+		self.processar()
+		self.assertEqual(list(Item.objects.values_list('nome', 'quantidade')), [('Mouse', 5)])
+		dados = self.client.get(reverse('tarefa_status', args=[tarefa.pk])).json()
+		self.assertEqual((dados['status'], dados['progresso']), ('CONCLUIDA', 100))
+		self.assertEqual((dados['resultado']['importados'], dados['resultado']['total_erros']), (1, 1))
+		self.assertFalse(default_storage.exists(nome))
+		self.assertContains(self.client.get(reverse('tarefa_detalhe', args=[tarefa.pk])), '1 importados')
+
+	def test_andamento_da_importacao_pela_posicao_no_arquivo(self):
+		linhas = ''.join(f'Item {n};{n};DISPONIVEL\n' for n in range(1100))
+		arquivo = SimpleUploadedFile('itens.csv', ('nome;quantidade;status\n' + linhas).encode())
+		tarefa = tarefas.enfileirar('importar_csv', {'tipo': 'itens'}, usuario=self.user, arquivo=arquivo)
+		andamento = []
+		tarefas._importar_csv(tarefa, lambda percentual, mensagem='': andamento.append(round(percentual)))
+		self.assertEqual(Item.objects.count(), 1100)
+		self.assertEqual(len(andamento), 3)
+		self.assertTrue(0 < andamento[0] < andamento[1] < andamento[2] == 100)
+
+	def test_importacao_que_falha_apaga_o_arquivo(self):
+		arquivo = SimpleUploadedFile('itens.csv', b'nome;quantidade\nMouse;1\n')
+		tarefa = tarefas.enfileirar('importar_csv', {'tipo': 'itens'}, usuario=self.user, arquivo=arquivo)
+		nome = tarefa.parametros['arquivo']
+		with mock.patch.object(importacao, 'importar', side_effect=RuntimeError('disco')):
+			self.processar()
+		tarefa.refresh_from_db()
+		self.assertEqual(tarefa.status, 'FALHOU')
+		self.assertFalse(default_storage.exists(nome))
+
+	def test_arquivo_fora_de_utf8_nao_e_enfileirado(self):
+		arquivo = SimpleUploadedFile('itens.csv', 'nome;quantidade\nCanção;3\n'.encode('cp1252'))
+		response = self.client.post(reverse('importar_csv'), {'tipo': 'itens', 'arquivo': arquivo, 'em_segundo_plano': 'on'})
+		self.assertEqual(response.status_code, 200)
+		self.assertFormError(response.context['form'], 'arquivo', 'O arquivo deve estar em UTF-8.')
+		self.assertFalse(Tarefa.objects.exists())
+
+	def test_falha_e_repetida_com_espera_ate_esgotar(self):
+		chamadas = []
+
+		@tarefas.tarefa('teste_falha', max_tentativas=2)
+		def falhar(tarefa, progresso):
+			chamadas.append(tarefa.tentativas)
+			progresso(40, 'quase')
+			raise RuntimeError('fora do ar')
+
+		self.addCleanup(tarefas.TIPOS.pop, 'teste_falha')
+		tarefa = tarefas.enfileirar('teste_falha', usuario=self.user)
+		self.processar()
+		tarefa.refresh_from_db()
+		self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.progresso), ('PENDENTE', 1, 40))
+		self.assertIn('fora do ar', tarefa.erro)
+		self.assertGreater(tarefa.executar_apos, timezone.now())
+		self.assertIsNone(tarefas.reservar('teste'))
+
+		Tarefa.objects.update(executar_apos=timezone.now())
+		self.processar()
+		tarefa.refresh_from_db()
+		self.assertEqual((tarefa.status, tarefa.tentativas), ('FALHOU', 2))
+		self.assertEqual(chamadas, [1, 2])
+
+	def test_tarefa_de_trabalhador_morto_volta_para_a_fila(self):
+		tarefa = tarefas.enfileirar('reconstruir_resumo_mensal')
+		self.assertEqual(tarefas.reservar('morto').pk, tarefa.pk)
+		self.assertEqual(tarefas.recuperar_expiradas(), 0)
+		Tarefa.objects.update(atualizado_em=timezone.now() - timedelta(hours=1))
+		self.assertEqual(tarefas.recuperar_expiradas(), 1)
+		self.processar()
+		tarefa.refresh_from_db()
+		self.assertEqual((tarefa.status, tarefa.tentativas), ('CONCLUIDA', 2))
+
+	@override_settings(ESTOQUE_TAREFAS_EXPIRAR=0.03)
+	def test_batimento_enquanto_a_funcao_roda(self):
+		@tarefas.tarefa('teste_lenta')
+		def lenta(tarefa, progresso):
+			time.sleep(0.1)
+
+		self.addCleanup(tarefas.TIPOS.pop, 'teste_lenta')
+		tarefas.enfileirar('teste_lenta')
+		# A thread de batimento tem conexão própria; aqui só conta as batidas.
+		with mock.patch('core.tarefas._bater', return_value=True) as bater:
+			tarefas.executar(tarefas.reservar('teste'))
+		self.assertGreater(bater.call_count, 0)
+		self.assertEqual(Tarefa.objects.get().status, 'CONCLUIDA')
+
+	def test_execucao_que_perdeu_a_tarefa_nao_sobrescreve(self):
+		@tarefas.tarefa('teste_retomada', max_tentativas=1)
+		def retomada(tarefa, progresso):
+			# Outro trabalhador pegou a tarefa de volta enquanto esta execução rodava.
+			Tarefa.objects.filter(pk=tarefa.pk).update(status='PENDENTE')
+			self.assertEqual(tarefas.reservar('outro').pk, tarefa.pk)
+			progresso(50, 'ainda aqui')
+			if tarefa.parametros.get('falhar'):
+				raise RuntimeError('fora do ar')
+
+		self.addCleanup(tarefas.TIPOS.pop, 'teste_retomada')
+		for parametros in ({}, {'falhar': True}):
+			Tarefa.objects.all().delete()
+			tarefas.enfileirar('teste_retomada', parametros)
+			tarefas.executar(tarefas.reservar('teste'))
+			tarefa = Tarefa.objects.get()
+			self.assertEqual((tarefa.status, tarefa.trabalhador, tarefa.progresso), ('EXECUTANDO', 'outro', 0))
+
+	def test_tarefas_de_outros_e_manutencao_restritas(self):
+		outro = get_user_model().objects.create_user(username='outro', password='senha-super-secreta')
+		tarefa = tarefas.enfileirar('reindexar_busca', usuario=outro)
+		self.assertEqual(self.client.get(reverse('tarefa_detalhe', args=[tarefa.pk])).status_code, 404)
+		self.assertEqual(self.client.get(reverse('tarefa_status', args=[tarefa.pk])).status_code, 404)
+		self.assertEqual(self.client.post(reverse('tarefa_nova'), {'tipo': 'reindexar_busca'}).status_code, 403)
+
+		self.user.is_staff = True
+		self.user.save()
+		response = self.client.post(reverse('tarefa_nova'), {'tipo': 'reindexar_busca'})
+		self.assertRedirects(response, reverse('tarefa_detalhe', args=[Tarefa.objects.latest('pk').pk]))
+		self.assertContains(self.client.get(reverse('tarefas')), '<td>reindexar_busca</td>', count=2)
+
+
+@override_settings(ESTOQUE_EVENTOS_INTERVALO=0.01)
+class PainelAoVivoTests(LoginTestCase):
+	async def proximo(self, fluxo):
+		return json.loads((await asyncio.wait_for(anext(fluxo), 5)).decode().split('data: ', 1)[1])
+
+	async def test_alteracoes_chegam_como_diferencas_a_todos_os_clientes(self):
+		await self.async_client.aforce_login(self.user)
+		fluxos = []
+		for _ in range(2):
+			response = await self.async_client.get(reverse('painel_eventos'))
+			self.assertEqual(response['Content-Type'], 'text/event-stream')
+			fluxo = aiter(response.streaming_content)
+			self.assertTrue((await anext(fluxo)).startswith(b'retry:'))
+			fluxos.append(fluxo)
+		estados = [await self.proximo(fluxo) for fluxo in fluxos]
+		self.assertEqual(estados[0], estados[1])
+		self.assertEqual((estados[0]['total_itens'], estados[0]['estoque_baixo']), (0, []))
+
+		with mock.patch('core.painel.valores', wraps=painel.valores) as valores:
+			await sync_to_async(Item.objects.create)(nome='Mouse', quantidade=2, valor=10)
+			mudancas = [await self.proximo(fluxo) for fluxo in fluxos]
+		self.assertEqual(valores.call_count, 1)
+		self.assertEqual(mudancas[0], mudancas[1])
+		self.assertEqual(mudancas[0]['total_itens'], 1)
+		self.assertEqual(mudancas[0]['valor_total'], '10.00')
+		self.assertEqual([item['nome'] for item in mudancas[0]['estoque_baixo']], ['Mouse'])
+		self.assertNotIn('pedidos_mes', mudancas[0])
+
+		# Cliente desconectado: o servidor ASGI cancela a leitura em andamento.
+		for fluxo in fluxos:
+			leitura = asyncio.ensure_future(anext(fluxo))
+			await asyncio.sleep(0.05)
+			leitura.cancel()
+			with self.assertRaises(asyncio.CancelledError):
+				await leitura
+		self.assertEqual(eventos.difusor.filas, set())
+
+	def test_painel_marca_os_contadores(self):
+		response = self.client.get(reverse('dashboard'))
+		self.assertContains(response, reverse('painel_eventos'))
+		for chave in ('total_itens', 'pedidos_mes', 'valor_total', 'itens_baixo_estoque'):
+			self.assertContains(response, f'data-contador="{chave}"')
+
+
+@skipUnless(previsao.np, 'previsão de demanda precisa do NumPy')
+class PrevisaoTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.rapido = Item.objects.create(nome='Toner', quantidade=20)
+		self.lento = Item.objects.create(nome='Grampeador', quantidade=8)
+		self.novo = Item.objects.create(nome='Etiqueta', quantidade=9)
+		funcionario = Funcionario.objects.create(nome='Ana')
+		hoje = timezone.localdate()
+		# bulk_create não baixa o estoque: só o histórico de consumo importa aqui.
+		Atribuicao.objects.bulk_create(
+			[Atribuicao(item=self.rapido, funcionario=funcionario) for _ in range(5 * 60)]
+			+ [Atribuicao(item=self.lento, funcionario=funcionario)]
+		)
+		for dia, pk in enumerate(Atribuicao.objects.filter(item=self.rapido).values_list('pk', flat=True)):
+			Atribuicao.objects.filter(pk=pk).update(data=hoje - timedelta(days=dia // 5))
+		Atribuicao.objects.filter(item=self.lento).update(data=hoje - timedelta(days=30))
+
+	def test_ponto_de_pedido_segue_o_consumo(self):
+		self.assertEqual(previsao.recalcular(), 2)
+		rapido = PrevisaoItem.objects.get(item=self.rapido)
+		self.assertAlmostEqual(rapido.consumo_diario, 300 / 90)
+		self.assertEqual(rapido.lead_time_dias, 7)
+		self.assertEqual(rapido.lote_reposicao, 100)
+		self.assertGreater(rapido.ponto_pedido, 20)
+		self.assertEqual(Item.objects.get(pk=self.rapido.pk).ponto_pedido, rapido.ponto_pedido)
+		self.assertEqual(Item.objects.get(pk=self.lento.pk).ponto_pedido, 1)
+		self.assertEqual(Item.objects.get(pk=self.novo.pk).ponto_pedido, 10)
+		self.assertFalse(PrevisaoItem.objects.filter(item=self.novo).exists())
+
+		# Toner (20) entra pela previsão, Grampeador (8) sai; Etiqueta fica pelo limite fixo.
+		response = self.client.get(reverse('dashboard'))
+		self.assertEqual([item['nome'] for item in response.context['estoque_baixo']], ['Etiqueta', 'Toner'])
+		response = self.client.get(reverse('inventario'), {'repor': '1'})
+		self.assertEqual([item.nome for item in response.context['itens']], ['Etiqueta', 'Toner'])
+
+	def test_recalcular_so_grava_itens_que_mudaram(self):
+		previsao.recalcular()
+		with CaptureQueriesContext(connection) as contexto:
+			previsao.recalcular()
+		self.assertFalse([q for q in contexto.captured_queries if q['sql'].startswith('UPDATE "core_item"')])
+		# As previsões antigas saem num único DELETE, sem carregar as linhas.
+		exclusoes = [q['sql'] for q in contexto.captured_queries if 'core_previsaoitem' in q['sql']]
+		self.assertEqual([sql.split(' ')[0] for sql in exclusoes], ['DELETE', 'INSERT'])
+
+	def test_estimar_ignora_itens_fora_da_lista(self):
+		# Itens criados (3) ou excluídos (2) entre a leitura dos ids e a do histórico.
+		np = previsao.np
+		resultado = previsao.estimar(
+			np.array([1, 4]), np.array([3, 2, 2]), np.array([0, 0, 1]),
+			np.array([2, 4]), np.array([50.0, 10.0]), 90,
+		)
+		self.assertEqual(resultado['consumo_diario'].tolist(), [0, 0])
+		self.assertEqual(resultado['lead_time_dias'].tolist(), [10.0, 10.0])
+		self.assertEqual(resultado['com_historico'].tolist(), [False, True])
+
+	def test_recebimento_da_abertura_do_livro_usa_a_entrega_prevista(self):
+		criado_em = timezone.now() - timedelta(days=40)
+		fornecedor = Fornecedor.objects.create(nome='Geral')
+		pedido = Pedido.objects.create(
+			fornecedor=fornecedor, item=self.rapido, status='ENTREGUE', quantidade=1,
+			entrega_prevista=timezone.localdate(criado_em) + timedelta(days=12),
+		)
+		Pedido.objects.filter(pk=pedido.pk).update(criado_em=criado_em)
+		previsao.recalcular()
+		self.assertAlmostEqual(PrevisaoItem.objects.get(item=self.rapido).lead_time_dias, 40, delta=1)
+
+		# Como se o recebimento tivesse sido lançado pela migração 0008, hoje.
+		MigrationRecorder(connection).migration_qs.filter(app='core', name='0008_movimentoestoque').update(
+			applied=timezone.now(),
+		)
+		migracao = importlib.import_module('core.migrations.0017_marcar_abertura_livro')
+		migracao.marcar_abertura(django_apps, SimpleNamespace(connection=connection))
+		self.assertEqual(
+			list(MovimentoEstoque.objects.filter(tipo='RECEBIMENTO').values_list('pedido', 'observacao')),
+			[(pedido.pk, estoque.ABERTURA_LIVRO)],
+		)
+		previsao.recalcular()
+		self.assertAlmostEqual(PrevisaoItem.objects.get(item=self.rapido).lead_time_dias, 12, delta=1)
+
+	def test_tarefa_e_comando(self):
+		tarefa = tarefas.enfileirar('calcular_previsao')
+		tarefas.executar(tarefas.reservar('teste'))
+		tarefa.refresh_from_db()
+		self.assertEqual((tarefa.status, tarefa.resultado), ('CONCLUIDA', {'itens_com_previsao': 2}))
+		saida = StringIO()
+		call_command('calcular_previsao', stdout=saida)
+		self.assertIn('Itens com previsão: 2', saida.getvalue())
+
+
+class ComprasTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		self.toner = Fornecedor.objects.create(nome='Toner & Cia', produto_principal='toner')
+		self.geral = Fornecedor.objects.create(nome='Geral Ltda')
+		suspenso = Fornecedor.objects.create(nome='Suspenso', status='SUSPENSO')
+		itens = Item.objects.bulk_create([
+			Item(nome='Toner', quantidade=2),
+			Item(nome='Cabo', quantidade=3),
+			Item(nome='Mouse', quantidade=1),
+			Item(nome='Teclado', quantidade=50),
+			Item(nome='Fonte', quantidade=4),
+		])
+		self.itens = {item.nome: item for item in itens}
+		# bulk_create: sem sinais, o estoque não muda com os pedidos.
+		Pedido.objects.bulk_create([
+			Pedido(fornecedor=self.geral, item=self.itens['Cabo'], status='ENTREGUE'),
+			Pedido(fornecedor=suspenso, item=self.itens['Fonte'], status='ENTREGUE'),
+			Pedido(fornecedor=self.geral, item=self.itens['Mouse'], status='PENDENTE'),
+		])
+
+	def test_agrupa_itens_a_repor_por_fornecedor(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			resultado = compras.gerar()
+		# Mouse já tem pedido em aberto; Fonte só tem fornecedor suspenso.
+		self.assertEqual(resultado, {'ordens': 2, 'linhas': 2, 'sem_fornecedor': 1})
+		linhas = ItemOrdem.objects.values_list('ordem_compra__fornecedor__nome', 'item__nome', 'quantidade')
+		self.assertEqual(sorted(linhas), [('Geral Ltda', 'Cabo', 8), ('Toner & Cia', 'Toner', 9)])
+		auditoria.descarregar()
+		self.assertEqual(HistoricoAuditoria.objects.filter(modelo='core.ordemcompra', acao='CRIACAO').count(), 2)
+		self.assertEqual(HistoricoAuditoria.objects.filter(modelo='core.itemordem', acao='CRIACAO').count(), 2)
+
+		# Itens com ordem em aberto não entram de novo.
+		self.assertEqual(compras.gerar(), {'ordens': 0, 'linhas': 0, 'sem_fornecedor': 1})
+		OrdemCompra.objects.update(status='RECEBIDA')
+		self.assertEqual(compras.gerar()['linhas'], 2)
+
+	def test_fornecedor_de_pedido_arquivado(self):
+		antigo = Pedido.objects.get(item=self.itens['Cabo'])
+		Pedido.objects.filter(pk=antigo.pk).update(criado_em=timezone.now() - timedelta(days=400))
+		self.assertEqual(arquivamento.arquivar(dias=180), 1)
+		compras.gerar()
+		self.assertEqual(ItemOrdem.objects.get(item=self.itens['Cabo']).ordem_compra.fornecedor, self.geral)
+
+	def test_usa_o_lote_de_reposicao_previsto(self):
+		PrevisaoItem.objects.create(
+			item=self.itens['Toner'], consumo_diario=2, lead_time_dias=7, estoque_seguranca=3, ponto_pedido=17,
+			lote_reposicao=60,
+		)
+		Item.objects.filter(pk=self.itens['Toner'].pk).update(ponto_pedido=17)
+		compras.gerar()
+		self.assertEqual(ItemOrdem.objects.get(item=self.itens['Toner']).quantidade, 60)
+
+	def test_numero_de_consultas_nao_depende_dos_itens(self):
+		Item.objects.bulk_create([Item(nome=f'Cartucho {i}', categoria='Toner', quantidade=0) for i in range(40)])
+		with CaptureQueriesContext(connection) as muitos:
+			resultado = compras.gerar(Item.objects.all())
+		self.assertEqual(resultado['linhas'], 42)
+		OrdemCompra.objects.all().delete()
+		with CaptureQueriesContext(connection) as poucos:
+			compras.gerar(Item.objects.filter(nome='Toner'))
+		self.assertEqual(len(muitos), len(poucos))
+
+	def test_tela_de_ordens(self):
+		response = self.client.post(reverse('gerar_ordens_compra'))
+		self.assertEqual(response.status_code, 403)
+
+		self.user.perfil = 'GERENTE_COMPRAS'
+		self.user.save()
+		response = self.client.post(reverse('gerar_ordens_compra'), follow=True)
+		self.assertContains(response, '2 ordens de compra geradas com 2 itens.')
+		self.assertContains(response, '1 itens a repor não têm fornecedor conhecido.')
+		self.assertContains(response, 'Toner (9)')
+		self.assertContains(response, 'Geral Ltda')
+
+
+class CacheTests(LoginTestCase):
+	def test_lista_em_cache_ate_a_proxima_escrita(self):
+		Item.objects.create(nome='Teclado')
+		self.client.get(reverse('inventario'))
+		with self.assertNumQueries(3):
+			# sessão, usuário e resumo; a página de itens vem do cache
+			response = self.client.get(reverse('inventario'))
+		self.assertContains(response, 'Teclado')
+
+		self.client.post(reverse('item_create'), {
+			'nome': 'Mouse', 'quantidade': 5, 'status': 'DISPONIVEL', 'valor': '10.00'
+		})
+		response = self.client.get(reverse('inventario'))
+		self.assertContains(response, 'Mouse')
+
+	def test_escrita_do_usuario_ignora_entradas_antigas(self):
+		Item.objects.create(nome='Teclado')
+		self.client.get(reverse('inventario'))
+		# Escrita que não passa pelos sinais (outro processo, bulk_create...)
+		Item.objects.bulk_create([Item(nome='Monitor')])
+		self.assertNotContains(self.client.get(reverse('inventario')), 'Monitor')
+		session = self.client.session
+		caching.registrar_escrita(SimpleNamespace(session=session))
+		session.save()
+		self.assertContains(self.client.get(reverse('inventario')), 'Monitor')
+
+
+class ImportacaoTests(LoginTestCase):
+	def test_importa_itens_e_relata_erros(self):
+		arquivo = StringIO(
+			'nome,categoria,quantidade,status,valor\n'
+			'Mouse,Periféricos,5,DISPONIVEL,120.00\n'
+			',Periféricos,5,DISPONIVEL,10.00\n'
+			'Teclado,Periféricos,3,DISPONIVEL,80.00\n'
+		)
+		erros = []
+		resultado = importacao.importar('itens', importacao.ler_csv(arquivo), tamanho_lote=1, ao_erro=lambda n, e: erros.append(n))
+		self.assertEqual(resultado.importados, 2)
+		self.assertEqual(erros, [3])
+		self.assertEqual(resumo.obter().total_itens, 2)
+		self.assertEqual(search.buscar(Item.objects.all(), 'tecl').count(), 1)
+
+	def test_fornecedores_fazem_upsert_por_cnpj(self):
+		Fornecedor.objects.create(nome='Antigo', cnpj='00.000.000/0001-00')
+		arquivo = StringIO(
+			'nome;cnpj;status\n'
+			'Tech Supply;00.000.000/0001-00;ATIVO\n'
+			'Nova;11.111.111/0001-11;ATIVO\n'
+		)
+		resultado = importacao.importar('fornecedores', importacao.ler_csv(arquivo))
+		self.assertEqual(resultado.total_erros, 0)
+		self.assertEqual(Fornecedor.objects.count(), 2)
+		self.assertEqual(Fornecedor.objects.get(cnpj='00.000.000/0001-00').nome, 'Tech Supply')
+
+	def test_pedidos_entregues_movimentam_estoque(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		item = Item.objects.create(nome='Teclado')
+		arquivo = StringIO(
+			'fornecedor,item,quantidade,status\n'
+			f'{fornecedor.pk},{item.pk},7,ENTREGUE\n'
+			f'{fornecedor.pk},{item.pk},4,PENDENTE\n'
+		)
+		resultado = importacao.importar('pedidos', importacao.ler_csv(arquivo))
+		self.assertEqual(resultado.importados, 2)
+		self.assertEqual(Item.objects.get(pk=item.pk).quantidade, 7)
+		recebimento = MovimentoEstoque.objects.get(tipo='RECEBIMENTO')
+		self.assertEqual((recebimento.quantidade, recebimento.pedido.status), (7, 'ENTREGUE'))
+
+	def test_upload_pela_view(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		item = Item.objects.create(nome='Teclado')
+		conteudo = f'fornecedor,item,quantidade,status\n{fornecedor.pk},{item.pk},3,PENDENTE\n'
+		response = self.client.post(reverse('importar_csv'), {
+			'tipo': 'pedidos',
+			'arquivo': SimpleUploadedFile('pedidos.csv', conteudo.encode()),
+		})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(Pedido.objects.count(), 1)
+		self.assertEqual(response.context['resultado'].importados, 1)
+
+
+	def test_arquivo_fora_de_utf8_e_recusado(self):
+		response = self.client.post(reverse('importar_csv'), {
+			'tipo': 'itens',
+			'arquivo': SimpleUploadedFile('itens.csv', 'nome,quantidade\nCanção,3\n'.encode('latin-1')),
+		})
+		self.assertEqual(response.status_code, 200)
+		self.assertFormError(response.context['form'], 'arquivo', 'O arquivo deve estar em UTF-8.')
+		self.assertFalse(Item.objects.exists())
+
+
+class AutocompleteTests(LoginTestCase):
+	def test_busca_por_prefixo_paginada(self):
+		Fornecedor.objects.bulk_create([Fornecedor(nome=f'Tech {i:02d}') for i in range(25)])
+		call_command('reconstruir_busca', stdout=StringIO())
+		Fornecedor.objects.create(nome='Distribuidora')
+		dados = self.client.get(reverse('autocomplete_fornecedores'), {'q': 'tec'}).json()
+		self.assertEqual(len(dados['results']), 20)
+		self.assertEqual(dados['results'][0]['text'], 'Tech 00')
+		dados = self.client.get(reverse('autocomplete_fornecedores'), {'q': 'tec', 'cursor': dados['next']}).json()
+		self.assertEqual(len(dados['results']), 5)
+		self.assertIsNone(dados['next'])
+
+	def test_formulario_nao_lista_todo_o_catalogo(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		Fornecedor.objects.create(nome='Distribuidora')
+		item = Item.objects.create(nome='Teclado')
+		pedido = Pedido.objects.create(fornecedor=fornecedor, item=item)
+		response = self.client.get(reverse('novo_pedido'))
+		self.assertNotContains(response, 'Tech Supply')
+		self.assertContains(response, reverse('autocomplete_fornecedores'))
+		response = self.client.get(reverse('pedido_update', args=[pedido.pk]))
+		self.assertContains(response, 'Tech Supply')
+		self.assertNotContains(response, 'Distribuidora')
+
+
+class ExportacaoTests(LoginTestCase):
+	def test_csv_de_pedidos_respeita_filtros(self):
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		item = Item.objects.create(nome='Teclado')
+		Pedido.objects.create(fornecedor=fornecedor, item=item, status='ENTREGUE')
+		Pedido.objects.create(fornecedor=fornecedor, item=item, quantidade=7)
+		response = self.client.get(reverse('exportar_pedidos'), {'status': 'PENDENTE'})
+		self.assertTrue(response.streaming)
+		linhas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+		self.assertEqual(len(linhas), 2)
+		self.assertIn('Tech Supply,Teclado,7,Pendente', linhas[1])
+
+	def test_xlsx_e_um_zip_valido(self):
+		Item.objects.create(nome='Mouse & Cia', quantidade=4)
+		response = self.client.get(reverse('exportar_inventario'), {'formato': 'xlsx'})
+		conteudo = BytesIO(b''.join(response.streaming_content))
+		with zipfile.ZipFile(conteudo) as arquivo:
+			planilha = arquivo.read('xl/worksheets/sheet1.xml').decode()
+		self.assertIn('Mouse &amp; Cia', planilha)
+		self.assertIn('<v>4</v>', planilha)
+
+
+class PlanoConsultaTests(LoginTestCase):
+	"""Falha se alguma listagem fizer varredura completa de uma tabela do core."""
+
+	def setUp(self):
+		super().setUp()
+		fornecedor = Fornecedor.objects.create(nome='Tech Supply')
+		itens = Item.objects.bulk_create([Item(nome=f'Item {i:03d}', quantidade=i) for i in range(60)])
+		Pedido.objects.bulk_create([Pedido(fornecedor=fornecedor, item=item) for item in itens])
+		Loja.objects.bulk_create([Loja(nome=f'Loja {i:03d}') for i in range(60)])
+		self.fornecedor = fornecedor
+
+	def planos_ruins(self, url, params=None):
+		cache.clear()
+		with CaptureQueriesContext(connection) as contexto:
+			response = self.client.get(url, params or {})
+		self.assertEqual(response.status_code, 200)
+		ruins = []
+		with connection.cursor() as cursor:
+			for consulta in contexto.captured_queries:
+				sql = consulta['sql']
+				if not sql.startswith('SELECT') or 'core_' not in sql:
+					continue
+				cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+				for linha in cursor.fetchall():
+					detalhe = linha[-1]
+					varredura = re.match(r'SCAN (TABLE )?core_\w+$', detalhe)
+					if varredura or 'TEMP B-TREE FOR ORDER BY' in detalhe:
+						ruins.append((sql, detalhe))
+		return response, ruins
+
+	def test_listagens_usam_indices(self):
+		casos = [
+			('dashboard', {}),
+			('inventario', {}),
+			('inventario', {'status': 'DISPONIVEL'}),
+			('inventario', {'repor': '1'}),
+			('fornecedores', {}),
+			('fornecedores', {'status': 'ATIVO'}),
+			('pedidos', {}),
+			('pedidos', {'status': 'PENDENTE'}),
+			('pedidos', {'fornecedor': self.fornecedor.pk}),
+			('gerenciar_loja', {}),
+			('gerenciar_loja', {'status': 'ATIVA'}),
+		]
+		for nome, params in casos:
+			with self.subTest(view=nome, **params):
+				response, ruins = self.planos_ruins(reverse(nome), params)
+				self.assertEqual(ruins, [])
+				pagina = response.context.get('pagina')
+				if pagina is not None and pagina.has_next:
+					_, ruins = self.planos_ruins(reverse(nome), {**params, 'cursor': pagina.next_cursor})
+					self.assertEqual(ruins, [])
+
+
+class PerfilProducaoTests(TestCase):
+	def carregar(self, **ambiente):
+		with mock.patch.dict(os.environ, ambiente):
+			from estoque_facil import settings_producao
+			return importlib.reload(settings_producao)
+
+	def test_sqlite_com_wal_e_conexoes_persistentes(self):
+		perfil = self.carregar(ESTOQUE_DB='sqlite')
+		banco = perfil.DATABASES['default']
+		self.assertFalse(perfil.DEBUG)
+		self.assertEqual(banco['CONN_MAX_AGE'], 600)
+		self.assertTrue(banco['CONN_HEALTH_CHECKS'])
+		self.assertIn('PRAGMA journal_mode=WAL;', banco['OPTIONS']['init_command'])
+		self.assertIn('PRAGMA busy_timeout=5000;', banco['OPTIONS']['init_command'])
+		self.assertEqual(banco['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+	def test_postgres_com_pool(self):
+		banco = self.carregar(ESTOQUE_DB='postgres', ESTOQUE_DB_POOL='1').DATABASES['default']
+		self.assertEqual(banco['ENGINE'], 'django.db.backends.postgresql')
+		self.assertEqual(banco['CONN_MAX_AGE'], 0)
+		self.assertIn('pool', banco['OPTIONS'])
+		banco = self.carregar(ESTOQUE_DB='postgres', ESTOQUE_DB_POOL='0').DATABASES['default']
+		self.assertEqual(banco['CONN_MAX_AGE'], 600)
+		self.assertEqual(banco['OPTIONS'], {})
+
+
+class MetricasTests(LoginTestCase):
+	def setUp(self):
+		super().setUp()
+		metricas.limpar()
+
+	def test_registra_tempo_e_consultas_por_rota(self):
+		self.client.get(reverse('inventario'))
+		self.client.get(reverse('inventario'))
+		dados = metricas.consolidar()['inventario']
+		self.assertEqual(dados['requisicoes'], 2)
+		self.assertGreater(dados['consultas_soma'], 0)
+		texto = self.client.get(reverse('metrics')).content.decode()
+		self.assertIn('estoque_http_request_duration_seconds_count{view="inventario"} 2', texto)
+		self.assertIn('estoque_db_queries_per_request_bucket{view="inventario",le="+Inf"} 2', texto)
+
+	def test_soma_retratos_de_outros_workers(self):
+		with tempfile.TemporaryDirectory() as diretorio, self.settings(ESTOQUE_METRICAS_DIR=diretorio):
+			outro = {'inventario': {**metricas._nova_rota(), 'requisicoes': 5, 'consultas_soma': 10}}
+			Path(diretorio, '999999.json').write_text(json.dumps(outro))
+			self.client.get(reverse('inventario'))
+			self.assertEqual(metricas.consolidar()['inventario']['requisicoes'], 6)
+
+	def test_ignora_e_apaga_retratos_de_workers_encerrados(self):
+		with tempfile.TemporaryDirectory() as diretorio, self.settings(ESTOQUE_METRICAS_DIR=diretorio):
+			morto = Path(diretorio, '999999.json')
+			morto.write_text(json.dumps({'inventario': {**metricas._nova_rota(), 'requisicoes': 5}}))
+			antigo = time.time() - metricas.RETRATO_EXPIRA - 60
+			os.utime(morto, (antigo, antigo))
+			self.client.get(reverse('inventario'))
+			self.assertEqual(metricas.consolidar()['inventario']['requisicoes'], 1)
+			self.assertFalse(morto.exists())
+
+	def test_gravacao_concorrente_e_falha_de_disco(self):
+		self.client.get(reverse('inventario'))
+		with tempfile.TemporaryDirectory() as diretorio, self.settings(ESTOQUE_METRICAS_DIR=diretorio):
+			erros = []
+
+			def gravar():
+				try:
+					metricas._gravar_se_preciso(forcar=True)
+				except Exception as erro:
+					erros.append(erro)
+
+			threads = [threading.Thread(target=gravar) for _ in range(8)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			self.assertEqual(erros, [])
+			self.assertEqual([arquivo.name for arquivo in Path(diretorio).iterdir()], [f'{os.getpid()}.json'])
+
+			# Diretório inválido: a requisição segue e o erro vai para o log.
+			bloqueio = Path(diretorio, 'arquivo')
+			bloqueio.write_text('')
+			with self.settings(ESTOQUE_METRICAS_DIR=str(bloqueio)), self.assertLogs('core.metricas', 'ERROR'):
+				metricas._ultima_gravacao = 0.0
+				self.assertEqual(self.client.get(reverse('inventario')).status_code, 200)
+
+	@override_settings(ESTOQUE_SLOW_REQUEST_MS=0)
+	def test_aviso_de_requisicao_lenta(self):
+		Item.objects.create(nome='Teclado')
+		with self.assertLogs('core.metricas', level='WARNING') as logs:
+			self.client.get(reverse('inventario'))
+		self.assertIn('(inventario)', logs.output[0])
+		self.assertIn('SELECT', logs.output[0])
+
+
+class SeedBenchmarkTests(LoginTestCase):
+	def test_seed_gera_volumes_consistentes(self):
+		call_command('seed', itens=40, stdout=StringIO())
+		self.assertEqual(Item.objects.count(), 40)
+		self.assertEqual(Pedido.objects.count(), 40)
+		self.assertTrue(Atribuicao.objects.exists())
+		self.assertTrue(ItemOrdem.objects.exists())
+		self.assertEqual(resumo.obter().total_itens, 40)
+		datas = Pedido.objects.values_list('criado_em', flat=True)
+		self.assertGreater(max(datas) - min(datas), timedelta(days=1))
+
+	def test_bench_acusa_regressao_de_consultas(self):
+		call_command('seed', itens=20, stdout=StringIO())
+		with tempfile.TemporaryDirectory() as diretorio:
+			baseline = Path(diretorio, 'baseline.json')
+			call_command('bench_views', repeticoes=1, salvar=str(baseline), stdout=StringIO())
+			dados = json.loads(baseline.read_text())
+			dados['views']['inventario']['consultas'] -= 1
+			baseline.write_text(json.dumps(dados))
+			with self.assertRaises(CommandError):
+				call_command('bench_views', repeticoes=1, baseline=str(baseline), stdout=StringIO(), stderr=StringIO())
@@ -1,10 +1,13 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Rotas principais
     path('', views.dashboard, name='dashboard'),
+    path('painel/eventos/', views.painel_eventos, name='painel_eventos'),
     path('inventario/', views.inventario, name='inventario'),
+    path('inventario/exportar/', views.exportar_inventario, name='exportar_inventario'),
+    path('inventario/em-massa/', views.inventario_em_massa, name='inventario_em_massa'),
     path('inventario/novo/', views.item_create, name='item_create'),
     path('inventario/<int:pk>/editar/', views.item_update, name='item_update'),
     path('inventario/<int:pk>/excluir/', views.item_delete, name='item_delete'),
@@ -15,15 +18,41 @@ urlpatterns = [
     path('fornecedores/<int:pk>/excluir/', views.fornecedor_delete, name='fornecedor_delete'),
 
     path('pedidos/', views.pedidos, name='pedidos'),
+    path('pedidos/exportar/', views.exportar_pedidos, name='exportar_pedidos'),
+    path('pedidos/em-massa/', views.pedidos_em_massa, name='pedidos_em_massa'),
     path('pedidos/novo/', views.pedido_create, name='novo_pedido'),
     path('pedidos/<int:pk>/editar/', views.pedido_update, name='pedido_update'),
     path('pedidos/<int:pk>/excluir/', views.pedido_delete, name='pedido_delete'),
 
+    path('compras/', views.ordens_compra, name='ordens_compra'),
+    path('compras/gerar/', views.gerar_ordens_compra, name='gerar_ordens_compra'),
+
     path('lojas/', views.gerenciar_loja, name='gerenciar_loja'),
     path('lojas/novo/', views.loja_create, name='loja_create'),
     path('lojas/<int:pk>/editar/', views.loja_update, name='loja_update'),
     path('lojas/<int:pk>/excluir/', views.loja_delete, name='loja_delete'),
 
+    path('autocomplete/fornecedores/', views.autocomplete_fornecedores, name='autocomplete_fornecedores'),
+    path('autocomplete/itens/', views.autocomplete_itens, name='autocomplete_itens'),
+
+    path('importar/', views.importar_csv, name='importar_csv'),
+
+    path('tarefas/', views.tarefas_lista, name='tarefas'),
+    path('tarefas/nova/', views.tarefa_nova, name='tarefa_nova'),
+    path('tarefas/<int:pk>/', views.tarefa_detalhe, name='tarefa_detalhe'),
+    path('tarefas/<int:pk>/status/', views.tarefa_status, name='tarefa_status'),
+
+    path('metrics', views.metrics, name='metrics'),
+
+    # API somente leitura
+    path('api/v1/itens/', api.lista, {'recurso': 'itens'}, name='api_itens'),
+    path('api/v1/fornecedores/', api.lista, {'recurso': 'fornecedores'}, name='api_fornecedores'),
+    path('api/v1/lojas/', api.lista, {'recurso': 'lojas'}, name='api_lojas'),
+    path('api/v1/pedidos/', api.lista, {'recurso': 'pedidos'}, name='api_pedidos'),
+    path('api/v1/itens/mudancas/', api.mudancas, {'recurso': 'itens'}, name='api_itens_mudancas'),
+    path('api/v1/fornecedores/mudancas/', api.mudancas, {'recurso': 'fornecedores'}, name='api_fornecedores_mudancas'),
+    path('api/v1/lojas/mudancas/', api.mudancas, {'recurso': 'lojas'}, name='api_lojas_mudancas'),
+
     path('produto/novo/', views.novo_produto, name='novo_produto'),
     
     # Autenticação
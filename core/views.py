@@ -1,47 +1,85 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
-from django.db.models import Q, Sum
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from . import (
+    caching, compras, em_massa, estoque, eventos, exportacao, importacao, metricas, painel, resumo, resumo_mensal,
+    search, tarefas,
+)
+from .forms import AcaoEmMassaForm, FornecedorForm, ImportacaoForm, ItemForm, PedidoForm, LojaForm, UsuarioCreationForm
+from .filtros import (
+    filtrar_fornecedores, filtrar_itens, filtrar_lojas, filtrar_pedidos, filtrar_pedidos_arquivados,
+    incluir_arquivados,
+)
+from .models import Fornecedor, Item, OrdemCompra, Pedido, Loja, Tarefa
+from .pagination import paginar
+from .roteamento import leitura_em_replica
+
+MESES_ABREVIADOS = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+def tendencia(atual, anterior):
+    """Variação percentual em relação ao mês anterior, no formato dos cards."""
+    if not anterior:
+        return '', None
+    variacao = (atual - anterior) * 100 / anterior
+    return f'{variacao:+.0f}%', 'up' if variacao >= 0 else 'down'
 
-from .forms import FornecedorForm, ItemForm, PedidoForm, LojaForm, UsuarioCreationForm
-from .models import Fornecedor, Item, Pedido, Loja
 
 # --- Esta é a sua página principal ---
 @login_required
+@leitura_em_replica
 def dashboard(request):
-    total_itens = Item.objects.count()
-    itens_baixo_estoque = Item.objects.filter(quantidade__lte=5).count()
-    total_fornecedores = Fornecedor.objects.count()
-    pedidos_pendentes = Pedido.objects.filter(status='PENDENTE').count()
-    valor_total = Item.objects.aggregate(total=Sum('valor'))['total'] or 0
+    contadores = resumo.obter()
+    total_itens = contadores.total_itens
+    itens_baixo_estoque = contadores.itens_baixo_estoque
+    total_fornecedores = contadores.total_fornecedores
+    pedidos_pendentes = contadores.pedidos_pendentes
+    valor_total = contadores.valor_total
+
+    mes = timezone.localdate().strftime('%Y-%m')
+    serie = painel.serie(request)
+    (_, anterior), (_, atual) = serie[-2:]
+
+    # `chave` liga o card aos valores enviados pelo fluxo ao vivo (core/painel.py).
+    def card(label, meta, chave):
+        valor = painel.total_mes(atual, chave)
+        trend, trend_type = tendencia(valor, painel.total_mes(anterior, chave))
+        return {'label': label, 'value': valor, 'meta': meta, 'trend': trend, 'trend_type': trend_type, 'chave': chave}
 
     overview_cards = [
-        {'label': 'Vendas', 'value': 'R$ 832', 'meta': 'Últimos 7 dias', 'trend': '+8,3%', 'trend_type': 'up'},
-        {'label': 'Receita', 'value': 'R$ 18.300', 'meta': 'Mês atual', 'trend': '+12%', 'trend_type': 'up'},
-        {'label': 'Produtos', 'value': total_itens, 'meta': 'Cadastrados', 'trend': '+2 novos', 'trend_type': 'up'},
-        {'label': 'Lucro', 'value': 'R$ 17.432', 'meta': 'Estimado', 'trend': '-3%', 'trend_type': 'down'},
+        card('Pedidos', 'Mês atual', 'pedidos_mes'),
+        card('Entregues', 'Mês atual', 'entregues_mes'),
+        {'label': 'Produtos', 'value': total_itens, 'meta': 'Cadastrados', 'chave': 'total_itens'},
+        card('Unidades recebidas', 'Mês atual', 'unidades_recebidas_mes'),
     ]
 
     compras_cards = [
-        {'label': 'Compras', 'value': 82, 'meta': 'na semana', 'trend': '+5%', 'trend_type': 'up'},
-        {'label': 'Custo', 'value': 'R$ 13.573', 'meta': 'em pedidos', 'trend': '-2%', 'trend_type': 'down'},
-        {'label': 'Cancelamentos', 'value': 5, 'meta': 'nos últimos 30 dias', 'trend': '-1%', 'trend_type': 'down'},
-        {'label': 'Retorno', 'value': 'R$ 17.432', 'meta': 'estimado', 'trend': '+4%', 'trend_type': 'up'},
+        card('Pendentes', 'criados no mês', 'pendentes_mes'),
+        card('Em trânsito', 'criados no mês', 'em_transito_mes'),
+        card('Unidades', 'em pedidos no mês', 'unidades_mes'),
+        card('Cancelamentos', 'no mês', 'cancelamentos_mes'),
     ]
 
     resumo_inventario = [
-        {'label': 'Quantidade em mãos', 'value': total_itens},
-        {'label': 'A receber', 'value': pedidos_pendentes},
+        {'label': 'Quantidade em mãos', 'value': total_itens, 'chave': 'total_itens'},
+        {'label': 'A receber', 'value': pedidos_pendentes, 'chave': 'pedidos_pendentes'},
     ]
 
     resumo_produto = [
-        {'label': 'Número de Fornecedores', 'value': total_fornecedores},
-        {'label': 'Itens em baixa', 'value': itens_baixo_estoque},
+        {'label': 'Número de Fornecedores', 'value': total_fornecedores, 'chave': 'total_fornecedores'},
+        {'label': 'Itens em baixa', 'value': itens_baixo_estoque, 'chave': 'itens_baixo_estoque'},
     ]
 
-    estoque_baixo = Item.objects.filter(quantidade__lte=10).order_by('quantidade')[:4]
+    estoque_baixo = painel.estoque_baixo()
 
     acoes_vendidas = [
         {'nome': 'Surf Excel', 'vendida': 30, 'restante': 12, 'preco': 'R$ 100'},
@@ -49,12 +87,19 @@ def dashboard(request):
         {'nome': 'Parle G', 'vendida': 19, 'restante': 17, 'preco': 'R$ 105'},
     ]
 
-    chart_labels = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun']
-    chart_vendas = [50, 46, 49, 44, 48, 45]
-    chart_compras = [38, 40, 35, 39, 36, 34]
+    # Alturas em px relativas ao maior valor do período.
+    chart_pedidos = [resumo_mensal.total(por_status) for _, por_status in serie]
+    chart_entregues = [resumo_mensal.total(por_status, 'ENTREGUE') for _, por_status in serie]
+    escala = 120 / max(chart_pedidos + chart_entregues + [1])
     chart_points = [
-        {'label': label, 'venda': venda, 'compra': compra}
-        for label, venda, compra in zip(chart_labels, chart_vendas, chart_compras)
+        {
+            'label': MESES_ABREVIADOS[mes.month - 1],
+            'entregues': entregues,
+            'pedidos': pedidos,
+            'altura_entregues': round(entregues * escala),
+            'altura_pedidos': round(pedidos * escala),
+        }
+        for (mes, _), entregues, pedidos in zip(serie, chart_entregues, chart_pedidos)
     ]
 
     contexto = {
@@ -66,9 +111,22 @@ def dashboard(request):
         'acoes_vendidas': acoes_vendidas,
         'estoque_baixo': estoque_baixo,
         'valor_total': valor_total,
+        # Chave dos fragmentos em cache dos cards e do gráfico
+        'versao_cards': caching.versao_fragmento(request, ['core.pedido', 'core.item'], mes),
     }
     return render(request, 'core/dashboard.html', contexto)
 
+
+# Servida pelo ASGI: cada cliente conectado é só uma fila no difusor, sem
+# consultas próprias (ver core/eventos.py).
+@login_required
+async def painel_eventos(request):
+    response = StreamingHttpResponse(eventos.fluxo(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # --- Esta é a sua TELA DE LOGIN ---
 class EstoqueLoginView(LoginView):
     template_name = 'core/login.html'
@@ -95,23 +153,27 @@ def registrar(request):
     return render(request, 'core/registro.html', {'form': form})
 
 @login_required
+@leitura_em_replica
 def inventario(request):
-    itens = Item.objects.all().order_by('nome')
+    itens = filtrar_itens(request.GET).order_by('nome')
     query = request.GET.get('q')
     status_filter = request.GET.get('status')
 
-    if query:
-        itens = itens.filter(nome__icontains=query)
-    if status_filter:
-        itens = itens.filter(status=status_filter)
-
-    total_valor = Item.objects.aggregate(total=Sum('valor'))['total'] or 0
+    total_valor = resumo.obter().valor_total
+    pagina = caching.obter(
+        request, 'inventario', ['core.item'],
+        lambda: paginar(itens, ('nome', 'pk'), request.GET.get('cursor')),
+        request.GET.dict(),
+    )
 
     contexto = {
-        'itens': itens,
+        'itens': pagina,
+        'pagina': pagina,
         'query': query or '',
         'status_filter': status_filter or '',
+        'status_choices': Item.STATUS_CHOICES,
         'total_valor': total_valor,
+        'repor': request.GET.get('repor') == '1',
     }
     return render(request, 'core/inventario.html', contexto)
 
@@ -130,9 +192,19 @@ def item_create(request):
 @login_required
 def item_update(request, pk):
     item = get_object_or_404(Item, pk=pk)
+    carregada = item.quantidade
     form = ItemForm(request.POST or None, instance=item)
     if request.method == 'POST' and form.is_valid():
-        form.save()
+        anterior = form.cleaned_data['quantidade_anterior']
+        delta = form.cleaned_data['quantidade'] - (carregada if anterior is None else anterior)
+        with transaction.atomic():
+            # A quantidade não é regravada: muda só pelo movimento de ajuste.
+            item = form.save(commit=False)
+            item.quantidade = carregada
+            campos = [campo for campo in ItemForm.Meta.fields if campo != 'quantidade']
+            item.save(update_fields=campos + ['atualizado_em'])
+            if delta:
+                estoque.movimentar(item, 'AJUSTE', delta, usuario=request.user)
         messages.success(request, 'Item atualizado com sucesso.')
         return redirect('inventario')
 
@@ -156,20 +228,24 @@ def item_delete(request, pk):
 
 
 @login_required
+@leitura_em_replica
 def fornecedores(request):
-    fornecedores_queryset = Fornecedor.objects.all().order_by('nome')
+    fornecedores_queryset = filtrar_fornecedores(request.GET).order_by('nome')
     query = request.GET.get('q')
     status_filter = request.GET.get('status')
 
-    if query:
-        fornecedores_queryset = fornecedores_queryset.filter(nome__icontains=query)
-    if status_filter:
-        fornecedores_queryset = fornecedores_queryset.filter(status=status_filter)
+    pagina = caching.obter(
+        request, 'fornecedores', ['core.fornecedor'],
+        lambda: paginar(fornecedores_queryset, ('nome', 'pk'), request.GET.get('cursor')),
+        request.GET.dict(),
+    )
 
     contexto = {
-        'fornecedores': fornecedores_queryset,
+        'fornecedores': pagina,
+        'pagina': pagina,
         'query': query or '',
         'status_filter': status_filter or '',
+        'status_choices': Fornecedor.STATUS_CHOICES,
     }
     return render(request, 'core/fornecedores.html', contexto)
 
@@ -214,21 +290,35 @@ def fornecedor_delete(request, pk):
 
 
 @login_required
+@leitura_em_replica
 def pedidos(request):
-    pedidos_queryset = Pedido.objects.select_related('fornecedor', 'item').order_by('-criado_em')
+    pedidos_queryset = filtrar_pedidos(request.GET).select_related('fornecedor', 'item').order_by('-criado_em')
+    arquivados = incluir_arquivados(request.GET)
+    if arquivados:
+        pedidos_queryset = [
+            pedidos_queryset, filtrar_pedidos_arquivados(request.GET).select_related('fornecedor', 'item'),
+        ]
     status_filter = request.GET.get('status')
     fornecedor_filter = request.GET.get('fornecedor')
 
-    if status_filter:
-        pedidos_queryset = pedidos_queryset.filter(status=status_filter)
+    fornecedor_selecionado = None
     if fornecedor_filter:
-        pedidos_queryset = pedidos_queryset.filter(fornecedor_id=fornecedor_filter)
+        fornecedor_selecionado = Fornecedor.objects.filter(pk=fornecedor_filter).values('pk', 'nome').first()
+
+    pagina = caching.obter(
+        request, 'pedidos', ['core.pedido', 'core.fornecedor', 'core.item'],
+        lambda: paginar(pedidos_queryset, ('-criado_em', '-pk'), request.GET.get('cursor')),
+        request.GET.dict(),
+    )
 
     contexto = {
-        'pedidos': pedidos_queryset,
-        'fornecedores': Fornecedor.objects.all().order_by('nome'),
+        'pedidos': pagina,
+        'pagina': pagina,
+        'fornecedor_selecionado': fornecedor_selecionado,
+        'status_choices': Pedido.STATUS_CHOICES,
         'status_filter': status_filter or '',
         'fornecedor_filter': fornecedor_filter or '',
+        'arquivados': arquivados,
     }
     return render(request, 'core/pedidos.html', contexto)
 
@@ -273,26 +363,25 @@ def pedido_delete(request, pk):
 
 
 @login_required
+@leitura_em_replica
 def gerenciar_loja(request):
-    lojas_qs = Loja.objects.all()
+    lojas_qs = filtrar_lojas(request.GET)
     query = request.GET.get('q')
     status_filter = request.GET.get('status')
 
-    if query:
-        lojas_qs = lojas_qs.filter(
-            Q(nome__icontains=query) |
-            Q(responsavel__icontains=query) |
-            Q(cidade__icontains=query)
-        )
-    if status_filter:
-        lojas_qs = lojas_qs.filter(status=status_filter)
+    pagina = caching.obter(
+        request, 'lojas', ['core.loja'],
+        lambda: paginar(lojas_qs, ('nome', 'pk'), request.GET.get('cursor')),
+        request.GET.dict(),
+    )
 
     contexto = {
-        'lojas': lojas_qs,
+        'lojas': pagina,
+        'pagina': pagina,
         'query': query or '',
         'status_filter': status_filter or '',
         'status_choices': Loja.STATUS_CHOICES,
-        'total_lojas': lojas_qs.count(),
+        'total_lojas': pagina.total,
     }
     return render(request, 'core/lojas.html', contexto)
 
@@ -338,6 +427,214 @@ def loja_delete(request, pk):
     return render(request, 'core/confirm_delete.html', contexto)
 
 
+def _acao_em_massa(request, queryset, status_choices):
+    """
+    Valida o formulário de ação em massa e devolve (form, registros): os pks
+    marcados ou, com `todos`, tudo o que os filtros da lista selecionam.
+    """
+    form = AcaoEmMassaForm(request.POST, status_choices=status_choices)
+    if not form.is_valid():
+        for erro in form.errors.values():
+            messages.error(request, ' '.join(erro))
+        return form, None
+    if not form.cleaned_data['todos']:
+        queryset = queryset.model.objects.filter(pk__in=form.cleaned_data['selecionados'])
+    return form, queryset
+
+
+def _voltar_para_lista(request, lista):
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    return redirect(f"{reverse(lista)}?{params.urlencode()}" if params else reverse(lista))
+
+
+@login_required
+@require_POST
+def pedidos_em_massa(request):
+    form, pedidos_queryset = _acao_em_massa(request, filtrar_pedidos(request.GET), Pedido.STATUS_CHOICES)
+    if pedidos_queryset is not None:
+        acao = form.cleaned_data['acao']
+        if acao == 'status':
+            total = em_massa.alterar_status_pedidos(pedidos_queryset, form.cleaned_data['status'])
+            messages.success(request, f'{total} pedidos alterados.')
+        elif acao == 'quantidade':
+            total = em_massa.ajustar_quantidade_pedidos(pedidos_queryset, form.cleaned_data['quantidade'])
+            messages.success(request, f'{total} pedidos ajustados.')
+        else:
+            total = em_massa.excluir_pedidos(pedidos_queryset)
+            messages.success(request, f'{total} pedidos excluídos.')
+    return _voltar_para_lista(request, 'pedidos')
+
+
+@login_required
+@require_POST
+def inventario_em_massa(request):
+    form, itens = _acao_em_massa(request, filtrar_itens(request.GET), Item.STATUS_CHOICES)
+    if itens is not None:
+        acao = form.cleaned_data['acao']
+        if acao == 'status':
+            total = em_massa.alterar_status_itens(itens, form.cleaned_data['status'])
+            messages.success(request, f'{total} itens alterados.')
+        elif acao == 'quantidade':
+            total = em_massa.ajustar_estoque_itens(itens, form.cleaned_data['quantidade'], usuario=request.user)
+            messages.success(request, f'{total} itens ajustados.')
+        else:
+            total, protegidos = em_massa.excluir_itens(itens)
+            messages.success(request, f'{total} itens excluídos.')
+            if protegidos:
+                messages.warning(request, f'{protegidos} itens não foram excluídos porque têm pedidos.')
+    return _voltar_para_lista(request, 'inventario')
+
+
+@login_required
+def importar_csv(request):
+    form = ImportacaoForm(request.POST or None, request.FILES or None, initial={'tipo': request.GET.get('tipo')})
+    resultado = None
+    if request.method == 'POST' and form.is_valid() and form.cleaned_data['em_segundo_plano']:
+        tarefa = tarefas.enfileirar(
+            'importar_csv', {'tipo': form.cleaned_data['tipo']}, usuario=request.user,
+            arquivo=form.cleaned_data['arquivo'],
+        )
+        messages.success(request, 'Importação enviada para processamento em segundo plano.')
+        return redirect('tarefa_detalhe', pk=tarefa.pk)
+    if request.method == 'POST' and form.is_valid():
+        resultado = importacao.importar(form.cleaned_data['tipo'], importacao.ler_csv(form.abrir()))
+        messages.success(request, f'{resultado.importados} registros importados, {resultado.total_erros} linhas com erro.')
+
+    contexto = {'form': form, 'resultado': resultado, 'titulo': 'Importar CSV'}
+    return render(request, 'core/importar.html', contexto)
+
+
+def _tarefas_visiveis(request):
+    # A equipe vê todas as tarefas; os demais, só as próprias.
+    if request.user.is_staff:
+        return Tarefa.objects.all()
+    return Tarefa.objects.filter(usuario=request.user)
+
+
+@login_required
+def tarefas_lista(request):
+    lista = _tarefas_visiveis(request).select_related('usuario').defer('resultado', 'erro')
+    pagina = paginar(lista, ('-criado_em', '-pk'), request.GET.get('cursor'), total=False)
+    contexto = {
+        'tarefas': pagina,
+        'pagina': pagina,
+        'manutencao': tarefas.MANUTENCAO.items() if request.user.is_staff else [],
+    }
+    return render(request, 'core/tarefas.html', contexto)
+
+
+@login_required
+@require_POST
+def tarefa_nova(request):
+    tipo = request.POST.get('tipo')
+    if not request.user.is_staff or tipo not in tarefas.MANUTENCAO:
+        return HttpResponseForbidden()
+    tarefa = tarefas.enfileirar(tipo, usuario=request.user)
+    messages.success(request, f'Tarefa "{tarefas.MANUTENCAO[tipo]}" enfileirada.')
+    return redirect('tarefa_detalhe', pk=tarefa.pk)
+
+
+@login_required
+def tarefa_detalhe(request, pk):
+    tarefa = get_object_or_404(_tarefas_visiveis(request), pk=pk)
+    return render(request, 'core/tarefa.html', {'tarefa': tarefa, 'finalizados': tarefas.FINALIZADOS})
+
+
+@login_required
+def tarefa_status(request, pk):
+    campos = ('id', 'tipo', 'status', 'progresso', 'mensagem', 'tentativas', 'resultado', 'concluido_em')
+    tarefa = _tarefas_visiveis(request).filter(pk=pk).values(*campos).first()
+    if tarefa is None:
+        return JsonResponse({'erro': 'Tarefa não encontrada.'}, status=404)
+    return JsonResponse(tarefa)
+
+
+@login_required
+@leitura_em_replica
+def exportar_inventario(request):
+    itens = filtrar_itens(request.GET).order_by('nome', 'pk')
+    return exportacao.resposta(
+        'inventario',
+        request.GET.get('formato'),
+        ['Produto', 'Categoria', 'Localização', 'Quantidade', 'Valor (R$)', 'Status'],
+        exportacao.linhas_itens(itens),
+    )
+
+
+@login_required
+@leitura_em_replica
+def exportar_pedidos(request):
+    # A exportação é o histórico completo: inclui sempre os pedidos arquivados.
+    ordem = ('-criado_em', '-pk')
+    return exportacao.resposta(
+        'pedidos',
+        request.GET.get('formato'),
+        ['#', 'Fornecedor', 'Item', 'Quantidade', 'Status', 'Prevista', 'Criado em'],
+        exportacao.linhas_pedidos(
+            filtrar_pedidos(request.GET).order_by(*ordem),
+            filtrar_pedidos_arquivados(request.GET).order_by(*ordem),
+        ),
+    )
+
+
+def _pode_comprar(user):
+    return user.is_staff or user.perfil == 'GERENTE_COMPRAS'
+
+
+@login_required
+def ordens_compra(request):
+    lista = OrdemCompra.objects.select_related('fornecedor').prefetch_related('itemordem_set__item')
+    pagina = paginar(lista, ('-pk',), request.GET.get('cursor'), total=False)
+    contexto = {
+        'ordens': pagina,
+        'pagina': pagina,
+        'pode_gerar': _pode_comprar(request.user),
+    }
+    return render(request, 'core/ordens_compra.html', contexto)
+
+
+@login_required
+@require_POST
+def gerar_ordens_compra(request):
+    if not _pode_comprar(request.user):
+        return HttpResponseForbidden()
+    resultado = compras.gerar()
+    if resultado['ordens']:
+        messages.success(request, f"{resultado['ordens']} ordens de compra geradas com {resultado['linhas']} itens.")
+    else:
+        messages.info(request, 'Nenhum item novo a repor.')
+    if resultado['sem_fornecedor']:
+        messages.warning(request, f"{resultado['sem_fornecedor']} itens a repor não têm fornecedor conhecido.")
+    return redirect('ordens_compra')
+
+
+def _autocomplete(request, queryset):
+    queryset = search.buscar(queryset.only('pk', 'nome'), request.GET.get('q', ''))
+    pagina = paginar(queryset, ('nome', 'pk'), request.GET.get('cursor'), por_pagina=20, total=False)
+    return JsonResponse({
+        'results': [{'id': obj.pk, 'text': obj.nome} for obj in pagina],
+        'next': pagina.next_cursor,
+    })
+
+
+@login_required
+def autocomplete_fornecedores(request):
+    return _autocomplete(request, Fornecedor.objects.all())
+
+
+@login_required
+def autocomplete_itens(request):
+    return _autocomplete(request, Item.objects.all())
+
+
+def metrics(request):
+    token = getattr(settings, 'ESTOQUE_METRICAS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(metricas.exposicao(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # URLs legadas
 @login_required
 def item_list(request):
@@ -3,6 +3,9 @@ ASGI config for estoque_facil project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serves the live dashboard stream (/painel/eventos/, core/eventos.py); run it
+with an ASGI server, e.g. ``uvicorn estoque_facil.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,11 +39,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CacheEscritaMiddleware',
+    'core.middleware.AuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -59,6 +63,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.fragmentos',
             ],
         },
     },
@@ -78,6 +83,114 @@ DATABASES = {
 }
 
 
+# Réplicas de leitura (core/roteamento.py)
+# ESTOQUE_DB_REPLICAS: lista separada por vírgulas; cada valor vira o alias
+# replicaN, cópia de 'default' com `campo` trocado (o arquivo, no SQLite, que o
+# comando sincronizar_replica mantém em dia; o host, no Postgres). Listas,
+# painel, exportações e API leem delas; escritas e leituras logo após uma
+# escrita da mesma sessão (ESTOQUE_REPLICA_ATRASO segundos) ficam no principal.
+
+def _replicas(databases, campo):
+    aliases = []
+    for numero, valor in enumerate(filter(None, os.environ.get('ESTOQUE_DB_REPLICAS', '').split(',')), start=1):
+        alias = f'replica{numero}'
+        databases[alias] = {**databases['default'], campo: valor, 'TEST': {'MIRROR': 'default'}}
+        aliases.append(alias)
+    return aliases
+
+
+ESTOQUE_REPLICAS = _replicas(DATABASES, 'NAME')
+ESTOQUE_REPLICA_ATRASO = float(os.environ.get('ESTOQUE_REPLICA_ATRASO', 5))
+DATABASE_ROUTERS = ['core.roteamento.RoteadorReplicas']
+
+
+# Cache
+# ESTOQUE_CACHE escolhe o backend: 'locmem' (padrão), 'file' ou 'redis'.
+# ESTOQUE_CACHE_LOCATION aponta o diretório (file) ou a URL do servidor
+# compatível com Redis.
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'estoque-facil'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('ESTOQUE_CACHE', 'locmem')]
+
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('ESTOQUE_CACHE_LOCATION', _cache_location),
+    }
+}
+
+# Tempo de vida (s) das listas e dropdowns em cache
+ESTOQUE_CACHE_TIMEOUT = int(os.environ.get('ESTOQUE_CACHE_TIMEOUT', 300))
+
+# Tempo de vida (s) dos fragmentos de template em cache (menu lateral, cards
+# do painel). 0 em desenvolvimento, para que edições nos templates apareçam.
+ESTOQUE_CACHE_FRAGMENTOS = int(os.environ.get('ESTOQUE_CACHE_FRAGMENTOS', 0))
+
+
+# Sessão e usuário autenticado
+# ESTOQUE_SESSAO escolhe onde a sessão fica: 'db' (padrão), 'cached_db' (cache,
+# com o banco como reserva) ou 'cookies' (cookie assinado, sem banco nem cache).
+# ESTOQUE_USUARIO_CACHE > 0 guarda o usuário no cache por esse número de
+# segundos (core/autenticacao.py). Com mais de um processo, 'cached_db' e o
+# cache de usuário pedem um cache compartilhado (ESTOQUE_CACHE=redis ou file).
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('ESTOQUE_SESSAO', 'db')]
+AUTHENTICATION_BACKENDS = ['core.autenticacao.BackendComCache']
+ESTOQUE_USUARIO_CACHE = int(os.environ.get('ESTOQUE_USUARIO_CACHE', 0))
+
+
+# Métricas (/metrics)
+# ESTOQUE_METRICAS_DIR: diretório compartilhado para somar as métricas de
+# vários workers; sem ele cada processo expõe só as próprias.
+ESTOQUE_METRICAS_DIR = os.environ.get('ESTOQUE_METRICAS_DIR')
+ESTOQUE_METRICAS_TOKEN = os.environ.get('ESTOQUE_METRICAS_TOKEN')
+ESTOQUE_SLOW_REQUEST_MS = int(os.environ.get('ESTOQUE_SLOW_REQUEST_MS', 500))
+
+# Tokens aceitos pela API (/api/v1/) em "Authorization: Bearer <token>",
+# separados por vírgula; sem eles a API exige sessão autenticada.
+ESTOQUE_API_TOKENS = [token for token in os.environ.get('ESTOQUE_API_TOKENS', '').split(',') if token]
+
+# Feed de mudanças da API: só entra o que mudou até N segundos atrás, para que
+# transações ainda abertas não fiquem para trás do token entregue.
+ESTOQUE_SINCRONIZACAO_MARGEM = float(os.environ.get('ESTOQUE_SINCRONIZACAO_MARGEM', 5))
+
+# Pedidos entregues ou cancelados há mais de N dias vão para o arquivo
+# (manage.py arquivar_pedidos, ver core/arquivamento.py).
+ESTOQUE_ARQUIVAR_APOS_DIAS = int(os.environ.get('ESTOQUE_ARQUIVAR_APOS_DIAS', 180))
+
+# Tarefas em segundo plano (manage.py processar_tarefas, ver core/tarefas.py):
+# segundos sem batimento até uma tarefa em execução voltar para a fila e espera
+# base antes de repetir uma tarefa que falhou.
+ESTOQUE_TAREFAS_EXPIRAR = int(os.environ.get('ESTOQUE_TAREFAS_EXPIRAR', 600))
+ESTOQUE_TAREFAS_RETENTATIVA = int(os.environ.get('ESTOQUE_TAREFAS_RETENTATIVA', 30))
+
+# Painel ao vivo (/painel/eventos/, ver core/eventos.py): intervalo em segundos
+# entre as leituras das versões das tabelas e entre comentários de keep-alive.
+# O fluxo fica aberto enquanto a aba estiver aberta: sirva-o pelo ASGI
+# (estoque_facil/asgi.py, ex.: uvicorn), não por um worker WSGI síncrono.
+ESTOQUE_EVENTOS_INTERVALO = float(os.environ.get('ESTOQUE_EVENTOS_INTERVALO', 1))
+ESTOQUE_EVENTOS_KEEPALIVE = int(os.environ.get('ESTOQUE_EVENTOS_KEEPALIVE', 15))
+
+# Previsão de demanda (manage.py calcular_previsao, ver core/previsao.py): dias
+# de consumo considerados, fator z do nível de serviço (1.65 ≈ 95%), lead time
+# de quem nunca recebeu um pedido e dias de consumo que o lote de reposição cobre.
+ESTOQUE_PREVISAO_JANELA = int(os.environ.get('ESTOQUE_PREVISAO_JANELA', 90))
+ESTOQUE_PREVISAO_NIVEL_SERVICO = float(os.environ.get('ESTOQUE_PREVISAO_NIVEL_SERVICO', 1.65))
+ESTOQUE_PREVISAO_LEAD_TIME_PADRAO = float(os.environ.get('ESTOQUE_PREVISAO_LEAD_TIME_PADRAO', 7))
+ESTOQUE_PREVISAO_COBERTURA = int(os.environ.get('ESTOQUE_PREVISAO_COBERTURA', 30))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -114,6 +227,11 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Arquivos enviados (default_storage), como o CSV de uma importação em segundo
+# plano, que fica aqui até a tarefa terminar. Com o processar_tarefas em outra
+# máquina, use um volume compartilhado ou outro backend em STORAGES.
+MEDIA_ROOT = os.environ.get('ESTOQUE_MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -125,3 +243,10 @@ AUTH_USER_MODEL = 'core.Usuario'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+
+# Trilha de auditoria (core/auditoria.py): entradas acumuladas em memória e
+# gravadas em lote a cada ESTOQUE_AUDITORIA_INTERVALO segundos (0 = sem thread,
+# grava no fim da requisição) ou ao juntar ESTOQUE_AUDITORIA_LOTE entradas.
+ESTOQUE_AUDITORIA_INTERVALO = float(os.environ.get('ESTOQUE_AUDITORIA_INTERVALO', 2))
+ESTOQUE_AUDITORIA_LOTE = int(os.environ.get('ESTOQUE_AUDITORIA_LOTE', 100))
@@ -0,0 +1,108 @@
+"""
+Production profile for estoque_facil.
+
+Use with DJANGO_SETTINGS_MODULE=estoque_facil.settings_producao. Everything
+not overridden here comes from estoque_facil/settings.py.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, SECRET_KEY, TEMPLATES, _replicas
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+
+# Templates
+# Loader com cache explícito (compila cada template uma vez por processo, sem
+# checar alterações) e sem as informações de depuração dos nós.
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'debug': False,
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+ESTOQUE_CACHE_FRAGMENTOS = int(os.environ.get('ESTOQUE_CACHE_FRAGMENTOS', 3600))
+
+
+# Arquivos estáticos
+# collectstatic grava em STATIC_ROOT os arquivos com hash no nome e as versões
+# .gz/.br (ver core/estaticos.py); o servidor web os entrega com cache longo.
+
+STATIC_ROOT = os.environ.get('ESTOQUE_STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.estaticos.EstaticosComprimidos'},
+}
+
+
+# Database
+# ESTOQUE_DB escolhe o banco: 'sqlite' (padrão) ou 'postgres'.
+#
+# SQLite: conexões persistentes, WAL (leitores não bloqueiam o escritor),
+# busy_timeout para esperar o lock em vez de falhar com "database is locked"
+# e transações IMMEDIATE, que pegam o lock de escrita no BEGIN e evitam o
+# SQLITE_BUSY imediato de quem tenta promover uma leitura a escrita.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+if os.environ.get('ESTOQUE_DB', 'sqlite') == 'postgres':
+    # Com ESTOQUE_DB_POOL=1 (padrão) usa o pool do psycopg 3; o pool
+    # substitui as conexões persistentes, por isso CONN_MAX_AGE = 0.
+    _pool = os.environ.get('ESTOQUE_DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('ESTOQUE_DB_NAME', 'estoque_facil'),
+            'USER': os.environ.get('ESTOQUE_DB_USER', 'estoque_facil'),
+            'PASSWORD': os.environ.get('ESTOQUE_DB_PASSWORD', ''),
+            'HOST': os.environ.get('ESTOQUE_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('ESTOQUE_DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if _pool else 600,
+            'CONN_HEALTH_CHECKS': not _pool,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('ESTOQUE_DB_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('ESTOQUE_DB_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            } if _pool else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('ESTOQUE_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': ' '.join(f'PRAGMA {nome}={valor};' for nome, valor in SQLITE_PRAGMAS.items()),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+            },
+        }
+    }
+
+# Réplicas de leitura (ver settings.py): arquivos no SQLite, hosts no Postgres.
+ESTOQUE_REPLICAS = _replicas(DATABASES, 'HOST' if os.environ.get('ESTOQUE_DB', 'sqlite') == 'postgres' else 'NAME')